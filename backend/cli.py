@@ -0,0 +1,313 @@
+"""
+Headless batch renderer for tournament and team images.
+
+Renders every tournament spec of a JSONL file (or of a directory of .json and
+.jsonl files) with a process pool, outside Streamlit. Each worker keeps one
+warm TileCache for its whole life, so tiles shared between tournaments are
+read and resized once per worker.
+
+Usage:
+    python -m backend.cli specs.jsonl -o generated_images/batch --workers 4
+
+A spec is a JSON object:
+    {"name": "semana_12",
+     "kind": "accessories",
+     "players_data": "player1, acc1, acc2\\nplayer2, acc3",
+     "teams": ["player1, player2"]}
+
+"kind" is "accessories" (default) or "styles". "players_data" may also be a
+list of [player, item, ...] lists and "teams" a list of player lists. For
+each spec, <output>/<name>/tournament.<format> is written, plus
+team_<n>.<format> per team; PNGs are streamed band by band (see
+backend/utils/png_stream.py). A timing report is written to
+<output>/report.json.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List
+
+from backend.composers.image_composer import PlayerImageComposer, TeamImageComposer
+from backend.composers.style_image_composer import (
+    PlayerStyleImageComposer,
+    TeamStyleImageComposer,
+)
+from backend.utils import ACCESSORIES_FOLDER, PLAYERS_FOLDER, STYLES_FOLDER
+from backend.utils.image_utils import TileCache
+from backend.utils.list_utils import parse_teams_from_text
+from backend.validators.tournament_validator import TournamentDataValidator
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("accessories", "styles")
+DEFAULT_IMAGE_SIZE = (94, 94)
+DEFAULT_FORMAT = "jpg"
+REPORT_FILENAME = "report.json"
+
+# Composers of the current worker process, built once by _init_worker
+_worker = {}
+
+
+class SpecError(ValueError):
+    """Raised for a tournament spec that cannot be rendered."""
+
+
+def load_specs(path) -> List[dict]:
+    """
+    Reads the specs of a .jsonl file, or of every .json/.jsonl file of a
+    directory (sorted by name). Specs without a name are named after their
+    file and position.
+    """
+    path = Path(path)
+    files = sorted(path.glob("*.json*")) if path.is_dir() else [path]
+
+    specs = []
+    for file in files:
+        if file.suffix == ".json":
+            spec = json.loads(file.read_text(encoding="utf-8"))
+            spec.setdefault("name", file.stem)
+            specs.append(spec)
+            continue
+
+        lines = file.read_text(encoding="utf-8").splitlines()
+        for number, line in enumerate(lines, start=1):
+            if line.strip():
+                spec = json.loads(line)
+                spec.setdefault("name", f"{file.stem}_{number}")
+                specs.append(spec)
+
+    names = [spec["name"] for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise SpecError(f"Duplicate spec names: {', '.join(duplicates)}")
+
+    return specs
+
+
+def players_data_from_spec(spec) -> List[List[str]]:
+    """The [player, item, ...] rows of a spec, from text lines or lists."""
+    players_data = spec.get("players_data")
+    if isinstance(players_data, str):
+        errors = []
+        players_data = TournamentDataValidator.validate(
+            players_data, error_func=errors.append
+        )
+        if players_data is None:
+            raise SpecError(errors[0])
+    if not players_data:
+        raise SpecError("Spec has no players_data")
+
+    return [[str(item).strip() for item in row] for row in players_data]
+
+
+def teams_from_spec(spec) -> List[List[str]]:
+    """The player lists of a spec's teams, from text lines or lists."""
+    teams = spec.get("teams") or []
+    if isinstance(teams, str):
+        return parse_teams_from_text(teams)
+
+    return [
+        parse_teams_from_text(team)[0] if isinstance(team, str) else list(team)
+        for team in teams
+        if team
+    ]
+
+
+def _init_worker(players_folder, accessories_folder, styles_folder, max_tiles):
+    """Builds the composers of a worker around one shared TileCache."""
+    tile_cache = TileCache(max_tiles)
+    player_composer = PlayerImageComposer(
+        players_folder, accessories_folder, tile_cache
+    )
+    style_composer = PlayerStyleImageComposer(players_folder, styles_folder, tile_cache)
+    _worker["tile_cache"] = tile_cache
+    _worker["accessories"] = (player_composer, TeamImageComposer(player_composer))
+    _worker["styles"] = (style_composer, TeamStyleImageComposer(style_composer))
+
+
+def render_spec(spec, output_dir, image_size, image_format) -> dict:
+    """
+    Renders the tournament and team images of one spec in this worker.
+    Returns its report entry; errors are reported, not raised.
+    """
+    start = time.perf_counter()
+    misses_before = _worker["tile_cache"].misses
+    entry = {"name": str(spec.get("name")), "pid": os.getpid(), "images": []}
+
+    try:
+        kind = spec.get("kind", "accessories")
+        if kind not in KINDS:
+            raise SpecError(f"Unknown kind '{kind}', expected one of {KINDS}")
+        if Path(entry["name"]).name != entry["name"]:
+            raise SpecError(f"Invalid spec name '{entry['name']}'")
+        composer, team_composer = _worker[kind]
+        players_data = players_data_from_spec(spec)
+        teams = teams_from_spec(spec)
+
+        spec_dir = Path(output_dir) / entry["name"]
+        spec_dir.mkdir(parents=True, exist_ok=True)
+
+        outputs = [("tournament", None)]
+        outputs += [(f"team_{i + 1}", team) for i, team in enumerate(teams)]
+        for stem, team in outputs:
+            image_path = spec_dir / f"{stem}.{image_format}"
+            if image_format == "png":
+                # Streamed band by band, the composite is never held in memory
+                if team is None:
+                    size = composer.compose_to_png(players_data, image_size, image_path)
+                else:
+                    size = team_composer.compose_teams_to_png(
+                        [team], players_data, image_size, image_path
+                    )
+                written = size is not None
+            else:
+                if team is None:
+                    image = composer.compose(players_data, image_size)
+                else:
+                    image = team_composer.compose_team(team, players_data, image_size)
+                written = image is not None
+                if written:
+                    image.save(image_path)
+            if written:
+                entry["images"].append(str(image_path))
+    except Exception as e:
+        logger.warning(f"Failed to render spec '{entry['name']}': {e}")
+        entry["error"] = str(e)
+
+    entry["seconds"] = round(time.perf_counter() - start, 4)
+    entry["tiles_loaded"] = _worker["tile_cache"].misses - misses_before
+    return entry
+
+
+def render_batch(
+    specs,
+    output_dir,
+    workers: int = 1,
+    image_size=DEFAULT_IMAGE_SIZE,
+    image_format: str = DEFAULT_FORMAT,
+    players_folder=PLAYERS_FOLDER,
+    accessories_folder=ACCESSORIES_FOLDER,
+    styles_folder=STYLES_FOLDER,
+    max_tiles: int = 4096,
+) -> dict:
+    """
+    Renders every spec and writes the timing report to output_dir.
+    With workers <= 1 the specs are rendered in this process, in order.
+    Returns the report.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    image_size = tuple(image_size)
+    init_args = (players_folder, accessories_folder, styles_folder, max_tiles)
+    start = time.perf_counter()
+
+    if workers <= 1:
+        _init_worker(*init_args)
+        entries = [
+            render_spec(spec, output_dir, image_size, image_format) for spec in specs
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=init_args
+        ) as executor:
+            futures = [
+                executor.submit(render_spec, spec, output_dir, image_size, image_format)
+                for spec in specs
+            ]
+            entries = [future.result() for future in futures]
+
+    wall_seconds = time.perf_counter() - start
+    report = {
+        "workers": max(workers, 1),
+        "specs": len(entries),
+        "failed": sum("error" in entry for entry in entries),
+        "images": sum(len(entry["images"]) for entry in entries),
+        "wall_seconds": round(wall_seconds, 4),
+        "render_seconds": round(sum(entry["seconds"] for entry in entries), 4),
+        "tiles_loaded": sum(entry["tiles_loaded"] for entry in entries),
+        "entries": entries,
+    }
+    (output_dir / REPORT_FILENAME).write_text(
+        json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+
+    return report
+
+
+def format_report(report) -> Iterator[str]:
+    yield f"{'spec':<32}{'images':>8}{'seconds':>10}{'tiles':>8}  status"
+    for entry in report["entries"]:
+        status = entry.get("error", "ok")
+        yield (
+            f"{entry['name']:<32}{len(entry['images']):>8}"
+            f"{entry['seconds']:>10.3f}{entry['tiles_loaded']:>8}  {status}"
+        )
+    images_per_second = report["images"] / max(report["wall_seconds"], 1e-9)
+    yield (
+        f"{report['specs']} specs, {report['images']} images, "
+        f"{report['failed']} failed in {report['wall_seconds']:.2f}s with "
+        f"{report['workers']} workers ({images_per_second:.1f} images/s)"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.cli",
+        description="Renders tournament and team images from JSONL specs.",
+    )
+    parser.add_argument("specs", help="JSONL file or directory of .json/.jsonl specs")
+    parser.add_argument(
+        "-o", "--output", default="generated_images/batch", help="Output directory"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count() or 1, help="Processes"
+    )
+    parser.add_argument(
+        "--size", type=int, default=DEFAULT_IMAGE_SIZE[0], help="Tile size in pixels"
+    )
+    parser.add_argument("--format", default=DEFAULT_FORMAT, choices=["jpg", "png"])
+    parser.add_argument("--players-folder", type=Path, default=PLAYERS_FOLDER)
+    parser.add_argument("--accessories-folder", type=Path, default=ACCESSORIES_FOLDER)
+    parser.add_argument("--styles-folder", type=Path, default=STYLES_FOLDER)
+    parser.add_argument(
+        "--max-tiles", type=int, default=4096, help="Tiles cached per worker"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    try:
+        specs = load_specs(args.specs)
+    except (OSError, ValueError) as e:
+        print(f"Could not read specs: {e}", file=sys.stderr)
+        return 2
+
+    report = render_batch(
+        specs,
+        args.output,
+        workers=min(args.workers, len(specs)) if specs else 1,
+        image_size=(args.size, args.size),
+        image_format=args.format,
+        players_folder=args.players_folder,
+        accessories_folder=args.accessories_folder,
+        styles_folder=args.styles_folder,
+        max_tiles=args.max_tiles,
+    )
+    for line in format_report(report):
+        print(line)
+    print(f"Report written to {Path(args.output) / REPORT_FILENAME}")
+
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,40 +1,48 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+import numpy as np
 from PIL import Image
 
+from backend.composers.layout import GridLayout, plan_layout
 from backend.utils.image_utils import create_column_image, get_or_create_image
-from backend.utils.utils import pad_list
+from backend.utils.list_utils import pad_list
+from backend.utils.png_stream import write_png
 
 
 class GenericImageComposer:
-    def __init__(self, base_folder: Path, modifier_folder: Path):
+    def __init__(self, base_folder: Path, modifier_folder: Path, tile_cache=None):
         self.base_folder = base_folder
         self.modifier_folder = modifier_folder
+        # Optional TileCache shared across compositions, e.g. by batch workers
+        self.tile_cache = tile_cache
 
-    def _compose_columns(self, entities_data, image_size):
+    def _get_image(self, folder_path, image_name, image_size):
+        if self.tile_cache is not None:
+            return self.tile_cache.get(folder_path, image_name, image_size)
+        return get_or_create_image(
+            folder_path=folder_path, image_name=image_name, size=image_size
+        )
+
+    def _column_tiles(self, entities_data):
+        """(folder, image name) of every tile of every column, top to bottom."""
         columns = []
         for entity in entities_data:
-            base_name = entity[0]
-            modifiers = entity[1:]
-
-            base_image = get_or_create_image(
-                folder_path=self.base_folder,
-                image_name=base_name,
-                size=image_size,
+            modifiers = pad_list(list(entity[1:]))
+            columns.append(
+                [(self.base_folder, entity[0])]
+                + [(self.modifier_folder, modifier) for modifier in modifiers]
             )
-            column_images = [base_image]
-
-            modifiers = pad_list(modifiers.copy())
-            for modifier in modifiers:
-                modifier_image = get_or_create_image(
-                    folder_path=self.modifier_folder,
-                    image_name=modifier,
-                    size=image_size,
-                )
-                column_images.append(modifier_image)
+        return columns
 
-            column_image = create_column_image(column_images)
-            columns.append(column_image)
+    def _compose_columns(self, entities_data, image_size):
+        columns = []
+        for tiles in self._column_tiles(entities_data):
+            column_images = [
+                self._get_image(folder, name, image_size) for folder, name in tiles
+            ]
+            columns.append(create_column_image(column_images))
 
         return columns
 
@@ -58,21 +66,200 @@ class GenericImageComposer:
         columns = self._compose_columns(entities_data, image_size)
         return self._compose_columns_into_image(columns)
 
+    def iter_bands(self, entities_data, image_size):
+        """
+        Yields the composite of compose() one tile row at a time, as
+        (tile height, width, 3) arrays, loading only that row's tiles.
+        Columns shorter than the tallest one are black below their last tile.
+        The same array is refilled for every row, so consume each band before
+        asking for the next.
+        """
+        columns = self._column_tiles(entities_data)
+        tile_width, tile_height = image_size
+        num_rows = max((len(tiles) for tiles in columns), default=0)
+
+        band = np.empty((tile_height, tile_width * len(columns), 3), dtype=np.uint8)
+        for row in range(num_rows):
+            for col, tiles in enumerate(columns):
+                cell = band[:, col * tile_width : (col + 1) * tile_width]
+                if row < len(tiles):
+                    folder, name = tiles[row]
+                    cell[...] = np.asarray(self._get_image(folder, name, image_size))
+                else:
+                    cell[...] = 0
+            yield band
+
+    def composite_size(self, entities_data, image_size):
+        """(width, height) of the composite, without rendering it."""
+        columns = self._column_tiles(entities_data)
+        num_rows = max((len(tiles) for tiles in columns), default=0)
+        return image_size[0] * len(columns), image_size[1] * num_rows
+
+    def compose_to_png(self, entities_data, image_size, output, **options):
+        """
+        Streams the composite into a PNG at output (a path or binary file)
+        band by band, so peak memory is one tile row whatever the number of
+        players. Options go to PNGStreamWriter. Returns the (width, height)
+        written, or None (writing nothing) when there is nothing to compose.
+        """
+        return stream_png(
+            output,
+            self.composite_size(entities_data, image_size),
+            self.iter_bands(entities_data, image_size),
+            **options,
+        )
+
+    def stack_to_png(self, groups, image_size, output, width=None, **options):
+        """
+        Streams the composites of several entity groups, stacked top to
+        bottom, into one PNG at output, padding narrower ones with black on
+        the right up to width (by default the widest group). Returns the
+        (width, height) written, or None when there is nothing to compose.
+        """
+        sizes = [self.composite_size(group, image_size) for group in groups]
+        width = max([size[0] for size in sizes] + [width or 0])
+        height = sum(size[1] for size in sizes)
+
+        def bands():
+            for group, (group_width, _) in zip(groups, sizes):
+                for band in self.iter_bands(group, image_size):
+                    if group_width < width:
+                        padded = np.zeros((band.shape[0], width, 3), dtype=np.uint8)
+                        padded[:, :group_width] = band
+                        band = padded
+                    yield band
+
+        return stream_png(output, (width, height), bands(), **options)
+
+    def plan_layout(self, entities_data, image_size, **layout_options) -> GridLayout:
+        """
+        Plans the grid of entities_data (see layout.plan_layout), sizing the
+        cells after the tallest column.
+        """
+        tallest = max((len(t) for t in self._column_tiles(entities_data)), default=1)
+        return plan_layout(
+            len(entities_data),
+            (image_size[0], image_size[1] * tallest),
+            **layout_options,
+        )
+
+    @staticmethod
+    def _page_rows(entities_data, layout, page):
+        return [[entities_data[i] for i in row] for row in layout.pages()[page]]
+
+    def compose_pages(self, entities_data, image_size, layout=None, **layout_options):
+        """
+        Composes entities_data as a grid, one image per page. Grid rows are
+        stacked top to bottom, each as tall as its tallest column; every page
+        is as wide as a full grid row, so a short last row is padded with
+        black. Without a layout one is planned from layout_options; the
+        default strip layout gives [compose(entities_data)].
+        """
+        if layout is None:
+            layout = self.plan_layout(entities_data, image_size, **layout_options)
+        width = layout.columns * image_size[0]
+
+        pages = []
+        for page in range(layout.num_pages):
+            strips = [
+                self.compose(row, image_size)
+                for row in self._page_rows(entities_data, layout, page)
+            ]
+            page_image = Image.new("RGB", (width, sum(s.height for s in strips)))
+            y_offset = 0
+            for strip in strips:
+                page_image.paste(strip, (0, y_offset))
+                y_offset += strip.height
+            pages.append(page_image)
+
+        return pages
+
+    def compose_page_to_png(
+        self, entities_data, image_size, layout, page, output, **options
+    ):
+        """Streams one page of compose_pages() into a PNG at output."""
+        return self.stack_to_png(
+            self._page_rows(entities_data, layout, page),
+            image_size,
+            output,
+            width=layout.columns * image_size[0],
+            **options,
+        )
+
+    def compose_many(self, entities_batches, image_size, max_workers=4):
+        """
+        Composes one image per entry of entities_batches, e.g. one per team.
+        Yields (index, image, error) as each image completes, so callers can
+        show results progressively; error is the exception raised, if any.
+        With max_workers <= 1 images are composed serially, in order.
+        """
+        if max_workers is None or max_workers <= 1 or len(entities_batches) <= 1:
+            for idx, entities_data in enumerate(entities_batches):
+                try:
+                    yield idx, self.compose(entities_data, image_size), None
+                except Exception as e:
+                    yield idx, None, e
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.compose, entities_data, image_size): idx
+                for idx, entities_data in enumerate(entities_batches)
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
 
 class GenericTeamImageComposer:
     def __init__(self, generic_image_composer):
         self.generic_image_composer = generic_image_composer
 
+    @staticmethod
+    def _team_entities(team_members, entities_data):
+        entities_by_name = defaultdict(list)
+        for data in entities_data:
+            entities_by_name[data[0]].append(data)
+
+        return [data for member in team_members for data in entities_by_name[member]]
+
     def compose_team(self, team_members, entities_data, image_size):
-        filtered_entities = [
-            data
-            for member in team_members
-            for data in entities_data
-            if data[0] == member
-        ]
+        filtered_entities = self._team_entities(team_members, entities_data)
 
         columns = self.generic_image_composer._compose_columns(
             filtered_entities, image_size
         )
 
         return self.generic_image_composer._compose_columns_into_image(columns)
+
+    def compose_teams_to_png(self, teams, entities_data, image_size, output, **options):
+        """
+        Streams the images of several teams, stacked top to bottom, into one
+        PNG at output. Narrower teams are padded with black on the right.
+        Peak memory is one tile row of the widest team. Returns the
+        (width, height) written, or None when no team has players.
+        """
+        groups = [self._team_entities(team, entities_data) for team in teams]
+        return self.generic_image_composer.stack_to_png(
+            [group for group in groups if group], image_size, output, **options
+        )
+
+
+def stream_png(output, size, bands, **options):
+    """
+    Writes bands into a PNG of size at output, a path or a binary file.
+    Returns size, or None without creating anything when size is empty.
+    """
+    width, height = size
+    if not width or not height:
+        return None
+
+    if isinstance(output, (str, Path)):
+        with open(output, "wb") as fileobj:
+            write_png(fileobj, width, height, bands, **options)
+    else:
+        write_png(output, width, height, bands, **options)
+
+    return size
@@ -5,14 +5,27 @@ from backend.composers.generic_image_composer import (
 
 
 class PlayerImageComposer:
-    def __init__(self, players_folder, accessories_folder):
-        self.generic = GenericImageComposer(players_folder, accessories_folder)
+    def __init__(self, players_folder, accessories_folder, tile_cache=None):
+        self.generic = GenericImageComposer(
+            players_folder, accessories_folder, tile_cache
+        )
         self.players_folder = players_folder
         self.accessories_folder = accessories_folder
 
     def compose(self, players_data, image_size):
         return self.generic.compose(players_data, image_size)
 
+    def compose_many(self, players_data_batches, image_size, max_workers=4):
+        return self.generic.compose_many(players_data_batches, image_size, max_workers)
+
+    def compose_pages(self, players_data, image_size, layout=None, **layout_options):
+        return self.generic.compose_pages(
+            players_data, image_size, layout, **layout_options
+        )
+
+    def compose_to_png(self, players_data, image_size, output, **options):
+        return self.generic.compose_to_png(players_data, image_size, output, **options)
+
 
 class TeamImageComposer:
     def __init__(self, player_image_composer):
@@ -21,3 +34,8 @@ class TeamImageComposer:
 
     def compose_team(self, team_members, players_data, image_size):
         return self.generic_team.compose_team(team_members, players_data, image_size)
+
+    def compose_teams_to_png(self, teams, players_data, image_size, output, **options):
+        return self.generic_team.compose_teams_to_png(
+            teams, players_data, image_size, output, **options
+        )
@@ -0,0 +1,107 @@
+"""
+Grid layouts for tournament composites: how the player columns are wrapped
+into grid rows and split into pages, decided before anything is rendered.
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+LAYOUT_MODES = ("strip", "columns", "aspect")
+
+
+class GridLayout:
+    """
+    num_items columns laid out columns per grid row, left to right and top
+    to bottom, with at most rows_per_page grid rows per page (None for a
+    single page).
+    """
+
+    __slots__ = ("num_items", "columns", "rows_per_page")
+
+    def __init__(
+        self, num_items: int, columns: int, rows_per_page: Optional[int] = None
+    ):
+        if columns < 1:
+            raise ValueError(f"Quantidade de colunas inválida: {columns}")
+        if rows_per_page is not None and rows_per_page < 1:
+            raise ValueError(
+                f"Quantidade de linhas por página inválida: {rows_per_page}"
+            )
+
+        self.num_items = num_items
+        self.columns = columns
+        self.rows_per_page = rows_per_page
+
+    @property
+    def num_rows(self) -> int:
+        return math.ceil(self.num_items / self.columns)
+
+    @property
+    def num_pages(self) -> int:
+        if not self.num_items:
+            return 0
+        if self.rows_per_page is None:
+            return 1
+        return math.ceil(self.num_rows / self.rows_per_page)
+
+    def pages(self) -> List[List[range]]:
+        """Item indices of every grid row of every page."""
+        rows = [
+            range(start, min(start + self.columns, self.num_items))
+            for start in range(0, self.num_items, self.columns)
+        ]
+        per_page = self.rows_per_page or max(len(rows), 1)
+        return [rows[i : i + per_page] for i in range(0, len(rows), per_page)]
+
+
+def best_columns(
+    num_items: int,
+    aspect: float,
+    cell_size: Tuple[int, int],
+    rows_per_page: Optional[int] = None,
+) -> int:
+    """
+    Columns per grid row whose page comes closest to the width / height
+    aspect ratio, given the (width, height) of one column. Ties go to the
+    layout with fewer empty cells, then to fewer columns.
+    """
+    cell_width, cell_height = cell_size
+
+    def score(columns):
+        rows = math.ceil(num_items / columns)
+        page_rows = min(rows, rows_per_page or rows)
+        ratio = (columns * cell_width) / (page_rows * cell_height)
+        return abs(math.log(ratio / aspect)), rows * columns - num_items, columns
+
+    return min(range(1, max(num_items, 1) + 1), key=score)
+
+
+def plan_layout(
+    num_items: int,
+    cell_size: Tuple[int, int],
+    mode: str = "strip",
+    columns: Optional[int] = None,
+    aspect: Optional[float] = None,
+    rows_per_page: Optional[int] = None,
+) -> GridLayout:
+    """
+    Plans the layout of num_items columns of cell_size (width, height):
+        strip:   one grid row with every column (the classic image)
+        columns: a fixed number of columns per grid row
+        aspect:  the number of columns that best matches the aspect ratio
+    rows_per_page splits the grid into pages of that many grid rows.
+    """
+    if mode == "strip":
+        columns = num_items
+    elif mode == "columns":
+        if not columns:
+            raise ValueError("Informe a quantidade de colunas do layout.")
+        columns = min(columns, num_items)
+    elif mode == "aspect":
+        if not aspect or aspect <= 0:
+            raise ValueError("Informe uma proporção positiva para o layout.")
+        columns = best_columns(num_items, aspect, cell_size, rows_per_page)
+    else:
+        raise ValueError(f"Layout inválido: {mode}")
+
+    return GridLayout(num_items, max(columns, 1), rows_per_page)
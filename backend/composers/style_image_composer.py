@@ -5,12 +5,23 @@ from backend.composers.generic_image_composer import (
 
 
 class PlayerStyleImageComposer:
-    def __init__(self, players_folder, styles_folder):
-        self.generic = GenericImageComposer(players_folder, styles_folder)
+    def __init__(self, players_folder, styles_folder, tile_cache=None):
+        self.generic = GenericImageComposer(players_folder, styles_folder, tile_cache)
 
     def compose(self, players_data, image_size):
         return self.generic.compose(players_data, image_size)
 
+    def compose_many(self, players_data_batches, image_size, max_workers=4):
+        return self.generic.compose_many(players_data_batches, image_size, max_workers)
+
+    def compose_pages(self, players_data, image_size, layout=None, **layout_options):
+        return self.generic.compose_pages(
+            players_data, image_size, layout, **layout_options
+        )
+
+    def compose_to_png(self, players_data, image_size, output, **options):
+        return self.generic.compose_to_png(players_data, image_size, output, **options)
+
 
 class TeamStyleImageComposer:
     def __init__(self, player_style_image_composer):
@@ -21,3 +32,8 @@ class TeamStyleImageComposer:
 
     def compose_team(self, team_members, players_data, image_size):
         return self.generic_team.compose_team(team_members, players_data, image_size)
+
+    def compose_teams_to_png(self, teams, players_data, image_size, output, **options):
+        return self.generic_team.compose_teams_to_png(
+            teams, players_data, image_size, output, **options
+        )
@@ -1,17 +1,246 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
 
 import psycopg2
+import psycopg2.pool
 from dotenv import load_dotenv
+from psycopg2 import extensions
 
+DEFAULT_POOL_MIN_CONN = 0
+DEFAULT_POOL_MAX_CONN = 10
+DEFAULT_POOL_MAX_LIFETIME = 30 * 60  # seconds
+DEFAULT_POOL_HEALTH_CHECK_INTERVAL = 60  # seconds
+DEFAULT_POOL_CHECKOUT_TIMEOUT = 10  # seconds
 
+
+class ConnectionPool:
+    """Thread-safe pool of PostgreSQL connections.
+
+    Wraps ``psycopg2.pool.ThreadedConnectionPool`` adding a health check on
+    checkout, recycling of connections older than ``max_lifetime`` seconds
+    and usage metrics. When every connection is in use, callers wait up to
+    ``checkout_timeout`` seconds instead of failing right away.
+    """
+
+    def __init__(
+        self,
+        minconn: int = DEFAULT_POOL_MIN_CONN,
+        maxconn: int = DEFAULT_POOL_MAX_CONN,
+        max_lifetime: float = DEFAULT_POOL_MAX_LIFETIME,
+        health_check_interval: float = DEFAULT_POOL_HEALTH_CHECK_INTERVAL,
+        checkout_timeout: float = DEFAULT_POOL_CHECKOUT_TIMEOUT,
+        **connect_kwargs,
+    ):
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn, maxconn, **connect_kwargs
+        )
+        # psycopg2 closes returned connections once ``minconn`` are idle; only
+        # ``minconn`` are opened eagerly, but every returned one is kept.
+        self._pool.minconn = maxconn
+        self._lock = threading.Lock()
+        self._created_at = {}
+        self._last_used_at = {}
+        self._metrics = {
+            "checkouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "connections_discarded": 0,
+            "checkout_timeouts": 0,
+            "in_use": 0,
+        }
+
+    def _is_expired(self, conn, now):
+        created_at = self._created_at.get(id(conn), now)
+        return self.max_lifetime is not None and now - created_at > self.max_lifetime
+
+    def _is_healthy(self, conn, now):
+        """Check that the connection is usable, pinging it when idle for too long."""
+        if conn.closed:
+            return False
+
+        if conn.get_transaction_status() == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        last_used_at = self._last_used_at.get(id(conn), now)
+        if now - last_used_at < self.health_check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn, metric):
+        with self._lock:
+            self._created_at.pop(id(conn), None)
+            self._last_used_at.pop(id(conn), None)
+            self._metrics[metric] += 1
+
+        self._pool.putconn(conn, close=True)
+
+    def getconn(self):
+        """Check out a healthy connection, replacing stale or broken ones."""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self._metrics["checkout_timeouts"] += 1
+            raise psycopg2.pool.PoolError("connection pool exhausted")
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._metrics["checkouts"] += 1
+            self._metrics["in_use"] += 1
+
+        return conn
+
+    def _checkout(self):
+        while True:
+            conn = self._pool.getconn()
+            now = time.monotonic()
+
+            with self._lock:
+                if id(conn) not in self._created_at:
+                    self._created_at[id(conn)] = now
+                    self._last_used_at[id(conn)] = now
+                    self._metrics["connections_created"] += 1
+
+            if self._is_expired(conn, now):
+                self._discard(conn, "connections_recycled")
+                continue
+
+            if not self._is_healthy(conn, now):
+                self._discard(conn, "connections_discarded")
+                continue
+
+            return conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool, rolling back any open transaction."""
+        with self._lock:
+            self._metrics["in_use"] -= 1
+
+        try:
+            self._release(conn)
+        finally:
+            self._slots.release()
+
+    def _release(self, conn):
+        if not conn.closed:
+            try:
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                self._discard(conn, "connections_discarded")
+                return
+
+        now = time.monotonic()
+        if conn.closed or self._is_expired(conn, now):
+            self._discard(conn, "connections_recycled")
+            return
+
+        with self._lock:
+            self._last_used_at[id(conn)] = now
+
+        self._pool.putconn(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def metrics(self):
+        """Return a snapshot of the pool usage counters."""
+        with self._lock:
+            snapshot = dict(self._metrics)
+
+        snapshot["idle"] = len(self._pool._pool)
+        snapshot["max_connections"] = self._pool.maxconn
+        return snapshot
+
+    def close(self):
+        """Close every connection held by the pool."""
+        self._pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                load_dotenv()
+
+                _pool = ConnectionPool(
+                    minconn=int(
+                        os.getenv("GETAMPEDVIVE_DB_POOL_MIN", DEFAULT_POOL_MIN_CONN)
+                    ),
+                    maxconn=int(
+                        os.getenv("GETAMPEDVIVE_DB_POOL_MAX", DEFAULT_POOL_MAX_CONN)
+                    ),
+                    max_lifetime=float(
+                        os.getenv(
+                            "GETAMPEDVIVE_DB_POOL_MAX_LIFETIME",
+                            DEFAULT_POOL_MAX_LIFETIME,
+                        )
+                    ),
+                    user=os.getenv("GETAMPEDVIVE_USER"),
+                    password=os.getenv("GETAMPEDVIVE_PASSWORD"),
+                    host=os.getenv("GETAMPEDVIVE_HOST"),
+                    port=os.getenv("GETAMPEDVIVE_PORT"),
+                    dbname=os.getenv("GETAMPEDVIVE_DBNAME"),
+                )
+
+    return _pool
+
+
+def close_pool():
+    """Close and forget the process-wide pool (used on shutdown and in tests)."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def pool_metrics():
+    """Return the metrics of the process-wide pool, or an empty dict if unused."""
+    if _pool is None:
+        return {}
+
+    return _pool.metrics()
+
+
+@contextmanager
 def get_connection():
-    """Create and return a new database connection."""
-    load_dotenv()
-
-    return psycopg2.connect(
-        user=os.getenv("GETAMPEDVIVE_USER"),
-        password=os.getenv("GETAMPEDVIVE_PASSWORD"),
-        host=os.getenv("GETAMPEDVIVE_HOST"),
-        port=os.getenv("GETAMPEDVIVE_PORT"),
-        dbname=os.getenv("GETAMPEDVIVE_DBNAME"),
-    )
+    """Borrow a database connection from the process-wide pool.
+
+    Usage::
+
+        with get_connection() as conn:
+            ...
+    """
+    with get_pool().connection() as conn:
+        yield conn
@@ -0,0 +1,9 @@
+-- Session tokens revoked before their expiration (see backend/utils/session_tokens.py).
+-- A row is only needed until expires_at, after which the token is rejected anyway.
+CREATE TABLE IF NOT EXISTS revoked_session_tokens (
+    jti TEXT PRIMARY KEY,
+    -- the token id claim
+    expires_at TIMESTAMPTZ NOT NULL
+);
+-- Used to load the unexpired revocations and to prune the expired ones
+CREATE INDEX IF NOT EXISTS revoked_session_tokens_expires_at_idx ON revoked_session_tokens (expires_at);
@@ -1,41 +1,244 @@
-import bcrypt
+import csv
+import io
+import threading
+import time
+
+import psycopg2
+from psycopg2.extras import execute_values
 
 from backend.db import get_connection
+from backend.utils.passwords import hash_password, hash_passwords
+
+ROLES_CACHE_TTL = 300  # seconds
+
+_roles_cache = {"roles": None, "expires_at": 0.0}
+_roles_cache_lock = threading.Lock()
+
+
+def invalidate_roles_cache():
+    """Drop the cached roles so the next fetch_roles call reads the database."""
+    with _roles_cache_lock:
+        _roles_cache["roles"] = None
+        _roles_cache["expires_at"] = 0.0
 
 
 def fetch_roles():
-    """Fetch all roles from the database, returns a list of (role_id, name)."""
-    try:
-        conn = get_connection()
-        cur = conn.cursor()
+    """Fetch all roles from the database, returns a list of (role_id, name).
 
-        cur.execute("SELECT role_id, name FROM roles ORDER BY name")
-        roles = cur.fetchall()
+    Roles almost never change, so the result is cached for ROLES_CACHE_TTL
+    seconds. Role writes invalidate it, as do user writes that find it stale.
+    """
+    with _roles_cache_lock:
+        if (
+            _roles_cache["roles"] is not None
+            and time.monotonic() < _roles_cache["expires_at"]
+        ):
+            return list(_roles_cache["roles"])
 
-        cur.close()
-        conn.close()
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
 
-        return roles
+            cur.execute("SELECT role_id, name FROM roles ORDER BY name")
+            roles = cur.fetchall()
+
+            cur.close()
     except Exception as e:
         raise RuntimeError(f"Erro ao buscar papéis: {e}")
 
+    with _roles_cache_lock:
+        _roles_cache["roles"] = list(roles)
+        _roles_cache["expires_at"] = time.monotonic() + ROLES_CACHE_TTL
+
+    return roles
+
+
+def _write_roles(query, params, error_message):
+    """Run a write on the roles table, then drop the cached roles."""
+    try:
+        with get_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(query, params)
+            rowcount = cur.rowcount
+
+            conn.commit()
+
+            cur.close()
+    except Exception as e:
+        raise RuntimeError(f"{error_message}: {e}")
+    finally:
+        invalidate_roles_cache()
+
+    return rowcount
+
+
+def create_role(name):
+    """Create a role with the given name."""
+    _write_roles("INSERT INTO roles (name) VALUES (%s)", (name,), "Erro ao criar papel")
+
+
+def rename_role(role_id, name):
+    """Rename a role. Returns whether the role exists."""
+    return (
+        _write_roles(
+            "UPDATE roles SET name = %s WHERE role_id = %s",
+            (name, role_id),
+            "Erro ao renomear papel",
+        )
+        > 0
+    )
+
+
+def delete_role(role_id):
+    """Delete a role that no user has. Returns whether the role existed."""
+    return (
+        _write_roles(
+            "DELETE FROM roles WHERE role_id = %s", (role_id,), "Erro ao excluir papel"
+        )
+        > 0
+    )
+
 
 def create_user(created_at, login, password, role_id):
     """Create a new user in the database."""
     try:
-        hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        hashed_pw = hash_password(password)
+
+        with get_connection() as conn:
+            cur = conn.cursor()
+
+            cur.execute(
+                "INSERT INTO users (created_at, login, password, role_id) VALUES (%s, %s, %s, %s)",
+                (created_at, login, hashed_pw, role_id),
+            )
+
+            conn.commit()
+
+            cur.close()
+    except psycopg2.errors.ForeignKeyViolation as e:
+        invalidate_roles_cache()
+        raise RuntimeError(f"Erro ao criar usuário: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Erro ao criar usuário: {e}")
+
+
+def create_users(created_at, users):
+    """Create many users in a single transaction.
+
+    users is a list of (login, password, role_id). Passwords are hashed
+    concurrently on the bcrypt worker pool and all rows are inserted with one
+    execute_values statement. Returns the number of users created.
+    """
+    if not users:
+        return 0
+
+    try:
+        hashed_pws = hash_passwords([password for _, password, _ in users])
+
+        rows = [
+            (created_at, login, hashed_pw, role_id)
+            for (login, _, role_id), hashed_pw in zip(users, hashed_pws)
+        ]
+
+        with get_connection() as conn:
+            cur = conn.cursor()
+
+            execute_values(
+                cur,
+                "INSERT INTO users (created_at, login, password, role_id) VALUES %s",
+                rows,
+            )
+
+            conn.commit()
+
+            cur.close()
+    except psycopg2.errors.ForeignKeyViolation as e:
+        invalidate_roles_cache()
+        raise RuntimeError(f"Erro ao importar usuários: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Erro ao importar usuários: {e}")
+
+    return len(rows)
+
+
+def parse_users_csv(csv_text, roles):
+    """Parse a users CSV with the header login,password,role.
+
+    roles is the list of (role_id, name) returned by fetch_roles. Returns a list
+    of (login, password, role_id) ready for create_users.
+    """
+    role_ids = {name.lower(): role_id for role_id, name in roles}
+    reader = csv.DictReader(io.StringIO(csv_text.strip()))
+
+    if reader.fieldnames is None or not {"login", "password", "role"}.issubset(
+        name.strip().lower() for name in reader.fieldnames
+    ):
+        raise ValueError("O CSV deve ter o cabeçalho: login,password,role")
 
-        conn = get_connection()
+    users = []
+    seen_logins = set()
+    for line_number, row in enumerate(reader, start=2):
+        row = {
+            key.strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            if key is not None
+        }
+        login, password, role = row["login"], row["password"], row["role"]
+
+        if not login or not password or not role:
+            raise ValueError(
+                f"Linha {line_number}: login, senha e papel são obrigatórios."
+            )
+        if role.lower() not in role_ids:
+            raise ValueError(f"Linha {line_number}: papel desconhecido '{role}'.")
+        if login in seen_logins:
+            raise ValueError(f"Linha {line_number}: login duplicado '{login}'.")
+
+        seen_logins.add(login)
+        users.append((login, password, role_ids[role.lower()]))
+
+    return users
+
+
+def revoke_session_token(jti, expires_at):
+    """Persist a revoked session token id until its expiration (epoch seconds).
+
+    Expired revocations are pruned on the way. The table is created by
+    create_table_revoked_session_tokens.sql.
+    """
+    with get_connection() as conn:
         cur = conn.cursor()
 
         cur.execute(
-            "INSERT INTO users (created_at, login, password, role_id) VALUES (%s, %s, %s, %s)",
-            (created_at, login, hashed_pw, role_id),
+            """
+            INSERT INTO revoked_session_tokens (jti, expires_at)
+            VALUES (%s, to_timestamp(%s))
+            ON CONFLICT (jti) DO NOTHING
+            """,
+            (jti, expires_at),
         )
+        cur.execute("DELETE FROM revoked_session_tokens WHERE expires_at <= now()")
 
         conn.commit()
 
         cur.close()
-        conn.close()
-    except Exception as e:
-        raise RuntimeError(f"Erro ao criar usuário: {e}")
+
+
+def fetch_revoked_session_tokens():
+    """Fetch unexpired revoked session tokens as a list of (jti, expires_at)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute(
+            """
+            SELECT jti, EXTRACT(EPOCH FROM expires_at)
+            FROM revoked_session_tokens
+            WHERE expires_at > now()
+            """
+        )
+        revoked = [(jti, float(expires_at)) for jti, expires_at in cur.fetchall()]
+
+        cur.close()
+
+    return revoked
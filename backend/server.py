@@ -0,0 +1,495 @@
+"""
+Local HTTP render service for bots and stream overlays.
+
+Exposes the composers over HTTP, with the standard library server:
+
+    POST /compose   tournament image of a spec
+    POST /team      image of one team ("team") of a spec
+    POST /roulette  roulette draw over the teams of a spec, as a contact sheet
+    GET  /health    counters of the service, as JSON
+
+Specs are the JSON objects of backend.cli ("kind", "players_data", "teams"),
+plus optional "size" (tile pixels), "format" (PNG, JPEG or WEBP) and, for
+/roulette, "seed", "num_accessory_rows", "selectable_rows", "fixed_rows" and
+"columns". The image endpoints also answer GET with the spec URL-encoded in
+?spec=, so an overlay can point at a plain URL.
+
+Identical requests in flight are coalesced into one render, finished renders
+are kept in an LRU cache and answered with a strong ETag (304 on a matching
+If-None-Match), and renders run on a bounded thread pool: past its queue
+limit requests get 503 instead of piling up.
+
+Usage:
+    python -m backend.server --port 8765 --workers 4
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from backend.cli import KINDS, SpecError, players_data_from_spec, teams_from_spec
+from backend.composers.image_composer import PlayerImageComposer, TeamImageComposer
+from backend.composers.style_image_composer import (
+    PlayerStyleImageComposer,
+    TeamStyleImageComposer,
+)
+from backend.utils import ACCESSORIES_FOLDER, PLAYERS_FOLDER, STYLES_FOLDER
+from backend.utils.encoders import ENCODER_FORMATS, encode
+from backend.utils.image_utils import TileCache
+from backend.utils.roulette import (
+    TeamDrawSettings,
+    contact_sheet,
+    new_seed,
+    run_batch_draw,
+)
+from backend.utils.upload_cache import DecodedSheet
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_REQUEST_TIMEOUT = 30.0  # seconds
+DEFAULT_TILE_SIZE = 94
+MIN_TILE_SIZE = 16
+MAX_TILE_SIZE = 256
+MAX_BODY_BYTES = 256 * 1024
+ENDPOINTS = ("compose", "team", "roulette")
+
+
+class ServiceBusy(RuntimeError):
+    """Raised when the render queue is full."""
+
+
+class RenderedImage:
+    """Encoded render plus the response headers that go with it."""
+
+    __slots__ = ("data", "mime", "etag", "headers")
+
+    def __init__(self, data: bytes, mime: str, headers: Optional[dict] = None):
+        self.data = data
+        self.mime = mime
+        self.etag = '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+        self.headers = headers or {}
+
+
+def _tile_size(spec) -> int:
+    size = int(spec.get("size", DEFAULT_TILE_SIZE))
+    if not MIN_TILE_SIZE <= size <= MAX_TILE_SIZE:
+        raise SpecError(
+            f"size must be between {MIN_TILE_SIZE} and {MAX_TILE_SIZE}, got {size}"
+        )
+    return size
+
+
+def _image_format(spec) -> str:
+    image_format = str(spec.get("format", "PNG")).upper()
+    if image_format not in ENCODER_FORMATS:
+        raise SpecError(f"Unknown format '{image_format}'")
+    return image_format
+
+
+def _row_list(spec, field: str) -> Optional[list]:
+    """Row indices of a roulette spec field, checked to be non-negative ints."""
+    rows = spec.get(field)
+    if rows is None:
+        return None
+    if not isinstance(rows, list) or not all(
+        isinstance(row, int) and not isinstance(row, bool) and row >= 0 for row in rows
+    ):
+        raise SpecError(f"{field} must be a list of row indices, got {rows!r}")
+    return rows
+
+
+def normalize_request(endpoint: str, spec: dict) -> dict:
+    """
+    Validates a spec and reduces it to what the render depends on, so
+    equivalent requests (e.g. text vs list players_data) share a cache key.
+    A roulette request without a seed gets a fresh one here.
+    """
+    if endpoint not in ENDPOINTS:
+        raise SpecError(f"Unknown endpoint '{endpoint}'")
+    kind = spec.get("kind", "accessories")
+    if kind not in KINDS:
+        raise SpecError(f"Unknown kind '{kind}', expected one of {KINDS}")
+
+    request = {
+        "endpoint": endpoint,
+        "kind": kind,
+        "players_data": players_data_from_spec(spec),
+        "size": _tile_size(spec),
+        "format": _image_format(spec),
+    }
+
+    if endpoint == "team":
+        team = teams_from_spec({"teams": [spec.get("team") or []]})
+        if not team:
+            raise SpecError("Spec has no team")
+        request["team"] = team[0]
+    elif endpoint == "roulette":
+        request["teams"] = teams_from_spec(spec)
+        if not request["teams"]:
+            raise SpecError("Spec has no teams")
+        seed = spec.get("seed")
+        request["seed"] = int(seed) if seed is not None else new_seed()
+        request["num_accessory_rows"] = int(spec.get("num_accessory_rows", 1))
+        request["selectable_rows"] = _row_list(spec, "selectable_rows")
+        request["fixed_rows"] = _row_list(spec, "fixed_rows") or []
+        request["columns"] = int(spec.get("columns", 4))
+
+    return request
+
+
+def request_key(request: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+class RenderService:
+    """
+    Renders normalized requests with singleflight coalescing, an LRU render
+    cache and a bounded pool. Thread safe; one instance serves the process.
+    """
+
+    def __init__(
+        self,
+        players_folder=PLAYERS_FOLDER,
+        accessories_folder=ACCESSORIES_FOLDER,
+        styles_folder=STYLES_FOLDER,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ):
+        self.tile_cache = TileCache()
+        player_composer = PlayerImageComposer(
+            players_folder, accessories_folder, self.tile_cache
+        )
+        style_composer = PlayerStyleImageComposer(
+            players_folder, styles_folder, self.tile_cache
+        )
+        self.composers = {
+            "accessories": (player_composer, TeamImageComposer(player_composer)),
+            "styles": (style_composer, TeamStyleImageComposer(style_composer)),
+        }
+
+        self.cache_bytes = cache_bytes
+        self.request_timeout = request_timeout
+        self.stats = {
+            "requests": 0,
+            "renders": 0,
+            "cache_hits": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "errors": 0,
+        }
+        self._cache = OrderedDict()
+        self._cache_size = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        # Running plus queued renders; beyond this requests are rejected
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="render"
+        )
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def health(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "in_flight": len(self._inflight),
+                "cached": len(self._cache),
+                "cache_bytes": self._cache_size,
+                "tiles": self.tile_cache.stats(),
+            }
+
+    def render(self, endpoint: str, spec: dict) -> RenderedImage:
+        """
+        Renders (or reuses) the image of a request. Raises SpecError for an
+        invalid spec, ServiceBusy when the queue is full and TimeoutError when
+        the render takes longer than request_timeout.
+        """
+        try:
+            request = normalize_request(endpoint, spec)
+        except (TypeError, ValueError) as e:
+            raise SpecError(str(e)) from e
+        # An unseeded draw got a fresh seed: nobody can ask for it again
+        cache = endpoint != "roulette" or spec.get("seed") is not None
+        return self.get(request_key(request), lambda: self._render(request), cache)
+
+    def get(
+        self, key: str, render: Callable[[], RenderedImage], cache: bool = True
+    ) -> RenderedImage:
+        """
+        Returns the cached result of key, joins its render or starts it.
+        With cache=False the result is not kept once rendered.
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            rendered = self._cache.get(key)
+            if rendered is not None:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return rendered
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+            else:
+                if not self._slots.acquire(blocking=False):
+                    self.stats["rejected"] += 1
+                    raise ServiceBusy("Render queue is full")
+                future = Future()
+                self._inflight[key] = future
+                self._pool.submit(self._run, key, render, future, cache)
+
+        return future.result(timeout=self.request_timeout)
+
+    def _run(self, key: str, render, future: Future, cache: bool = True) -> None:
+        try:
+            rendered = render()
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._inflight.pop(key, None)
+            self._slots.release()
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self.stats["renders"] += 1
+            if cache:
+                self._store(key, rendered)
+            self._inflight.pop(key, None)
+        self._slots.release()
+        future.set_result(rendered)
+
+    def _store(self, key: str, rendered: RenderedImage) -> None:
+        self._cache[key] = rendered
+        self._cache_size += len(rendered.data)
+        while self._cache_size > self.cache_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_size -= len(evicted.data)
+
+    def _render(self, request: dict) -> RenderedImage:
+        composer, team_composer = self.composers[request["kind"]]
+        size = (request["size"], request["size"])
+        players_data = request["players_data"]
+        headers = {}
+
+        if request["endpoint"] == "compose":
+            image = composer.compose(players_data, size)
+        elif request["endpoint"] == "team":
+            image = team_composer.compose_team(request["team"], players_data, size)
+        else:
+            image, seed = self._render_roulette(request, team_composer, size)
+            headers["X-Roulette-Seed"] = str(seed)
+
+        if image is None:
+            raise SpecError("Nothing to render")
+
+        encoded = encode(image, request["format"])
+        return RenderedImage(encoded.data, encoded.mime, headers)
+
+    @staticmethod
+    def _render_roulette(request, team_composer, size):
+        sheets = []
+        for team in request["teams"]:
+            image = team_composer.compose_team(team, request["players_data"], size)
+            if image is None:
+                raise SpecError(f"Team {team} has no players in players_data")
+            sheets.append(DecodedSheet("", np.asarray(image), size[1]))
+
+        for field in ("selectable_rows", "fixed_rows"):
+            rows = request[field] or []
+            for team_idx, sheet in enumerate(sheets):
+                if any(row >= sheet.num_rows for row in rows):
+                    raise SpecError(
+                        f"{field} must be between 0 and {sheet.num_rows - 1} "
+                        f"for team {team_idx + 1}, got {rows}"
+                    )
+
+        settings = [
+            TeamDrawSettings(
+                selectable_rows=(
+                    request["selectable_rows"]
+                    if request["selectable_rows"] is not None
+                    else range(sheet.num_rows)
+                ),
+                num_accessory_rows=request["num_accessory_rows"],
+                fixed_rows=request["fixed_rows"],
+            )
+            for sheet in sheets
+        ]
+        try:
+            result = run_batch_draw(sheets, settings, request["seed"])
+        except ValueError as e:
+            raise SpecError(str(e)) from e
+
+        return contact_sheet(result.images(sheets), request["columns"]), result.seed
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Maps HTTP requests onto the server's RenderService."""
+
+    server_version = "GetAmpedillisRender/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> RenderService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+    def _send(self, status, body=b"", content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _read_spec(self) -> dict:
+        url = urlsplit(self.path)
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                raise SpecError("Request body is too large")
+            raw = self.rfile.read(length)
+        else:
+            raw = parse_qs(url.query).get("spec", ["{}"])[0]
+
+        try:
+            spec = json.loads(raw or "{}")
+        except ValueError as e:
+            raise SpecError(f"Invalid JSON: {e}") from e
+        if not isinstance(spec, dict):
+            raise SpecError("Spec must be a JSON object")
+        return spec
+
+    def _handle(self):
+        endpoint = urlsplit(self.path).path.strip("/")
+        if endpoint == "health" and self.command in ("GET", "HEAD"):
+            return self._send_json(HTTPStatus.OK, self.service.health())
+        if endpoint not in ENDPOINTS:
+            return self._send_json(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+        try:
+            rendered = self.service.render(endpoint, self._read_spec())
+        except SpecError as e:
+            return self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except ServiceBusy as e:
+            return self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)}, {"Retry-After": "1"}
+            )
+        except TimeoutError:
+            return self._send_json(
+                HTTPStatus.GATEWAY_TIMEOUT, {"error": "Render timed out"}
+            )
+        except Exception as e:
+            logger.exception(f"Render of /{endpoint} failed")
+            return self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+        headers = {
+            "ETag": rendered.etag,
+            "Cache-Control": "no-cache",
+            **rendered.headers,
+        }
+        if self.command in ("GET", "HEAD") and etag_matches(
+            self.headers.get("If-None-Match"), rendered.etag
+        ):
+            return self._send(HTTPStatus.NOT_MODIFIED, headers=headers)
+        self._send(HTTPStatus.OK, rendered.data, rendered.mime, headers)
+
+    do_GET = _handle
+    do_HEAD = _handle
+    do_POST = _handle
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under bursts
+    request_queue_size = 128
+
+    def __init__(self, address, service: RenderService):
+        super().__init__(address, RenderRequestHandler)
+        self.service = service
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.server",
+        description="Serves tournament, team and roulette images over HTTP.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="Renders waiting for a worker before requests get 503",
+    )
+    parser.add_argument(
+        "--cache-mb", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024)
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    service = RenderService(
+        workers=args.workers,
+        queue_size=args.queue_size,
+        cache_bytes=args.cache_mb * 1024 * 1024,
+    )
+    server = RenderServer((args.host, args.port), service)
+    logger.info(f"Render service listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
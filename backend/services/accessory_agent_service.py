@@ -8,10 +8,19 @@ from typing import List, Optional
 import google.generativeai as genai
 from supabase import create_client
 
+from backend.services.accessory_index import QuantizedAccessoryIndex
+from backend.services.resilience import (
+    CircuitBreaker,
+    LexicalMatcher,
+    guarded_call,
+    map_with_deadline,
+)
 from backend.utils import (
     GETAMPEDVIVE_GEMINI_API_KEY,
     GETAMPEDVIVE_GEMINI_EMBEDDING_MODEL,
     GETAMPEDVIVE_GEMINI_MODEL,
+    GETAMPEDVIVE_PROVIDER_HEDGE_AFTER,
+    GETAMPEDVIVE_PROVIDER_TIMEOUT,
     SUPABASE_KEY,
     SUPABASE_URL,
 )
@@ -21,6 +30,20 @@ logger = logging.getLogger(__name__)
 EMBEDDING_DIMENSIONALITY = 768
 HIGH_CONFIDENCE_THRESHOLD = 0.9
 
+# Shared by every session: an outage seen by one session skips the provider
+# for all of them until the breaker lets a trial call through again.
+GEMINI_BREAKER = CircuitBreaker("gemini")
+SUPABASE_BREAKER = CircuitBreaker("supabase")
+
+
+def _to_vector_literal(embedding: List[float]) -> str:
+    """Formats an embedding as a pgvector literal, e.g. '[0.1,0.2]'.
+
+    PostgREST casts each element of a ``VECTOR[]`` argument from its text form;
+    a nested JSON array would be read as a two-dimensional array instead.
+    """
+    return "[" + ",".join(str(float(x)) for x in embedding) + "]"
+
 
 class AccessoryAgentService:
     """Service for handling accessory ID lookup using Supabase embeddings + RAG."""
@@ -32,6 +55,12 @@ class AccessoryAgentService:
         embedding_model: str = None,
         supabase_url: str = None,
         supabase_key: str = None,
+        local_index: Optional[QuantizedAccessoryIndex] = None,
+        lexical_matcher: Optional[LexicalMatcher] = None,
+        timeout: float = None,
+        hedge_after: float = None,
+        gemini_breaker: Optional[CircuitBreaker] = None,
+        supabase_breaker: Optional[CircuitBreaker] = None,
     ):
         """Initialize the service with API and Supabase configuration.
 
@@ -41,6 +70,16 @@ class AccessoryAgentService:
             embedding_model: Gemini embedding model name. Defaults to env var.
             supabase_url: Supabase project URL. Defaults to env var.
             supabase_key: Supabase API key. Defaults to env var.
+            local_index: Local copy of the accessory embeddings. When given,
+                batched lookups search it instead of calling Supabase.
+            lexical_matcher: Matches names locally when the providers fail.
+            timeout: Deadline in seconds of each provider call. Defaults to env var.
+            hedge_after: Seconds after which a slow embedding or search request
+                is sent again. Defaults to env var.
+            gemini_breaker: Circuit breaker of Gemini calls. Defaults to the
+                shared one.
+            supabase_breaker: Circuit breaker of Supabase calls. Defaults to
+                the shared one.
         """
         self.api_key = api_key or GETAMPEDVIVE_GEMINI_API_KEY
         self.model_name = model or GETAMPEDVIVE_GEMINI_MODEL
@@ -59,6 +98,40 @@ class AccessoryAgentService:
         genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel(self.model_name)
         self.supabase = create_client(resolved_supabase_url, resolved_supabase_key)
+        self.local_index = local_index
+        self.lexical_matcher = lexical_matcher
+        self.timeout = timeout or GETAMPEDVIVE_PROVIDER_TIMEOUT
+        self.hedge_after = hedge_after or GETAMPEDVIVE_PROVIDER_HEDGE_AFTER
+        self.gemini_breaker = gemini_breaker or GEMINI_BREAKER
+        self.supabase_breaker = supabase_breaker or SUPABASE_BREAKER
+
+    def _embed(self, content):
+        """Embeds a name or a list of names, hedged, with a deadline."""
+        return guarded_call(
+            self.gemini_breaker,
+            lambda: genai.embed_content(
+                model=self.embedding_model_name,
+                content=content,
+                output_dimensionality=EMBEDDING_DIMENSIONALITY,
+            ),
+            timeout=self.timeout,
+            hedge_after=self.hedge_after,
+        )
+
+    def _rpc(self, function_name: str, params: dict):
+        """Calls a Supabase function, hedged, with a deadline."""
+        return guarded_call(
+            self.supabase_breaker,
+            lambda: self.supabase.rpc(function_name, params).execute(),
+            timeout=self.timeout,
+            hedge_after=self.hedge_after,
+        )
+
+    def _lexical_fallback(self, accessory_name: str) -> Optional[str]:
+        """Local best guess when the providers cannot be used."""
+        if self.lexical_matcher is None:
+            return None
+        return self.lexical_matcher.best_id(accessory_name)
 
     def _find_accessory_id(self, accessory_name: str) -> Optional[str]:
         """Find the best matching accessory ID using embedding similarity search.
@@ -71,47 +144,114 @@ class AccessoryAgentService:
         """
         try:
             # 1. Generate embedding for the query
-            result = genai.embed_content(
-                model=self.embedding_model_name,
-                content=accessory_name,
-                output_dimensionality=EMBEDDING_DIMENSIONALITY,
-            )
+            result = self._embed(accessory_name)
 
             # 2. Search Supabase for similar embeddings
-            response = self.supabase.rpc(
+            response = self._rpc(
                 "match_accessory",
                 {
                     "query_embedding": result["embedding"],
                     "match_threshold": 0.7,
                     "match_count": 3,
                 },
-            ).execute()
+            )
 
-            if not response.data:
-                logger.warning(f"No embedding match found for: {accessory_name}")
-                return None
+            return self._resolve_match(accessory_name, response.data)
 
-            top_match = response.data[0]
+        except Exception as e:
+            logger.error(f"Error finding accessory ID for '{accessory_name}': {e}")
+            return self._lexical_fallback(accessory_name)
 
-            # 3. High confidence → return directly
-            if top_match["similarity"] > HIGH_CONFIDENCE_THRESHOLD:
-                logger.debug(
-                    f"High confidence match: '{accessory_name}' → "
-                    f"'{top_match['accessory_name']}' "
-                    f"(similarity={top_match['similarity']:.3f})"
-                )
-                return top_match["accessory_id"]
+    def _find_accessory_ids(self, accessory_names: List[str]) -> List[Optional[str]]:
+        """Find the best matching accessory IDs for many names at once.
+
+        All names are embedded in a single request and searched with a single
+        ``match_accessories`` call, instead of one round trip per name.
+        Ambiguous names are disambiguated concurrently, all within one
+        provider deadline; those still pending then use their top match.
+
+        Args:
+            accessory_names: The accessory names to search for.
+
+        Returns:
+            The accessory ID of each name, in order, or None where no match is found.
+        """
+        unique_names = list(dict.fromkeys(accessory_names))
+        if not unique_names:
+            return []
+
+        try:
+            result = self._embed(unique_names)
 
-            # 4. Ambiguous → let Gemini pick from shortlist
-            candidates = [m["accessory_name"] for m in response.data]
-            return self._disambiguate_with_gemini(
-                accessory_name, candidates, response.data
+            if self.local_index is not None:
+                matches = self.local_index.match(
+                    result["embedding"], match_threshold=0.7, match_count=3
+                )
+            else:
+                matches = self._match_remote(result["embedding"])
+
+            resolved = map_with_deadline(
+                lambda item: self._resolve_match(*item),
+                list(zip(unique_names, matches)),
+                fallback=lambda item: item[1][0]["accessory_id"] if item[1] else None,
+                timeout=self.timeout,
             )
+            ids_by_name = dict(zip(unique_names, resolved))
 
         except Exception as e:
-            logger.error(f"Error finding accessory ID for '{accessory_name}': {e}")
+            logger.error(f"Error finding accessory IDs for {unique_names}: {e}")
+            return [self._lexical_fallback(name) for name in accessory_names]
+
+        return [ids_by_name[name] for name in accessory_names]
+
+    def _match_remote(self, embeddings: List[List[float]]) -> List[list]:
+        """Top matches of each embedding with one ``match_accessories`` call."""
+        response = self._rpc(
+            "match_accessories",
+            {
+                "query_embeddings": [
+                    _to_vector_literal(embedding) for embedding in embeddings
+                ],
+                "match_threshold": 0.7,
+                "match_count": 3,
+            },
+        )
+
+        matches = [[] for _ in embeddings]
+        for row in response.data or []:
+            matches[row["query_index"]].append(row)
+
+        return matches
+
+    def _resolve_match(self, accessory_name: str, match_data: list) -> Optional[str]:
+        """Pick the accessory ID from the similarity matches of one name.
+
+        Args:
+            accessory_name: The accessory name that was searched.
+            match_data: Matches ordered by decreasing similarity.
+
+        Returns:
+            The accessory ID, or None if there are no matches.
+        """
+        if not match_data:
+            logger.warning(f"No embedding match found for: {accessory_name}")
             return None
 
+        top_match = match_data[0]
+
+        # High confidence → return directly
+        if top_match["similarity"] > HIGH_CONFIDENCE_THRESHOLD:
+            logger.debug(
+                f"High confidence match: '{accessory_name}' → "
+                f"'{top_match['accessory_name']}' "
+                f"(similarity={top_match['similarity']:.3f})"
+            )
+            return top_match["accessory_id"]
+
+        # Ambiguous → let Gemini pick from shortlist
+        candidates = [m["accessory_name"] for m in match_data]
+        return self._disambiguate_with_gemini(accessory_name, candidates, match_data)
+
     def _disambiguate_with_gemini(
         self,
         query: str,
@@ -134,7 +274,14 @@ class AccessoryAgentService:
                 f'Which one best matches: "{query}"?\n'
                 f"Return ONLY the exact matching name from the list, or 'NOT_FOUND'."
             )
-            response = self.model.generate_content(prompt)
+            # No hedging: a duplicate generation costs tokens. While the
+            # breaker is open this raises right away and the top match is used.
+            response = guarded_call(
+                self.gemini_breaker,
+                self.model.generate_content,
+                prompt,
+                timeout=self.timeout,
+            )
             matched_name = response.text.strip()
 
             for m in match_data:
@@ -166,19 +313,23 @@ class AccessoryAgentService:
         """
         try:
             lines = [line.strip() for line in input_text.split("\n") if line.strip()]
-            results = []
+            rows = [[p.strip() for p in line.split(",") if p.strip()] for line in lines]
+            rows = [parts for parts in rows if parts]
 
-            for line in lines:
-                parts = [p.strip() for p in line.split(",") if p.strip()]
-                if not parts:
-                    continue
+            # Resolve every accessory of the paste in one batch
+            all_accessories = [acc for parts in rows for acc in parts[1:]]
+            found_ids = dict(
+                zip(all_accessories, self._find_accessory_ids(all_accessories))
+            )
 
+            results = []
+            for parts in rows:
                 player_name = parts[0]
                 accessories = parts[1:]
 
                 accessory_ids = []
                 for acc in accessories:
-                    acc_id = self._find_accessory_id(acc)
+                    acc_id = found_ids[acc]
                     if acc_id:
                         accessory_ids.append(acc_id)
                     else:
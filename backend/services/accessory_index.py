@@ -0,0 +1,253 @@
+"""
+Local, quantized copy of the accessory embeddings for the lookup service.
+
+Search runs in two stages: a cheap first pass over int8 or binary codes picks
+a shortlist of candidates, which is then rescored exactly against the float
+vectors. The float vectors are memory-mapped from disk, so only the rows of
+the shortlist are ever read and one copy is shared by every session.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+QUANTIZATIONS = ("int8", "binary")
+DEFAULT_RESCORE_CANDIDATES = 32
+# First-pass rows processed at once; bounds the temporary float/uint8 buffers
+SCAN_CHUNK_ROWS = 1024
+
+
+def _popcount64(x: np.ndarray) -> np.ndarray:
+    """Set bits of each uint64 (SWAR bit counting, NumPy has no popcount)."""
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + (
+        (x >> np.uint64(2)) & np.uint64(0x3333333333333333)
+    )
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize_int8(vectors: np.ndarray):
+    """Symmetric per-vector int8 quantization. Returns (codes, scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Sign bits packed into uint64 words, e.g. 768 dimensions -> 12 words
+    (96 bytes).
+    """
+    bits = np.packbits(vectors > 0, axis=1)
+    padding = -bits.shape[1] % 8
+    if padding:
+        bits = np.pad(bits, ((0, 0), (0, padding)))
+    return np.ascontiguousarray(bits).view(np.uint64)
+
+
+class QuantizedAccessoryIndex:
+    """Accessory embeddings with int8 or binary codes for a fast first pass."""
+
+    def __init__(
+        self,
+        accessory_ids: Sequence[str],
+        accessory_names: Sequence[str],
+        vectors,
+        quantization: str = "int8",
+        rescore_candidates: int = DEFAULT_RESCORE_CANDIDATES,
+        normalized: bool = False,
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Invalid quantization: {quantization}")
+
+        self.accessory_ids = list(accessory_ids)
+        self.accessory_names = list(accessory_names)
+        self.vectors = vectors if normalized else _normalize(vectors)
+        self.quantization = quantization
+        self.rescore_candidates = rescore_candidates
+
+        if quantization == "int8":
+            self.codes, self.scales = quantize_int8(self.vectors)
+        else:
+            self.codes, self.scales = quantize_binary(self.vectors), None
+
+    def __len__(self):
+        return len(self.accessory_ids)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Bytes always held in memory: the codes and their scales."""
+        scales = self.scales.nbytes if self.scales is not None else 0
+        return self.codes.nbytes + scales
+
+    def save(self, folder: Path) -> None:
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        np.save(folder / "vectors.npy", np.asarray(self.vectors, dtype=np.float32))
+        with open(folder / "accessories.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self.accessory_ids, "names": self.accessory_names},
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, folder: Path, quantization: str = "int8", **kwargs):
+        """Loads a saved index; the float vectors stay memory-mapped."""
+        folder = Path(folder)
+        with open(folder / "accessories.json", encoding="utf-8") as f:
+            accessories = json.load(f)
+        vectors = np.load(folder / "vectors.npy", mmap_mode="r")
+
+        return cls(
+            accessories["ids"],
+            accessories["names"],
+            vectors,
+            quantization,
+            normalized=True,
+            **kwargs,
+        )
+
+    def _first_pass_scores(self, queries: np.ndarray) -> np.ndarray:
+        """Approximate scores, higher is closer, of shape (queries, rows)."""
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+
+        if self.quantization == "int8":
+            for start in range(0, len(self), SCAN_CHUNK_ROWS):
+                stop = start + SCAN_CHUNK_ROWS
+                codes = self.codes[start:stop].astype(np.float32)
+                scores[:, start:stop] = (queries @ codes.T) * self.scales[start:stop]
+        else:
+            query_bits = quantize_binary(queries)
+            for start in range(0, len(self), SCAN_CHUNK_ROWS):
+                stop = start + SCAN_CHUNK_ROWS
+                xor = query_bits[:, None, :] ^ self.codes[None, start:stop, :]
+                distances = _popcount64(xor).sum(axis=2)
+                scores[:, start:stop] = -distances.astype(np.float32)
+
+        return scores
+
+    def search(self, queries, k: int = 3, exact: bool = False):
+        """
+        Top-k accessories by cosine similarity of each query.
+        Returns (indices, similarities), both of shape (queries, k).
+        """
+        queries = _normalize(queries)
+        k = min(k, len(self))
+
+        if exact:
+            similarities = queries @ np.asarray(self.vectors).T
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            top_similarities = np.take_along_axis(similarities, top, axis=1)
+        else:
+            num_candidates = min(max(self.rescore_candidates, k), len(self))
+            scores = self._first_pass_scores(queries)
+            candidates = np.argpartition(-scores, num_candidates - 1, axis=1)
+            candidates = np.sort(candidates[:, :num_candidates], axis=1)
+
+            top = np.empty((len(queries), k), dtype=np.intp)
+            top_similarities = np.empty((len(queries), k), dtype=np.float32)
+            for i, rows in enumerate(candidates):
+                # Only the shortlisted rows of the float vectors are read
+                exact_scores = np.asarray(self.vectors[rows]) @ queries[i]
+                best = np.argpartition(-exact_scores, k - 1)[:k]
+                top[i] = rows[best]
+                top_similarities[i] = exact_scores[best]
+
+        order = np.argsort(-top_similarities, axis=1)
+        return (
+            np.take_along_axis(top, order, axis=1),
+            np.take_along_axis(top_similarities, order, axis=1),
+        )
+
+    def match(
+        self, queries, match_threshold: float = 0.7, match_count: int = 3
+    ) -> List[List[Dict]]:
+        """
+        Same rows as the match_accessories RPC, grouped per query: dicts with
+        accessory_id, accessory_name and similarity, best first.
+        """
+        indices, similarities = self.search(queries, match_count)
+        return [
+            [
+                {
+                    "accessory_id": self.accessory_ids[i],
+                    "accessory_name": self.accessory_names[i],
+                    "similarity": float(similarity),
+                }
+                for i, similarity in zip(row_indices, row_similarities)
+                if similarity > match_threshold
+            ]
+            for row_indices, row_similarities in zip(indices, similarities)
+        ]
+
+
+def recall_report(
+    vectors,
+    queries,
+    k: int = 3,
+    rescore_candidates: int = DEFAULT_RESCORE_CANDIDATES,
+    repeats: int = 5,
+) -> List[Dict]:
+    """
+    Recall@k against exact float search, latency per query and resident size
+    of each quantization. Returns one dict per search mode.
+    """
+    vectors = _normalize(vectors)
+    labels = [str(i) for i in range(len(vectors))]
+
+    def timed(index, exact):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            indices, _ = index.search(queries, k, exact=exact)
+            best = min(best, time.perf_counter() - start)
+        return indices, best * 1000 / len(queries)
+
+    exact_index = QuantizedAccessoryIndex(labels, labels, vectors, normalized=True)
+    truth, exact_ms = timed(exact_index, exact=True)
+    report = [
+        {
+            "mode": "float32 exact",
+            "recall": 1.0,
+            "ms_per_query": exact_ms,
+            "resident_bytes": vectors.nbytes,
+        }
+    ]
+
+    for quantization in QUANTIZATIONS:
+        index = QuantizedAccessoryIndex(
+            labels, labels, vectors, quantization, rescore_candidates, normalized=True
+        )
+        indices, ms = timed(index, exact=False)
+        hits = sum(len(set(a) & set(b)) for a, b in zip(indices, truth))
+        report.append(
+            {
+                "mode": f"{quantization} + rescore top {rescore_candidates}",
+                "recall": hits / truth.size,
+                "ms_per_query": ms,
+                "resident_bytes": index.resident_bytes,
+            }
+        )
+
+    return report
+
+
+def load_accessory_index(
+    folder: Optional[Path], quantization: str = "int8"
+) -> Optional[QuantizedAccessoryIndex]:
+    """Loads the local index if folder holds one, otherwise returns None."""
+    if not folder or not (Path(folder) / "vectors.npy").exists():
+        return None
+    return QuantizedAccessoryIndex.load(folder, quantization)
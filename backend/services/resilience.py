@@ -0,0 +1,239 @@
+"""
+Deadlines, hedged requests and circuit breakers for calls to external
+providers (Gemini, Supabase), plus a local lexical matcher to fall back on
+while they are unavailable.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from backend.utils.search_index import trigrams
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0  # seconds
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_RESET_TIMEOUT = 30.0  # seconds
+
+# Timed-out calls cannot be interrupted and keep their thread until they
+# return, so the pool is sized for a few stuck calls per provider.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="provider")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected right away. Once ``reset_timeout`` seconds have passed,
+    a single trial call is let through (half open): success closes the circuit
+    again, failure reopens it for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+        clock=time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go through now. Claims the half-open trial."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning(f"Circuit '{self.name}' opened")
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def call(self, func: Callable, *args, **kwargs):
+        """Calls func through the breaker. Raises CircuitOpenError if open."""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
+
+
+def call_with_deadline(func: Callable, *args, timeout: float = DEFAULT_TIMEOUT):
+    """
+    Runs func on the provider pool and waits at most timeout seconds.
+    Raises TimeoutError when the deadline passes; the call itself is abandoned.
+    """
+    return _executor.submit(func, *args).result(timeout=timeout)
+
+
+def hedged_call(
+    func: Callable,
+    *args,
+    timeout: float = DEFAULT_TIMEOUT,
+    hedge_after: Optional[float] = None,
+    max_attempts: int = 2,
+):
+    """
+    Runs func with a deadline, sending a duplicate request every hedge_after
+    seconds while none has answered, up to max_attempts in flight. Returns the
+    first successful result; raises the last error if every attempt fails, or
+    TimeoutError at the deadline. Only for idempotent calls.
+    """
+    if hedge_after is None or max_attempts <= 1:
+        return call_with_deadline(func, *args, timeout=timeout)
+
+    deadline = time.monotonic() + timeout
+    pending = {_executor.submit(func, *args)}
+    attempts = 1
+    last_error = None
+
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        wait_time = remaining
+        if attempts < max_attempts:
+            wait_time = min(remaining, hedge_after)
+
+        done, pending = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            last_error = future.exception()
+
+        if attempts < max_attempts and (not done or not pending):
+            # Slow (or failed) so far: send another copy of the request
+            pending.add(_executor.submit(func, *args))
+            attempts += 1
+
+    if pending or last_error is None:
+        raise TimeoutError(f"No response within {timeout}s")
+    raise last_error
+
+
+def guarded_call(
+    breaker: CircuitBreaker,
+    func: Callable,
+    *args,
+    timeout: float = DEFAULT_TIMEOUT,
+    hedge_after: Optional[float] = None,
+):
+    """Hedged call with a deadline, through a circuit breaker."""
+    return breaker.call(
+        hedged_call, func, *args, timeout=timeout, hedge_after=hedge_after
+    )
+
+
+def map_with_deadline(
+    func: Callable,
+    items: Sequence,
+    fallback: Callable,
+    timeout: float = DEFAULT_TIMEOUT,
+    max_workers: int = 8,
+) -> List:
+    """
+    Runs func on every item concurrently and waits at most timeout seconds
+    for all of them. Items whose call fails or misses the deadline get
+    fallback(item) instead. Returns the results in order.
+    """
+    if not items:
+        return []
+
+    # A pool of its own: func may itself wait on the provider pool
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(items)))
+    futures = [executor.submit(func, item) for item in items]
+    done, _ = wait(futures, timeout=timeout)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for item, future in zip(items, futures):
+        if future in done and future.exception() is None:
+            results.append(future.result())
+        else:
+            if future not in done:
+                logger.warning(f"No result within {timeout}s for {item!r}")
+            results.append(fallback(item))
+    return results
+
+
+class LexicalMatcher:
+    """Matches names by character trigram similarity, with no network calls."""
+
+    def __init__(self, ids: Sequence[str], names: Sequence[str]):
+        self.ids = list(ids)
+        self.names = list(names)
+        self._trigrams = [trigrams(name) for name in self.names]
+
+    def match(self, query: str, count: int = 3) -> List[Tuple[str, str, float]]:
+        """Top (id, name, Jaccard similarity) matches, best first."""
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            return []
+
+        scored = []
+        for i, name_trigrams in enumerate(self._trigrams):
+            shared = len(query_trigrams & name_trigrams)
+            if shared:
+                union = len(query_trigrams) + len(name_trigrams) - shared
+                scored.append((shared / union, i))
+        scored.sort(reverse=True)
+
+        return [(self.ids[i], self.names[i], score) for score, i in scored[:count]]
+
+    def best_id(self, query: str, min_similarity: float = 0.3) -> Optional[str]:
+        matches = self.match(query, count=1)
+        if not matches or matches[0][2] < min_similarity:
+            return None
+        return matches[0][0]
@@ -1,14 +1,14 @@
 """
 Constants for file and directory paths used throughout the application.
+
+Importing this package does no I/O: settings read from the environment (and
+the .env file) are resolved on first access, and data directories are only
+created by ensure_directories_exist().
 """
 
 import os
 from pathlib import Path
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 DATA_DIR: Path = Path("data")
 
 PLAYERS_FOLDER: Path = DATA_DIR / "players"
@@ -16,22 +16,57 @@ ACCESSORIES_FOLDER: Path = DATA_DIR / "accs"
 STYLES_FOLDER: Path = DATA_DIR / "styles"
 ACCS_BY_YEAR_FILE: Path = DATA_DIR / "accs_by_year.xlsx"
 
-GETAMPEDVIVE_GEMINI_API_KEY = os.environ.get("GETAMPEDVIVE_GEMINI_API_KEY")
-GETAMPEDVIVE_GEMINI_MODEL = os.environ.get(
-    "GETAMPEDVIVE_GEMINI_MODEL", "gemini-3.1-flash-lite-preview"
-)
-GETAMPEDVIVE_GEMINI_EMBEDDING_MODEL = os.environ.get(
-    "GETAMPEDVIVE_GEMINI_EMBEDDING_MODEL", "gemini-embedding-001"
-)
+# name -> (default, type); None defaults stay None when unset
+_SETTINGS = {
+    "GETAMPEDVIVE_GEMINI_API_KEY": (None, str),
+    "GETAMPEDVIVE_GEMINI_MODEL": ("gemini-3.1-flash-lite-preview", str),
+    "GETAMPEDVIVE_GEMINI_EMBEDDING_MODEL": ("gemini-embedding-001", str),
+    "SUPABASE_URL": (None, str),
+    "SUPABASE_KEY": (None, str),
+    # Deadline and hedging delay, in seconds, of Gemini and Supabase calls
+    "GETAMPEDVIVE_PROVIDER_TIMEOUT": (10.0, float),
+    "GETAMPEDVIVE_PROVIDER_HEDGE_AFTER": (2.0, float),
+    # Local quantized copy of the accessory embeddings (optional)
+    "GETAMPEDVIVE_ACCESSORY_INDEX_DIR": (None, str),
+    "GETAMPEDVIVE_ACCESSORY_INDEX_QUANTIZATION": ("int8", str),
+    "GETAMPEDVIVE_SESSION_SECRET": (None, str),
+    # Lifetime of login session cookies, in seconds (12 hours)
+    "GETAMPEDVIVE_SESSION_TTL": (12 * 60 * 60, int),
+    # Reverse proxies in front of the app whose X-Forwarded-For can be trusted
+    "GETAMPEDVIVE_TRUSTED_PROXIES": (0, int),
+    # bcrypt cost factor and thread pools of password hashing and image encoding
+    "GETAMPEDVIVE_BCRYPT_ROUNDS": (12, int),
+    "GETAMPEDVIVE_PASSWORD_WORKERS": (min(4, os.cpu_count() or 1), int),
+    "GETAMPEDVIVE_ENCODER_WORKERS": (min(4, os.cpu_count() or 1), int),
+}
+
+_dotenv_loaded = False
+
+
+def _load_dotenv() -> None:
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
 
-SUPABASE_URL = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+def __getattr__(name):
+    """Resolves a setting on first access and caches it as a module global."""
+    if name not in _SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    _load_dotenv()
+    default, cast = _SETTINGS[name]
+    raw = os.environ.get(name)
+    value = default if raw is None else cast(raw)
+    globals()[name] = value
+
+    return value
 
 
 def ensure_directories_exist() -> None:
     """Ensure all required directories exist, creating them if necessary."""
     for directory in (PLAYERS_FOLDER, ACCESSORIES_FOLDER, STYLES_FOLDER):
         directory.mkdir(parents=True, exist_ok=True)
-
-
-ensure_directories_exist()
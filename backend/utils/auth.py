@@ -1,58 +1,232 @@
-import os
+import logging
 
-import bcrypt
-import psycopg2
 import streamlit as st
-from dotenv import load_dotenv
+import streamlit.components.v1 as components
 
-load_dotenv()
+from backend.db import get_connection
+from backend.repository import user_repository
+from backend.utils import (
+    GETAMPEDVIVE_SESSION_SECRET,
+    GETAMPEDVIVE_SESSION_TTL,
+    GETAMPEDVIVE_TRUSTED_PROXIES,
+)
+from backend.utils.passwords import hash_password, needs_rehash, verify_password
+from backend.utils.rate_limit import RateLimiter
+from backend.utils.session_tokens import RevocationList, SessionTokenSigner
+
+logger = logging.getLogger(__name__)
+
+# 5 attempts per (login, IP), then one every 30s; 20 attempts per IP, then one
+# every 6s. Keying logins by IP too keeps others from locking an account out.
+LOGIN_RATE_LIMITER = RateLimiter(capacity=5, refill_rate=1 / 30)
+IP_RATE_LIMITER = RateLimiter(capacity=20, refill_rate=1 / 6)
+
+SESSION_COOKIE_NAME = "getampedvive_session"
+SESSION_SIGNER = SessionTokenSigner(
+    secret=GETAMPEDVIVE_SESSION_SECRET,
+    ttl=GETAMPEDVIVE_SESSION_TTL,
+    revocations=RevocationList(
+        load=user_repository.fetch_revoked_session_tokens,
+        persist=user_repository.revoke_session_token,
+    ),
+)
 
 
 def require_login(login_page="pages/6_🔒Login.py"):
-    """Redirects to login page if user is not logged in."""
-    if "logged_in" not in st.session_state or not st.session_state.logged_in:
+    """Redirects to login page if user is not logged in.
+
+    A valid session cookie logs the user back in without a database round trip.
+    """
+    if "logged_in" in st.session_state and st.session_state.logged_in:
+        return
+
+    if not resume_session():
         st.switch_page(login_page)
 
 
-def authenticate_user(login: str, password: str):
+def _set_session_cookie(value: str, max_age: int):
+    """Write the session cookie in the browser (Streamlit cannot set cookies).
+
+    Streamlit gives no access to the HTTP response, so the cookie is written
+    from JavaScript and cannot be HttpOnly: a script injected in the page
+    could read the token. SameSite=Strict and Secure (over HTTPS) still
+    apply, the token is short-lived (GETAMPEDVIVE_SESSION_TTL) and logging
+    out revokes it server-side.
+    """
+    components.html(
+        f"""
+        <script>
+        const secure = window.parent.location.protocol === "https:" ? "; Secure" : "";
+        window.parent.document.cookie =
+            "{SESSION_COOKIE_NAME}={value}; Max-Age={max_age}; Path=/; SameSite=Strict"
+            + secure;
+        </script>
+        """,
+        height=0,
+    )
+
+
+def _get_session_cookie():
+    try:
+        return st.context.cookies.get(SESSION_COOKIE_NAME)
+    except Exception:
+        return None
+
+
+def start_session(login: str, role: str):
+    """Mark the user as logged in and store a signed session token cookie."""
+    token = SESSION_SIGNER.issue(login, role)
+
+    st.session_state.logged_in = True
+    st.session_state.login = login
+    st.session_state.role = role
+    st.session_state.session_token = token
+
+    _set_session_cookie(token, SESSION_SIGNER.ttl)
+
+
+def resume_session():
+    """Restore the login state from the session cookie, if it is still valid."""
+    token = _get_session_cookie()
+    if not token:
+        return False
+
+    claims = SESSION_SIGNER.verify(token)
+    if claims is None:
+        return False
+
+    st.session_state.logged_in = True
+    st.session_state.login = claims["sub"]
+    st.session_state.role = claims["role"]
+    st.session_state.session_token = token
+    return True
+
+
+def end_session():
+    """Revoke the current session token and clear the login state."""
+    token = st.session_state.get("session_token") or _get_session_cookie()
+    if token:
+        SESSION_SIGNER.revoke(token)
+
+    for key in ("logged_in", "login", "role", "session_token"):
+        st.session_state.pop(key, None)
+
+    _set_session_cookie("", 0)
+
+
+def _peer_ip():
+    """IP address of the socket the session came from, or None."""
+    ip_address = getattr(st.context, "ip_address", None)
+    if ip_address:
+        return ip_address
+
+    # Older Streamlit versions only expose it through the runtime internals
+    try:
+        from streamlit.runtime import get_instance
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        session_info = get_instance()._session_mgr.get_session_info(
+            get_script_run_ctx().session_id
+        )
+        return session_info.client.request.remote_ip
+    except Exception:
+        return None
+
+
+def client_ip_from_headers(headers, peer_ip=None, trusted_proxies=0):
+    """
+    Client IP behind trusted_proxies reverse proxies. Each proxy appends the
+    address it received the request from to X-Forwarded-For, so only the
+    right-most trusted_proxies hops can be believed: the client itself may
+    have sent the rest. Without trusted proxies the headers are ignored.
+    """
+    if trusted_proxies <= 0:
+        return peer_ip
+
+    forwarded_for = headers.get("X-Forwarded-For")
+    if forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if hops:
+            return hops[-min(trusted_proxies, len(hops))]
+
+    return headers.get("X-Real-Ip") or peer_ip
+
+
+def get_client_ip():
+    """Best-effort client IP of the current Streamlit session, or None."""
+    try:
+        headers = st.context.headers
+    except Exception:
+        return None
+
+    return client_ip_from_headers(headers, _peer_ip(), GETAMPEDVIVE_TRUSTED_PROXIES)
+
+
+def is_login_throttled(login: str, client_ip: str = None):
+    """Whether the next login attempt for this login or IP would be rejected."""
+    return LOGIN_RATE_LIMITER.is_limited((login, client_ip)) or (
+        client_ip is not None and IP_RATE_LIMITER.is_limited(client_ip)
+    )
+
+
+def _rehash_password(login: str, password: str):
+    """Store the password again with the currently configured bcrypt cost."""
+    try:
+        with get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE users SET password = %s WHERE login = %s",
+                (hash_password(password), login),
+            )
+            connection.commit()
+            cursor.close()
+    except Exception as e:
+        logger.warning(f"Error rehashing password for user {login}: {e}")
+
+
+def authenticate_user(login: str, password: str, client_ip: str = None):
     """
     Authenticate user against the users and roles tables.
     Returns (True, role_name) if successful, else (False, None).
+
+    Attempts are rate limited per login and client IP, and per client IP,
+    before any database or bcrypt work is done.
     """
-    try:
-        connection = psycopg2.connect(
-            user=os.getenv("GETAMPEDVIVE_USER"),
-            password=os.getenv("GETAMPEDVIVE_PASSWORD"),
-            host=os.getenv("GETAMPEDVIVE_HOST"),
-            port=os.getenv("GETAMPEDVIVE_PORT"),
-            dbname=os.getenv("GETAMPEDVIVE_DBNAME"),
-        )
+    if (client_ip is not None and not IP_RATE_LIMITER.allow(client_ip)) or (
+        not LOGIN_RATE_LIMITER.allow((login, client_ip))
+    ):
+        logger.warning(f"Too many login attempts for user {login} from {client_ip}")
+        return False, None
 
-        cursor = connection.cursor()
-        cursor.execute(
-            """
-            SELECT u.password, r.name
-            FROM users u
-            JOIN roles r ON u.role_id = r.role_id
-            WHERE u.login = %s
-            """,
-            (login,),
-        )
+    try:
+        with get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(
+                """
+                SELECT u.password, r.name
+                FROM users u
+                JOIN roles r ON u.role_id = r.role_id
+                WHERE u.login = %s
+                """,
+                (login,),
+            )
 
-        result = cursor.fetchone()
+            result = cursor.fetchone()
 
-        cursor.close()
-        connection.close()
+            cursor.close()
 
         if result is None:
             return False, None
 
         stored_password, role_name = result
 
-        if bcrypt.checkpw(password.encode(), stored_password.encode()):
+        if verify_password(password, stored_password):
+            LOGIN_RATE_LIMITER.reset((login, client_ip))
+            if needs_rehash(stored_password):
+                _rehash_password(login, password)
             return True, role_name
         else:
             return False, None
     except Exception as e:
-        print(f"Error authenticating user: {e}")
+        logger.error(f"Error authenticating user: {e}")
         return False, None
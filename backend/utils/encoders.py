@@ -0,0 +1,224 @@
+"""
+Output encoders for composites: optimized/palette PNG, WebP and JPEG with a
+target byte size.
+
+PIL's encoders release the GIL, so encoding runs on a small bounded thread
+pool instead of the Streamlit script thread, and many images can be encoded
+at once.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+from backend.utils import GETAMPEDVIVE_ENCODER_WORKERS
+
+ENCODER_WORKERS: int = GETAMPEDVIVE_ENCODER_WORKERS
+ENCODE_CACHE_BYTES: int = 64 * 1024 * 1024
+
+# name -> (PIL format, file extension, mime type)
+ENCODER_FORMATS = {
+    "PNG": ("PNG", "png", "image/png"),
+    "WEBP": ("WEBP", "webp", "image/webp"),
+    "JPEG": ("JPEG", "jpg", "image/jpeg"),
+}
+
+JPEG_MIN_QUALITY: int = 20
+JPEG_MAX_QUALITY: int = 95
+
+_executor = ThreadPoolExecutor(
+    max_workers=ENCODER_WORKERS, thread_name_prefix="encoder"
+)
+
+
+class EncodedImage:
+    """Encoded image bytes plus what it took to produce them."""
+
+    __slots__ = ("data", "format", "quality", "width", "height", "elapsed")
+
+    def __init__(self, data: bytes, format: str, quality, width, height, elapsed):
+        self.data = data
+        self.format = format
+        self.quality = quality
+        self.width = width
+        self.height = height
+        self.elapsed = elapsed
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def extension(self) -> str:
+        return ENCODER_FORMATS[self.format][1]
+
+    @property
+    def mime(self) -> str:
+        return ENCODER_FORMATS[self.format][2]
+
+    def summary(self) -> str:
+        """Human readable size and time, e.g. 'JPEG 752x940, qualidade 85: 412.3 KB em 35 ms'."""
+        quality = f", qualidade {self.quality}" if self.quality is not None else ""
+        return (
+            f"{self.format} {self.width}x{self.height}{quality}: "
+            f"{self.size / 1024:.1f} KB em {self.elapsed * 1000:.0f} ms"
+        )
+
+
+def _to_image(image) -> Image.Image:
+    if isinstance(image, Image.Image):
+        return image
+    return Image.fromarray(np.asarray(image))
+
+
+def _save(image: Image.Image, format: str, **params) -> bytes:
+    buf = io.BytesIO()
+    image.save(buf, format=format, **params)
+    return buf.getvalue()
+
+
+def encode_png(image, optimize: bool = True, palette_colors: Optional[int] = None):
+    """
+    PNG, optionally quantized to a palette of at most palette_colors colors.
+    Returns (data, None).
+    """
+    image = _to_image(image)
+    if palette_colors:
+        method = (
+            Image.Quantize.FASTOCTREE
+            if image.mode == "RGBA"
+            else Image.Quantize.MEDIANCUT
+        )
+        image = image.quantize(colors=palette_colors, method=method)
+
+    return _save(image, "PNG", optimize=optimize), None
+
+
+def encode_webp(image, lossless: bool = False, quality: int = 80, method: int = 4):
+    """WebP, lossless or lossy. Returns (data, quality)."""
+    data = _save(
+        _to_image(image), "WEBP", lossless=lossless, quality=quality, method=method
+    )
+    return data, None if lossless else quality
+
+
+def encode_jpeg(
+    image,
+    quality: int = 90,
+    target_bytes: Optional[int] = None,
+    min_quality: int = JPEG_MIN_QUALITY,
+    max_quality: int = JPEG_MAX_QUALITY,
+):
+    """
+    JPEG at a fixed quality or, with target_bytes, at the highest quality whose
+    output fits in target_bytes (binary search). If not even min_quality fits,
+    the min_quality encoding is returned. Returns (data, quality).
+    """
+    image = _to_image(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    if target_bytes is None:
+        return _save(image, "JPEG", quality=quality), quality
+
+    best = None
+    low, high = min_quality, max_quality
+    while low <= high:
+        mid = (low + high) // 2
+        data = _save(image, "JPEG", quality=mid)
+        if len(data) <= target_bytes:
+            best = (data, mid)
+            low = mid + 1
+        else:
+            high = mid - 1
+
+    if best is None:
+        best = (_save(image, "JPEG", quality=min_quality), min_quality)
+
+    return best
+
+
+def encode(image, format: str = "PNG", **options) -> EncodedImage:
+    """
+    Encodes with the encoder of format. Options are passed through:
+        PNG: optimize, palette_colors
+        WEBP: lossless, quality, method
+        JPEG: quality, target_bytes, min_quality, max_quality
+    """
+    format = format.upper()
+    image = _to_image(image)
+
+    start = time.perf_counter()
+    if format == "PNG":
+        data, quality = encode_png(image, **options)
+    elif format == "WEBP":
+        data, quality = encode_webp(image, **options)
+    elif format == "JPEG":
+        data, quality = encode_jpeg(image, **options)
+    else:
+        raise ValueError(f"Formato de imagem inválido: {format}")
+
+    return EncodedImage(
+        data, format, quality, image.width, image.height, time.perf_counter() - start
+    )
+
+
+_cache = OrderedDict()
+_cache_size = 0
+_cache_lock = threading.Lock()
+
+
+def _cache_key(image: Image.Image, format: str, options: dict):
+    digest = hashlib.sha256(image.tobytes()).hexdigest()
+    return (
+        digest,
+        image.mode,
+        image.size,
+        format.upper(),
+        tuple(sorted(options.items())),
+    )
+
+
+def _encode_cached(image, format: str, options: dict) -> EncodedImage:
+    global _cache_size
+
+    image = _to_image(image)
+    key = _cache_key(image, format, options)
+    with _cache_lock:
+        encoded = _cache.get(key)
+        if encoded is not None:
+            _cache.move_to_end(key)
+            return encoded
+
+    encoded = encode(image, format, **options)
+
+    with _cache_lock:
+        if key not in _cache:
+            _cache[key] = encoded
+            _cache_size += encoded.size
+        while _cache_size > ENCODE_CACHE_BYTES and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            _cache_size -= evicted.size
+
+    return encoded
+
+
+def encode_async(image, format: str = "PNG", **options) -> "Future[EncodedImage]":
+    """
+    Encodes on the encoder pool. Identical pixels with identical settings are
+    only encoded once, since Streamlit re-renders the same images on every rerun.
+    """
+    return _executor.submit(_encode_cached, image, format, options)
+
+
+def encode_many(images, format: str = "PNG", **options) -> List[EncodedImage]:
+    """Encodes all images concurrently, preserving their order."""
+    futures = [encode_async(image, format, **options) for image in images]
+    return [future.result() for future in futures]
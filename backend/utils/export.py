@@ -0,0 +1,202 @@
+"""
+Session-wide export of generated images into a single zip file.
+
+Each image is encoded once, losslessly, when it is added, and only those bytes
+are kept, within a per-session byte budget. The zip is written to a temporary
+file one entry at a time, converting to the chosen format on the way.
+"""
+
+import hashlib
+import io
+import json
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+from PIL import Image
+
+from backend.utils.encoders import encode, encode_async
+
+EXPORT_FORMATS: Dict[str, str] = {"PNG": "png", "JPEG": "jpg", "WEBP": "webp"}
+DEFAULT_QUALITY: int = 90
+# Encoded bytes and entries kept per session; the oldest entries go first
+DEFAULT_EXPORT_MAX_BYTES: int = 128 * 1024 * 1024
+DEFAULT_EXPORT_MAX_ENTRIES: int = 200
+
+
+def encode_image(image, format: str = "PNG", quality: int = DEFAULT_QUALITY) -> bytes:
+    """Encodes a PIL image or array with the given format and quality."""
+    format = format.upper()
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação inválido: {format}")
+
+    options = {"optimize": False} if format == "PNG" else {"quality": quality}
+    return encode(image, format, **options).data
+
+
+class ExportEntry:
+    """
+    One image to export, held as lossless PNG bytes, with its own output
+    format, quality and metadata.
+    """
+
+    __slots__ = ("name", "data", "format", "quality", "metadata")
+
+    def __init__(
+        self,
+        name: str,
+        data: bytes,
+        format: str = "PNG",
+        quality: int = DEFAULT_QUALITY,
+        metadata: Optional[dict] = None,
+    ):
+        self.name = name
+        self.data = data
+        self.format = format.upper()
+        self.quality = quality
+        self.metadata = metadata or {}
+
+    @property
+    def filename(self) -> str:
+        return f"{self.name}.{EXPORT_FORMATS[self.format]}"
+
+    def encoded(self) -> bytes:
+        """The image in the entry's format, converted from the PNG if needed."""
+        if self.format == "PNG":
+            return self.data
+        with Image.open(io.BytesIO(self.data)) as image:
+            return encode_image(image, self.format, self.quality)
+
+
+class SessionExport:
+    """
+    Images generated during a session, keyed by name. Adding an image under an
+    existing name replaces it, so re-rendering a page does not pile up copies.
+    Past max_bytes of encoded images or max_entries entries, the oldest
+    entries are dropped.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_EXPORT_MAX_BYTES,
+        max_entries: int = DEFAULT_EXPORT_MAX_ENTRIES,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Bytes of encoded images held."""
+        return self._size
+
+    def _pop(self, name: str) -> None:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._size -= len(entry.data)
+
+    def add(
+        self,
+        name: str,
+        image,
+        format: str = "PNG",
+        quality: int = DEFAULT_QUALITY,
+        **metadata,
+    ) -> ExportEntry:
+        # Encoded through the shared encode cache, so pages that add the same
+        # image on every rerun only encode it once
+        data = encode_async(image, "PNG", optimize=False).result().data
+        entry = ExportEntry(name, data, format, quality, metadata)
+        with self._lock:
+            self._pop(name)
+            self._entries[name] = entry
+            self._size += len(data)
+            while len(self._entries) > 1 and (
+                self._size > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                self._pop(next(iter(self._entries)))
+
+        return entry
+
+    def remove_prefix(self, prefix: str) -> None:
+        """Drops every entry whose name starts with prefix, e.g. stale team images."""
+        with self._lock:
+            for name in [name for name in self._entries if name.startswith(prefix)]:
+                self._pop(name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries.values())
+
+
+def write_zip(entries: Iterable[ExportEntry], fileobj) -> dict:
+    """
+    Streams the entries into a zip written to fileobj, converting one image at
+    a time, and appends a manifest.json. Entries whose encoded bytes are identical
+    are stored once; the manifest points duplicates at the stored file.
+    Returns the manifest.
+    """
+    manifest = {"entries": []}
+    stored_by_hash = {}
+    used_names = set()
+
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as zf:
+        for entry in entries:
+            data = entry.encoded()
+            digest = hashlib.sha256(data).hexdigest()
+
+            filename = entry.filename
+            suffix = 2
+            while filename in used_names:
+                filename = f"{entry.name}_{suffix}.{EXPORT_FORMATS[entry.format]}"
+                suffix += 1
+
+            record = {
+                "name": entry.name,
+                "format": entry.format,
+                "quality": entry.quality if entry.format != "PNG" else None,
+                "sha256": digest,
+                "bytes": len(data),
+                "metadata": entry.metadata,
+            }
+
+            if digest in stored_by_hash:
+                record["file"] = stored_by_hash[digest]
+                record["duplicate"] = True
+            else:
+                used_names.add(filename)
+                stored_by_hash[digest] = filename
+                record["file"] = filename
+                # Already compressed image data; storing avoids a second pass
+                zf.writestr(filename, data)
+
+            manifest["entries"].append(record)
+
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    return manifest
+
+
+def export_to_tempfile(entries: Iterable[ExportEntry]):
+    """
+    Writes the zip to a temporary file. Returns (path, manifest); the caller
+    owns the file and should delete it when done.
+    """
+    with tempfile.NamedTemporaryFile(
+        prefix="getampedvive_", suffix=".zip", delete=False
+    ) as tmp:
+        manifest = write_zip(entries, tmp)
+
+    return tmp.name, manifest
@@ -2,7 +2,11 @@
 Image processing utilities for tournament.
 """
 
+import io
 import random
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Tuple
 
@@ -30,6 +34,28 @@ def create_column_image(images: List[Image.Image]) -> Image.Image:
     return column_image
 
 
+def row_pixel_indices(rows, row_height: int = 94) -> np.ndarray:
+    """Returns the pixel row indices covering the given row bands, in order."""
+    rows = np.asarray(rows, dtype=np.intp)
+    return (rows[:, None] * row_height + np.arange(row_height)).ravel()
+
+
+def gather_rows(arr: np.ndarray, rows, row_height: int = 94) -> np.ndarray:
+    """
+    Stacks the given row bands of an image array with a single fancy-indexing
+    gather, e.g. gather_rows(arr, [0, 3, 5]) returns rows 0, 3 and 5 stacked.
+    """
+    return arr[row_pixel_indices(rows, row_height)]
+
+
+def roulette_result_rows(sampled_rows, fixed_rows=None, avatar_row: int = 1):
+    """
+    Returns the row indices of a roulette result image: the avatar row, then the
+    fixed rows in ascending order, then the sampled rows in draw order.
+    """
+    return [avatar_row - 1] + sorted(fixed_rows or []) + list(sampled_rows)
+
+
 def roulette_team_rows(
     images: list,
     num_rows: int,
@@ -41,15 +67,21 @@ def roulette_team_rows(
 ):
     """
     For each image, crops the avatar row and N randomly selected accessory rows (excluding avatar_row).
+    Images may be PIL images or NumPy arrays.
     Returns (sampled_rows, avatar_imgs, accessory_imgs), where:
         - sampled_rows: list of int (row indices sampled for accessories)
-        - avatar_imgs: list of PIL.Image (one per image)
-        - accessory_imgs: list of lists of PIL.Image (one list per image, each containing N accessory rows)
+        - avatar_imgs: list of np.ndarray views (one per image)
+        - accessory_imgs: list of lists of np.ndarray views (one list per image, each containing N accessory rows)
+
+    The crops are views into each image array, so no pixels are copied. To
+    build the final result image use gather_rows with roulette_result_rows.
     """
     if rng is None:
         rng = random
 
-    height = images[0].height
+    arrays = [np.asarray(img) for img in images]
+
+    height = arrays[0].shape[0]
     max_possible_rows = height // row_height
     if selectable_rows is not None:
         valid_rows = [
@@ -70,19 +102,13 @@ def roulette_team_rows(
         )
 
     sampled_rows = rng.sample(valid_rows, num_accessory_rows)
-    avatar_imgs = []
-    accessory_imgs = []
-    for img in images:
-        np_img = np.array(img)
-        avatar_crop = np_img[
-            (avatar_row - 1) * row_height : avatar_row * row_height, :, :
-        ]
-        avatar_imgs.append(Image.fromarray(avatar_crop))
-        acc_list = []
-        for row in sampled_rows:
-            acc_crop = np_img[row * row_height : (row + 1) * row_height, :, :]
-            acc_list.append(Image.fromarray(acc_crop))
-        accessory_imgs.append(acc_list)
+    avatar_imgs = [
+        arr[(avatar_row - 1) * row_height : avatar_row * row_height] for arr in arrays
+    ]
+    accessory_imgs = [
+        [arr[row * row_height : (row + 1) * row_height] for row in sampled_rows]
+        for arr in arrays
+    ]
 
     return sampled_rows, avatar_imgs, accessory_imgs
 
@@ -93,7 +119,7 @@ def find_image(folder_path: Path, image_name: str) -> Optional[str]:
     image_name_lower = image_name.lower()
     found = None
     stems = []
-    for ext in [".png", ".jpg"]:
+    for ext in [".png", ".jpg", ".jpeg"]:
         for file in folder_path.glob(f"*{ext}"):
             stems.append(file.stem)
             if file.stem.lower() == image_name_lower:
@@ -126,15 +152,149 @@ def get_or_create_image(
     return resize_image(image_path=image_path, size=size)
 
 
+IMAGE_EXTENSIONS: Tuple[str, ...] = (".png", ".jpg", ".jpeg")
+
+
+class TileCache:
+    """
+    Resized tiles kept in memory, for processes that render many images.
+
+    Folder listings are read once instead of globbing the folder for every
+    tile, and the least recently used tiles are dropped past max_tiles.
+    Lookups are case-insensitive and resolve like get_or_create_image; names
+    without an image become blank tiles. Cached tiles are shared, so callers
+    must not modify them.
+    """
+
+    def __init__(self, max_tiles: int = 4096):
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self._listings = {}
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def _listing(self, folder_path: Path) -> dict:
+        listing = self._listings.get(folder_path)
+        if listing is None:
+            # Same precedence as find_image: later extensions win
+            listing = {}
+            for ext in IMAGE_EXTENSIONS:
+                for file in Path(folder_path).glob(f"*{ext}"):
+                    listing[file.stem.lower()] = file
+            self._listings[folder_path] = listing
+        return listing
+
+    def get(
+        self, folder_path: Path, image_name: str, size: Tuple[int, int]
+    ) -> Image.Image:
+        key = (str(folder_path), image_name.lower(), tuple(size))
+        with self._lock:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+            image_path = self._listing(key[0]).get(key[1])
+
+        if image_path is None:
+            tile = create_blank_image(size=key[2])
+        else:
+            tile = resize_image(image_path=image_path, size=key[2])
+
+        with self._lock:
+            self._tiles[key] = tile
+            while len(self._tiles) > self.max_tiles:
+                self._tiles.popitem(last=False)
+        return tile
+
+    def stats(self) -> dict:
+        return {"tiles": len(self), "hits": self.hits, "misses": self.misses}
+
+
+GRAY_OVERLAY_COLOR: Tuple[int, int, int] = (60, 60, 60)
+ROW_LABEL_WIDTH: int = 40
+
+
+def row_mask(rows, num_rows: int) -> np.ndarray:
+    """Returns a boolean mask of length num_rows, True for the given row indices."""
+    mask = np.zeros(num_rows, dtype=bool)
+    rows = [row for row in set(rows) if 0 <= row < num_rows]
+    mask[rows] = True
+
+    return mask
+
+
+def shade_rows(
+    arr: np.ndarray,
+    mask: np.ndarray,
+    row_height: int = 94,
+    color: Tuple[int, int, int] = GRAY_OVERLAY_COLOR,
+    alpha: int = 200,
+    x_start: int = 0,
+) -> np.ndarray:
+    """
+    Blends color over the row bands where mask is True, in place, with a single
+    fixed-point alpha blend (same result as compositing an RGBA overlay).
+    Only the color channels are touched; an alpha channel is kept as is.
+    """
+    pixel_mask = np.repeat(np.asarray(mask, dtype=bool), row_height)
+    if not pixel_mask.any():
+        return arr
+
+    rows = arr[: len(pixel_mask)]
+    region = rows[pixel_mask, x_start:, :3].astype(np.uint16)
+    overlay = np.asarray(color, dtype=np.uint16) * alpha
+    rows[pixel_mask, x_start:, :3] = (region * (255 - alpha) + overlay + 127) // 255
+
+    return arr
+
+
+@lru_cache(maxsize=1024)
+def _row_label_glyph(number: int, row_height: int) -> np.ndarray:
+    """Pre-renders the text mask of a row number label."""
+    glyph = Image.new("L", (ROW_LABEL_WIDTH, row_height), 0)
+    ImageDraw.Draw(glyph).text((8, row_height // 3), str(number), fill=255)
+    mask = np.asarray(glyph) > 127
+    mask.setflags(write=False)
+
+    return mask
+
+
+def stamp_row_numbers(
+    arr: np.ndarray, excluded_mask: np.ndarray, row_height: int = 94
+) -> np.ndarray:
+    """
+    Paints, in place, the numbered label at the left of every row: white for
+    kept rows, light gray for excluded ones, with the pre-rendered number on top.
+    """
+    num_rows = len(excluded_mask)
+    labels = arr[: num_rows * row_height, :ROW_LABEL_WIDTH, :3].reshape(
+        num_rows, row_height, -1, 3
+    )
+    width = labels.shape[2]
+
+    labels[...] = np.where(
+        np.asarray(excluded_mask, dtype=bool)[:, None, None, None], 200, 255
+    )
+    glyphs = np.stack([_row_label_glyph(i, row_height) for i in range(num_rows)])
+    labels[glyphs[:, :, :width]] = 0
+
+    return arr
+
+
 def apply_transparent_gray(img, alpha=200):
     """
     Apply a semi-transparent gray overlay to a PIL image.
     """
-    overlay = Image.new("RGBA", img.size, (60, 60, 60, alpha))
-    img_rgba = img.convert("RGBA")
-    blended = Image.alpha_composite(img_rgba, overlay)
+    arr = np.array(img.convert("RGB"))
+    shade_rows(arr, [True], row_height=arr.shape[0], alpha=alpha)
 
-    return blended.convert("RGB")
+    return Image.fromarray(arr)
 
 
 def get_num_rows(image, row_height=94):
@@ -147,42 +307,72 @@ def get_num_rows(image, row_height=94):
 def draw_row_numbers(image, excluded_rows, row_height=94):
     """
     Draw row numbers and gray out excluded rows on the image.
+    Works on the whole sheet at once, so sheets with hundreds of rows are cheap.
     """
-    img = image.copy()
-    draw = ImageDraw.Draw(img)
-    num_rows = get_num_rows(img, row_height)
-    for i in range(num_rows):
-        y0 = i * row_height
-        y1 = y0 + row_height
-        color = (200, 200, 200, 180) if i in excluded_rows else (255, 255, 255, 180)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
 
-        # Draw background for number
-        draw.rectangle([0, y0, 40, y1], fill=color)
-
-        # Draw row number
-        draw.text((8, y0 + row_height // 3), str(i), fill="black")
+    arr = np.array(image)
+    excluded_mask = row_mask(excluded_rows, get_num_rows(image, row_height))
 
-        # Gray out excluded row
-        if i in excluded_rows:
-            draw.rectangle([40, y0, img.width, y1], fill=(180, 180, 180, 120))
+    stamp_row_numbers(arr, excluded_mask, row_height)
+    shade_rows(
+        arr,
+        excluded_mask,
+        row_height,
+        color=(180, 180, 180),
+        alpha=120,
+        x_start=ROW_LABEL_WIDTH,
+    )
 
-    return img
+    return Image.fromarray(arr)
 
 
 def remove_rows(image, excluded_rows, row_height=94):
     """
     Remove specified rows from the image and return the new image.
+    The image may be a PIL image or anything np.asarray accepts.
     """
-    num_rows = get_num_rows(image, row_height)
+    arr = np.asarray(image)
+    num_rows = arr.shape[0] // row_height
+    excluded_rows = set(excluded_rows)
     rows = [i for i in range(num_rows) if i not in excluded_rows]
     if not rows:
         return None
 
-    arr = np.array(image)
-    new_img_rows = [arr[i * row_height : (i + 1) * row_height, :, :] for i in rows]
-    new_arr = np.vstack(new_img_rows)
+    return Image.fromarray(gather_rows(arr, rows, row_height))
 
-    return Image.fromarray(new_arr)
+
+PLAYER_IMAGE_SIZE: Tuple[int, int] = (94, 94)
+PLAYER_THUMB_SIZE: Tuple[int, int] = (32, 32)
+PLAYER_THUMBS_DIRNAME: str = "thumbs"
+PLAYER_ORIGINALS_DIRNAME: str = "originals"
+MAX_UPLOAD_PIXELS: int = 40_000_000
+
+
+def decode_upload(data: bytes) -> Optional[Image.Image]:
+    """
+    Decodes uploaded image bytes into an RGB image, or returns None if they are
+    not a supported image or are too large to be a player picture.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.format not in ("PNG", "JPEG", "MPO") or (
+                img.width * img.height > MAX_UPLOAD_PIXELS
+            ):
+                return None
+            return img.convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def get_player_thumbnail(player_name: str) -> Image.Image:
+    """Returns the stored 32x32 thumbnail of a player, or builds it if missing."""
+    thumb_path = PLAYERS_FOLDER / PLAYER_THUMBS_DIRNAME / f"{player_name}.png"
+    if thumb_path.exists():
+        return Image.open(thumb_path)
+
+    return get_or_create_image(PLAYERS_FOLDER, player_name, PLAYER_THUMB_SIZE)
 
 
 def handle_player_image_upload(
@@ -191,6 +381,8 @@ def handle_player_image_upload(
 ) -> Tuple[str, str]:
     """
     Handles the upload of player image, checking for duplicated images.
+    The upload is decoded once and stored as a canonical 94x94 RGB PNG, a
+    32x32 thumbnail and the untouched original.
     Returns a tuple: (status, message)
     """
     if player_name.strip() == "":
@@ -200,14 +392,28 @@ def handle_player_image_upload(
             ""
         )
 
-    for ext in ["png", "jpg", "jpeg"]:
-        if (PLAYERS_FOLDER / f"{player_name}.{ext}").exists():
-            return "error", "Já existe uma imagem para este jogador!"
+    if find_image(PLAYERS_FOLDER, player_name) is not None:
+        return "error", "Já existe uma imagem para este jogador!"
 
-    extension = uploaded_file.name.split(".")[-1].lower()
-    save_path = PLAYERS_FOLDER / f"{player_name}.{extension}"
+    data = uploaded_file.getvalue()
+    image = decode_upload(data)
+    if image is None:
+        return "error", "Arquivo inválido! Envie uma imagem PNG ou JPG."
+
+    thumbs_folder = PLAYERS_FOLDER / PLAYER_THUMBS_DIRNAME
+    originals_folder = PLAYERS_FOLDER / PLAYER_ORIGINALS_DIRNAME
+    thumbs_folder.mkdir(parents=True, exist_ok=True)
+    originals_folder.mkdir(parents=True, exist_ok=True)
 
-    with open(save_path, "wb") as f:
-        f.write(uploaded_file.getvalue())
+    extension = uploaded_file.name.split(".")[-1].lower()
+    (originals_folder / f"{player_name}.{extension}").write_bytes(data)
+
+    image.resize(PLAYER_THUMB_SIZE, Image.Resampling.LANCZOS).save(
+        thumbs_folder / f"{player_name}.png", format="PNG", optimize=True
+    )
+    # Written last: the canonical image is what makes the player visible
+    image.resize(PLAYER_IMAGE_SIZE, Image.Resampling.LANCZOS).save(
+        PLAYERS_FOLDER / f"{player_name}.png", format="PNG", optimize=True
+    )
 
     return "success", "Imagem adicionada com sucesso!"
@@ -0,0 +1,69 @@
+"""Pure list helpers for team parsing and image composer columns.
+
+Kept free of Streamlit and pandas so the composers and headless workers can
+import them cheaply.
+"""
+
+from collections import defaultdict
+from typing import List
+
+from backend.utils.style_assignment import assign_styles
+
+
+def parse_teams_from_text(text: str):
+    """
+    Parse teams from multiline text. Each line is a team, players separated by commas.
+    Returns a list of teams, each team is a list of player names.
+    """
+    teams = []
+    for line in text.strip().splitlines():
+        team = [player.strip() for player in line.split(",") if player.strip()]
+        if team:
+            teams.append(team)
+
+    return teams
+
+
+def assign_unique_styles_to_players(
+    teams, style_pool, num_styles_per_player, warn_func=None, seed=None
+):
+    """
+    Assign unique random styles to each player (no repeats for the same player).
+    Returns a list of [player, style] pairs.
+    If warn_func is provided, call it with a warning string if num_styles_per_player > len(style_pool).
+    Use assign_styles directly to get the composer columns without re-grouping.
+    """
+    return assign_styles(
+        teams, style_pool, num_styles_per_player, seed=seed, warn_func=warn_func
+    ).pairs()
+
+
+def index_styles_by_player(player_style_pairs):
+    """Groups [player, style] pairs into {player: [style, ...]} in one pass."""
+    player_styles = defaultdict(list)
+    for pair in player_style_pairs:
+        player_styles[pair[0]].append(pair[1])
+
+    return player_styles
+
+
+def build_image_columns(teams, player_style_pairs):
+    """
+    Build columns for the image composer:
+    For single player: [player, style1, style2, ...]
+    For multiple players: [[player1, style1, style2, ...], [player2, style1, style2, ...], ...]
+    """
+    player_styles = index_styles_by_player(player_style_pairs)
+
+    return [[player] + player_styles[player] for team in teams for player in team]
+
+
+def pad_list(
+    lst: List[str], min_len: int = 5, max_len: int = 7, fill_with: str = "no"
+) -> List[str]:
+    """Pads the list with fill_with if it's shorter than max_len."""
+    len_lst = len(lst)
+    if min_len <= len_lst < max_len:
+        lst.extend([fill_with] * (max_len - len_lst))
+
+    return lst
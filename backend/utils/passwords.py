@@ -0,0 +1,60 @@
+"""
+Password hashing and verification with bcrypt.
+
+bcrypt is CPU bound but releases the GIL, so hashing and verification run on
+a small bounded thread pool instead of the Streamlit script thread.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import bcrypt
+
+from backend.utils import GETAMPEDVIVE_BCRYPT_ROUNDS, GETAMPEDVIVE_PASSWORD_WORKERS
+
+BCRYPT_ROUNDS: int = GETAMPEDVIVE_BCRYPT_ROUNDS
+PASSWORD_WORKERS: int = GETAMPEDVIVE_PASSWORD_WORKERS
+VERIFY_TIMEOUT: float = 10.0  # seconds
+
+_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt"
+)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password on the worker pool with the configured cost factor."""
+    return _executor.submit(_hash, password, rounds or BCRYPT_ROUNDS).result()
+
+
+def hash_passwords(passwords: List[str], rounds: Optional[int] = None) -> List[str]:
+    """Hash many passwords concurrently, preserving their order."""
+    rounds = rounds or BCRYPT_ROUNDS
+    return list(_executor.map(_hash, passwords, [rounds] * len(passwords)))
+
+
+def verify_password(
+    password: str, hashed_password: str, timeout: float = VERIFY_TIMEOUT
+) -> bool:
+    """Check a password against its bcrypt hash on the worker pool."""
+    future = _executor.submit(
+        bcrypt.checkpw, password.encode(), hashed_password.encode()
+    )
+    return future.result(timeout=timeout)
+
+
+def get_cost(hashed_password: str) -> Optional[int]:
+    """Return the cost factor encoded in a bcrypt hash ("$2b$12$..."), or None."""
+    parts = hashed_password.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+
+    return int(parts[2])
+
+
+def needs_rehash(hashed_password: str, rounds: Optional[int] = None) -> bool:
+    """Whether the hash was created with a different cost than the configured one."""
+    return get_cost(hashed_password) != (rounds or BCRYPT_ROUNDS)
@@ -0,0 +1,157 @@
+"""
+Incremental PNG encoder: pixel rows are filtered, deflated and written as they
+arrive, so an image never has to exist in memory as a whole, neither as a
+canvas nor as an encoder copy. Used to stream very wide or tall composites
+band by band.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+FILTERS = ("none", "paeth")
+# Raw bytes filtered per numpy pass (at least one row): the Paeth temporaries
+# take about 18 bytes per raw byte, so this bounds them for wide images
+FILTER_CHUNK_BYTES = 64 * 1024
+# Deflate output is gathered into IDAT chunks of about this size
+IDAT_CHUNK_BYTES = 256 * 1024
+
+_FILTER_TYPES = {"none": 0, "paeth": 4}
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(data, zlib.crc32(chunk_type))
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def paeth_filter(rows: np.ndarray, previous: np.ndarray, bpp: int) -> np.ndarray:
+    """
+    PNG Paeth filter of rows (n, stride) uint8, given the raw row above them
+    (zeros for the first image row). Filtering only reads raw bytes, so every
+    row is filtered at once.
+    """
+    raw = rows.astype(np.int16)
+    up = np.empty_like(raw)
+    up[0] = previous
+    up[1:] = raw[:-1]
+    left = np.zeros_like(raw)
+    left[:, bpp:] = raw[:, :-bpp]
+    up_left = np.zeros_like(raw)
+    up_left[:, bpp:] = up[:, :-bpp]
+
+    pa = np.abs(up - up_left)
+    pb = np.abs(left - up_left)
+    pc = np.abs(left + up - 2 * up_left)
+    predictor = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+
+    return (raw - predictor).astype(np.uint8)
+
+
+class PNGStreamWriter:
+    """
+    Writes an 8-bit RGB or RGBA PNG of a known size to fileobj, rows at a
+    time. Call write() with (rows, width, channels) uint8 arrays, top to
+    bottom, then close(); usable as a context manager.
+    """
+
+    def __init__(
+        self,
+        fileobj,
+        width: int,
+        height: int,
+        channels: int = 3,
+        compress_level: int = 6,
+        filter: str = "paeth",
+    ):
+        if channels not in (3, 4):
+            raise ValueError(f"Unsupported channel count: {channels}")
+        if filter not in FILTERS:
+            raise ValueError(
+                f"Unknown PNG filter '{filter}', expected one of {FILTERS}"
+            )
+        if width <= 0 or height <= 0:
+            raise ValueError(f"Invalid PNG size: {width}x{height}")
+
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.filter = filter
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_bytes = 0
+        self._previous = np.zeros(width * channels, dtype=np.int16)
+
+        color_type = 2 if channels == 3 else 6
+        header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+        fileobj.write(PNG_SIGNATURE + _chunk(b"IHDR", header))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def _deflate(self, data: bytes) -> None:
+        if data:
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+        if self._pending_bytes >= IDAT_CHUNK_BYTES:
+            self._flush_idat()
+
+    def _flush_idat(self) -> None:
+        if self._pending:
+            self.fileobj.write(_chunk(b"IDAT", b"".join(self._pending)))
+            self._pending = []
+            self._pending_bytes = 0
+
+    def write(self, rows) -> None:
+        rows = np.asarray(rows, dtype=np.uint8)
+        if rows.ndim != 3 or rows.shape[1:] != (self.width, self.channels):
+            raise ValueError(
+                f"Expected rows of shape (n, {self.width}, {self.channels}), "
+                f"got {rows.shape}"
+            )
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("More rows than the PNG height")
+
+        stride = self.width * self.channels
+        filter_type = _FILTER_TYPES[self.filter]
+        chunk_rows = max(1, FILTER_CHUNK_BYTES // stride)
+        for start in range(0, len(rows), chunk_rows):
+            chunk = rows[start : start + chunk_rows].reshape(-1, stride)
+            if self.filter == "paeth":
+                filtered = paeth_filter(chunk, self._previous, self.channels)
+                self._previous = chunk[-1].astype(np.int16)
+            else:
+                filtered = chunk
+            scanlines = np.empty((len(chunk), stride + 1), dtype=np.uint8)
+            scanlines[:, 0] = filter_type
+            scanlines[:, 1:] = filtered
+            self._deflate(self._compressor.compress(scanlines.tobytes()))
+
+        self.rows_written += len(rows)
+
+    def close(self) -> None:
+        if self._compressor is None:
+            return
+        if self.rows_written != self.height:
+            raise ValueError(
+                f"PNG needs {self.height} rows, only {self.rows_written} were written"
+            )
+        self._deflate(self._compressor.flush())
+        self._flush_idat()
+        self.fileobj.write(_chunk(b"IEND", b""))
+        self._compressor = None
+
+
+def write_png(fileobj, width: int, height: int, bands, **options) -> None:
+    """Streams an iterable of row bands into a PNG of the given size."""
+    channels = options.pop("channels", 3)
+    with PNGStreamWriter(fileobj, width, height, channels, **options) as writer:
+        for band in bands:
+            writer.write(band)
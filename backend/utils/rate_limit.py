@@ -0,0 +1,89 @@
+"""
+In-memory token bucket rate limiting.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Bucket holding up to ``capacity`` tokens, refilled at ``refill_rate`` per second."""
+
+    def __init__(self, capacity: float, refill_rate: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.clock = clock
+        self.tokens = capacity
+        self.updated_at = clock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+        self.updated_at = now
+
+    def available(self) -> float:
+        """Return the number of tokens currently available."""
+        self._refill()
+        return self.tokens
+
+    def consume(self, tokens: float = 1) -> bool:
+        """Take tokens from the bucket. Returns False if there are not enough."""
+        self._refill()
+        if self.tokens < tokens:
+            return False
+
+        self.tokens -= tokens
+        return True
+
+
+class RateLimiter:
+    """Token buckets keyed by an arbitrary string, e.g. a login or an IP.
+
+    At most ``max_keys`` buckets are kept; the least recently used ones are
+    dropped first, which only ever makes the limiter more permissive.
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_rate: float,
+        max_keys: int = 10_000,
+        clock=time.monotonic,
+    ):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.capacity, self.refill_rate, self.clock)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        return bucket
+
+    def allow(self, key) -> bool:
+        """Consume one token for key. Returns False if the key is rate limited."""
+        with self._lock:
+            return self._bucket(key).consume()
+
+    def is_limited(self, key) -> bool:
+        """Whether the next attempt for key would be rejected, without consuming."""
+        with self._lock:
+            if key not in self._buckets:
+                return False
+            return self._buckets[key].available() < 1
+
+    def reset(self, key) -> None:
+        """Forget the bucket of key, e.g. after a successful login."""
+        with self._lock:
+            self._buckets.pop(key, None)
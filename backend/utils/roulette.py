@@ -0,0 +1,289 @@
+"""
+Batch roulette draws for many team sheets at once, reproducible from a seed.
+"""
+
+import hashlib
+import io
+import json
+import secrets
+import zipfile
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from backend.utils.image_utils import roulette_result_rows
+
+
+class TeamDrawSettings:
+    """Roulette settings of one team: fixed rows, eligible rows and draw count."""
+
+    __slots__ = ("fixed_rows", "selectable_rows", "num_accessory_rows")
+
+    def __init__(
+        self,
+        selectable_rows: Sequence[int],
+        num_accessory_rows: int = 1,
+        fixed_rows: Sequence[int] = (),
+    ):
+        self.fixed_rows = list(fixed_rows)
+        self.selectable_rows = list(selectable_rows)
+        self.num_accessory_rows = num_accessory_rows
+
+    def to_dict(self) -> dict:
+        return {
+            "fixed_rows": self.fixed_rows,
+            "selectable_rows": self.selectable_rows,
+            "num_accessory_rows": self.num_accessory_rows,
+        }
+
+
+def new_seed() -> int:
+    """Returns a fresh master seed, small enough to be typed back in the UI."""
+    return secrets.randbits(32)
+
+
+def eligible_rows(settings: TeamDrawSettings, num_rows: int, avatar_row: int = 1):
+    """Rows that can be drawn: selectable, not fixed, not the avatar, inside the sheet."""
+    return sorted(
+        {
+            row
+            for row in settings.selectable_rows
+            if row != (avatar_row - 1)
+            and 0 <= row < num_rows
+            and row not in settings.fixed_rows
+        }
+    )
+
+
+def team_eligible_rows(
+    team_settings: Sequence[TeamDrawSettings],
+    num_rows: Sequence[int],
+    avatar_row: int = 1,
+) -> List[List[int]]:
+    """Eligible rows of every team, checking each can draw its row count."""
+    valid_rows = [
+        eligible_rows(settings, rows, avatar_row)
+        for settings, rows in zip(team_settings, num_rows)
+    ]
+    for team_idx, (settings, rows) in enumerate(zip(team_settings, valid_rows)):
+        if settings.num_accessory_rows < 0 or settings.num_accessory_rows > len(rows):
+            raise ValueError(
+                f"Quantidade de linhas de acessórios inválida para o Time {team_idx + 1}. "
+                "Verifique o número de linhas ou o tamanho da imagem."
+            )
+
+    return valid_rows
+
+
+def candidate_matrix(valid_rows: Sequence[Sequence[int]]) -> np.ndarray:
+    """The eligible rows of every team as a (teams x rows) matrix, -1 padded."""
+    width = max((len(rows) for rows in valid_rows), default=0)
+    candidates = np.full((len(valid_rows), width), -1, dtype=np.int64)
+    for team_idx, rows in enumerate(valid_rows):
+        candidates[team_idx, : len(rows)] = rows
+
+    return candidates
+
+
+def shuffle_candidates(rng, candidates: np.ndarray, trials: Optional[int] = None):
+    """
+    Shuffles the candidate rows of every team: each gets a random key and the
+    rows are sorted by key, padding last, so the first k rows of a team are
+    its draw of k rows. With trials, that many independent batches are
+    shuffled at once into a (trials x teams x rows) array.
+    """
+    shape = candidates.shape if trials is None else (trials, *candidates.shape)
+    keys = rng.random(shape)
+    keys[..., candidates < 0] = np.inf
+    order = np.argsort(keys, axis=-1, kind="stable")
+
+    return np.take_along_axis(np.broadcast_to(candidates, shape), order, axis=-1)
+
+
+def draw_teams(
+    team_settings: Sequence[TeamDrawSettings],
+    num_rows: Sequence[int],
+    seed: Optional[int] = None,
+    avatar_row: int = 1,
+):
+    """
+    Draws the accessory rows of every team in one vectorized pass.
+
+    Each team gets a random key per eligible row and keeps the rows with the
+    smallest keys, so the whole batch is a single argsort over a
+    (teams x rows) matrix. num_rows holds the row count of each team sheet.
+    The same seed and settings always give the same draw.
+
+    Returns (seed, sampled_rows), one list of row indices per team.
+    """
+    if seed is None:
+        seed = new_seed()
+
+    valid_rows = team_eligible_rows(team_settings, num_rows, avatar_row)
+    if not valid_rows:
+        return seed, []
+
+    shuffled = shuffle_candidates(
+        np.random.default_rng(seed), candidate_matrix(valid_rows)
+    )
+    sampled_rows = [
+        shuffled[team_idx, : settings.num_accessory_rows].tolist()
+        for team_idx, settings in enumerate(team_settings)
+    ]
+
+    return seed, sampled_rows
+
+
+def sheet_ids(sheets) -> List[Tuple[str, int]]:
+    """(digest, number of rows) of every DecodedSheet."""
+    return [(sheet.digest, sheet.num_rows) for sheet in sheets]
+
+
+class BatchDrawResult:
+    """
+    The outcome of a batch draw: the seed, the settings and the sampled rows,
+    plus the sheet_ids() of the sheets it was drawn for.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        team_settings: Sequence[TeamDrawSettings],
+        sampled_rows: List[List[int]],
+        avatar_row: int = 1,
+        sheets: Optional[List[Tuple[str, int]]] = None,
+    ):
+        self.seed = seed
+        self.team_settings = list(team_settings)
+        self.sampled_rows = sampled_rows
+        self.avatar_row = avatar_row
+        self.sheets = sheets
+
+    def matches(self, sheets) -> bool:
+        """Whether the result was drawn for exactly these sheets."""
+        if self.sheets is None:
+            return len(sheets) == len(self.sampled_rows)
+        return sheet_ids(sheets) == self.sheets
+
+    def cache_key(self) -> str:
+        """Identifies the result images: same key, same images."""
+        key = json.dumps(
+            [
+                self.seed,
+                self.sheets,
+                [self.result_rows(i) for i in range(len(self.sampled_rows))],
+            ]
+        )
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def result_rows(self, team_idx: int) -> List[int]:
+        """Rows of the result image of a team: avatar, fixed then sampled rows."""
+        return roulette_result_rows(
+            self.sampled_rows[team_idx],
+            self.team_settings[team_idx].fixed_rows,
+            self.avatar_row,
+        )
+
+    def images(self, sheets) -> List[np.ndarray]:
+        """Gathers the result image of every team from its DecodedSheet."""
+        return [sheet.rows(self.result_rows(i)) for i, sheet in enumerate(sheets)]
+
+    def manifest(self) -> dict:
+        return {
+            "seed": self.seed,
+            "avatar_row": self.avatar_row,
+            "teams": [
+                {
+                    "team": i + 1,
+                    "sampled_rows": rows,
+                    **settings.to_dict(),
+                }
+                for i, (settings, rows) in enumerate(
+                    zip(self.team_settings, self.sampled_rows)
+                )
+            ],
+        }
+
+
+def run_batch_draw(
+    sheets,
+    team_settings: Sequence[TeamDrawSettings],
+    seed: Optional[int] = None,
+    avatar_row: int = 1,
+) -> BatchDrawResult:
+    """Draws rows for all the given team sheets and records the seed used."""
+    if len(sheets) != len(team_settings):
+        raise ValueError("Cada time precisa de suas próprias configurações.")
+
+    seed, sampled_rows = draw_teams(
+        team_settings, [sheet.num_rows for sheet in sheets], seed, avatar_row
+    )
+
+    return BatchDrawResult(
+        seed, team_settings, sampled_rows, avatar_row, sheet_ids(sheets)
+    )
+
+
+def contact_sheet(
+    images: Sequence[np.ndarray],
+    columns: int = 4,
+    gap: int = 10,
+    background=(255, 255, 255, 0),
+) -> np.ndarray:
+    """
+    Lays the result images out on a grid, left to right, top to bottom.
+    Images may have different sizes; each grid cell fits the largest one.
+    """
+    if not images:
+        raise ValueError("Nenhuma imagem para montar a folha de contato.")
+
+    images = [np.asarray(img) for img in images]
+    channels = 4 if any(img.ndim == 3 and img.shape[2] == 4 for img in images) else 3
+    columns = max(1, min(columns, len(images)))
+    grid_rows = -(-len(images) // columns)
+    cell_h = max(img.shape[0] for img in images)
+    cell_w = max(img.shape[1] for img in images)
+
+    sheet = np.empty(
+        (
+            grid_rows * cell_h + (grid_rows - 1) * gap,
+            columns * cell_w + (columns - 1) * gap,
+            channels,
+        ),
+        dtype=np.uint8,
+    )
+    sheet[...] = np.asarray(background[:channels], dtype=np.uint8)
+
+    for idx, img in enumerate(images):
+        if img.ndim == 2 or img.shape[2] != channels:
+            mode = "RGBA" if channels == 4 else "RGB"
+            img = np.asarray(Image.fromarray(img).convert(mode))
+        y = (idx // columns) * (cell_h + gap)
+        x = (idx % columns) * (cell_w + gap)
+        sheet[y : y + img.shape[0], x : x + img.shape[1]] = img
+
+    return sheet
+
+
+def _png_bytes(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def results_zip(result: BatchDrawResult, images: Sequence[np.ndarray]) -> bytes:
+    """
+    Packs every team result as a PNG, plus a manifest.json with the seed and
+    settings needed to reproduce the draw.
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for team_idx, img in enumerate(images):
+            zf.writestr(f"time_{team_idx + 1:02d}.png", _png_bytes(img))
+        zf.writestr(
+            "manifest.json",
+            json.dumps(result.manifest(), ensure_ascii=False, indent=2),
+        )
+
+    return buf.getvalue()
@@ -0,0 +1,270 @@
+"""
+Monte Carlo simulation of roulette draws, to check that they are fair.
+
+Trials are drawn with the sampler of draw_teams (roulette.shuffle_candidates),
+vectorized over many trials at once, so the report tests the production draw.
+Only row indices are drawn, never images, so millions of draws take seconds.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.utils.roulette import (
+    TeamDrawSettings,
+    candidate_matrix,
+    new_seed,
+    shuffle_candidates,
+    team_eligible_rows,
+)
+
+# Memory for the arrays of one chunk of trials; the chunk size follows from it
+DEFAULT_CHUNK_BYTES: int = 64 * 1024 * 1024
+# Bytes per (trial, team, row) cell: the float64 keys, the int64 sort order and
+# the shuffled int64 rows, plus the padding mask and bitmask temporaries
+BYTES_PER_CELL: int = 40
+# Draws are compared as int64 bitmasks of the drawn rows
+MAX_SIMULATED_ROWS: int = 63
+
+
+def chi2_sf(stat: float, dof: int) -> float:
+    """
+    Survival function of the chi-square distribution, i.e. the p-value of a
+    chi-square statistic, computed as the regularized upper incomplete gamma
+    function Q(dof / 2, stat / 2).
+    """
+    if dof <= 0:
+        return float("nan")
+    if stat <= 0:
+        return 1.0
+
+    a = dof / 2
+    x = stat / 2
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+
+    if x < a + 1:
+        # Series expansion of the lower incomplete gamma function
+        term = total = 1 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefix))
+
+    # Continued fraction for the upper incomplete gamma function (Lentz)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def identical_draw_probability(
+    rows_a: Sequence[int], k_a: int, rows_b: Sequence[int], k_b: int
+) -> float:
+    """Exact chance that two teams draw the same set of rows."""
+    if k_a != k_b:
+        return 0.0
+    common = len(set(rows_a) & set(rows_b))
+    return math.comb(common, k_a) / (
+        math.comb(len(rows_a), k_a) * math.comb(len(rows_b), k_b)
+    )
+
+
+def chunk_trials(
+    num_teams: int, num_candidates: int, chunk_bytes: int = DEFAULT_CHUNK_BYTES
+) -> int:
+    """Trials per chunk whose arrays fit in about chunk_bytes."""
+    return max(1, chunk_bytes // (BYTES_PER_CELL * max(1, num_teams * num_candidates)))
+
+
+def _draw_chunk(rng, valid_rows, counts, trials):
+    """
+    Draws every team `trials` times. Returns a (trials x teams) matrix holding
+    each drawn set of rows as a bitmask, so equal draws have equal keys.
+    """
+    shuffled = shuffle_candidates(rng, candidate_matrix(valid_rows[0]), trials)
+    keys = np.zeros((trials, len(valid_rows[0])), dtype=np.int64)
+
+    for team_idx, (rows, k) in enumerate(zip(*valid_rows)):
+        if k == 0:
+            continue
+        drawn = shuffled[:, team_idx, :k]
+        counts[team_idx] += np.bincount(drawn.ravel(), minlength=MAX_SIMULATED_ROWS)[
+            rows
+        ]
+        keys[:, team_idx] = (np.int64(1) << drawn).sum(axis=1)
+
+    return keys
+
+
+def _simulate_chunks(valid_rows, chunks):
+    """
+    Runs the given (seed sequence, trials) chunks. valid_rows holds the
+    eligible rows and the draw count of each team. Returns the per-row counts
+    of each team, the identical-draw counts of each team pair and the number
+    of trials in which at least one pair of teams drew the same rows.
+    """
+    rows_by_team, draws = valid_rows
+    counts = [np.zeros(len(rows), dtype=np.int64) for rows in rows_by_team]
+    pairs = [
+        (i, j)
+        for i, j in combinations(range(len(rows_by_team)), 2)
+        if draws[i] == draws[j]
+    ]
+    identical = np.zeros(len(pairs), dtype=np.int64)
+    any_identical = 0
+
+    for seed_seq, trials in chunks:
+        rng = np.random.default_rng(seed_seq)
+        keys = _draw_chunk(rng, valid_rows, counts, trials)
+
+        for pair_idx, (i, j) in enumerate(pairs):
+            identical[pair_idx] += np.count_nonzero(keys[:, i] == keys[:, j])
+
+        # Some pair of teams matched if the sorted keys of a trial repeat
+        keys.sort(axis=1)
+        any_identical += int((keys[:, 1:] == keys[:, :-1]).any(axis=1).sum())
+
+    return counts, dict(zip(pairs, identical.tolist())), any_identical
+
+
+class TeamFairness:
+    """
+    Selection frequencies of the eligible rows of one team, with a uniformity
+    test. Each draw picks num_draws distinct rows, so the row counts are
+    negatively correlated and Pearson's statistic averages n - k instead of
+    n - 1 (n rows, k draws); chi2 is scaled by (n - 1) / (n - k) to follow
+    the chi-square distribution with n - 1 degrees of freedom.
+    """
+
+    def __init__(
+        self, rows: List[int], num_draws: int, counts: np.ndarray, trials: int
+    ):
+        self.rows = rows
+        self.num_draws = num_draws
+        self.counts = counts
+        self.trials = trials
+        self.frequencies = counts / trials
+        self.expected = num_draws / len(rows) if rows else 0.0
+
+        if len(rows) > 1 and 0 < num_draws < len(rows):
+            expected_counts = trials * self.expected
+            pearson = ((counts - expected_counts) ** 2).sum() / expected_counts
+            self.chi2 = float(pearson * (len(rows) - 1) / (len(rows) - num_draws))
+            self.p_value = chi2_sf(self.chi2, len(rows) - 1)
+        else:
+            # Nothing random to test: no draws, or every eligible row is drawn
+            self.chi2 = 0.0
+            self.p_value = 1.0
+
+
+class SimulationReport:
+    """Outcome of simulate_draws."""
+
+    def __init__(
+        self,
+        seed: int,
+        trials: int,
+        teams: List[TeamFairness],
+        identical: Dict[Tuple[int, int], float],
+        identical_exact: Dict[Tuple[int, int], float],
+        any_identical: float,
+    ):
+        self.seed = seed
+        self.trials = trials
+        self.teams = teams
+        self.identical = identical
+        self.identical_exact = identical_exact
+        self.any_identical = any_identical
+
+
+def simulate_draws(
+    team_settings: Sequence[TeamDrawSettings],
+    num_rows: Sequence[int],
+    trials: int = 1_000_000,
+    seed: Optional[int] = None,
+    avatar_row: int = 1,
+    chunk_size: Optional[int] = None,
+    workers: int = 1,
+) -> SimulationReport:
+    """
+    Simulates `trials` batch draws with the given team settings.
+
+    Draws run in chunks of chunk_size trials (by default as many as fit in
+    DEFAULT_CHUNK_BYTES), each with its own child seed of the master seed, so
+    the report only depends on the seed and the chunk size, not on the number
+    of worker processes.
+    """
+    if trials <= 0:
+        raise ValueError("A quantidade de sorteios deve ser maior que zero.")
+    if seed is None:
+        seed = new_seed()
+
+    rows_by_team = team_eligible_rows(team_settings, num_rows, avatar_row)
+    draws = [settings.num_accessory_rows for settings in team_settings]
+    if any(rows and rows[-1] >= MAX_SIMULATED_ROWS for rows in rows_by_team):
+        raise ValueError(
+            f"A simulação suporta até {MAX_SIMULATED_ROWS} linhas por time."
+        )
+    valid_rows = (rows_by_team, draws)
+
+    if chunk_size is None:
+        chunk_size = chunk_trials(
+            len(rows_by_team), max((len(rows) for rows in rows_by_team), default=0)
+        )
+    sizes = [chunk_size] * (trials // chunk_size)
+    if trials % chunk_size:
+        sizes.append(trials % chunk_size)
+    chunks = list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_simulate_chunks, valid_rows, chunks[i::workers])
+                for i in range(workers)
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [_simulate_chunks(valid_rows, chunks)]
+
+    counts = [sum(result[0][i] for result in results) for i in range(len(rows_by_team))]
+    identical = {
+        pair: sum(result[1][pair] for result in results) / trials
+        for pair in results[0][1]
+    }
+    any_identical = sum(result[2] for result in results) / trials
+
+    teams = [
+        TeamFairness(rows, k, counts[i], trials)
+        for i, (rows, k) in enumerate(zip(rows_by_team, draws))
+    ]
+    identical_exact = {
+        (i, j): identical_draw_probability(
+            rows_by_team[i], draws[i], rows_by_team[j], draws[j]
+        )
+        for i, j in identical
+    }
+
+    return SimulationReport(
+        seed, trials, teams, identical, identical_exact, any_identical
+    )
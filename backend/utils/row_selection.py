@@ -0,0 +1,62 @@
+"""
+Row selection canvas for team sheets made of fixed-height rows.
+"""
+
+import io
+from typing import Iterable, Set
+
+import numpy as np
+from PIL import Image
+
+from backend.utils.image_utils import draw_row_numbers, row_mask, shade_rows
+
+
+class RowSelectionCanvas:
+    """
+    A team sheet rendered once with row numbers, on which excluded rows are
+    grayed out. Changing the selection only re-renders the rows whose state
+    changed, and the PNG is only re-encoded after a change.
+    """
+
+    def __init__(self, image, row_height: int = 94):
+        """image may be a PIL image, an array or a DecodedSheet."""
+        if not isinstance(image, Image.Image):
+            image = Image.fromarray(np.asarray(image))
+
+        self.row_height = row_height
+        self.num_rows = image.height // row_height
+        self.base = np.array(draw_row_numbers(image, [], row_height))
+        self.canvas = self.base.copy()
+        self.excluded_rows: Set[int] = set()
+        self._encoded = None
+
+    def update(self, excluded_rows: Iterable[int]) -> Set[int]:
+        """Apply a new set of excluded rows. Returns the rows that changed."""
+        excluded_rows = {row for row in excluded_rows if 0 <= row < self.num_rows}
+        changed = excluded_rows ^ self.excluded_rows
+        if not changed:
+            return changed
+
+        # Restore the changed rows, then shade the newly excluded ones
+        pixel_mask = np.repeat(row_mask(changed, self.num_rows), self.row_height)
+        height = len(pixel_mask)
+        self.canvas[:height][pixel_mask] = self.base[:height][pixel_mask]
+        shade_rows(
+            self.canvas,
+            row_mask(changed & excluded_rows, self.num_rows),
+            self.row_height,
+        )
+
+        self.excluded_rows = excluded_rows
+        self._encoded = None
+
+        return changed
+
+    def to_png(self) -> bytes:
+        """Returns the canvas encoded as PNG, reusing the last encoding if unchanged."""
+        if self._encoded is None:
+            buf = io.BytesIO()
+            Image.fromarray(self.canvas).save(buf, format="PNG")
+            self._encoded = buf.getvalue()
+
+        return self._encoded
@@ -0,0 +1,127 @@
+"""
+In-memory search-as-you-type index over catalog entries (accessories,
+players, styles), so pickers only send the top matches to the browser
+instead of the whole catalog.
+"""
+
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+MAX_PREFIX_LENGTH = 12
+DEFAULT_LIMIT = 20
+
+# Unicode letters and digits; "_" splits tokens like any punctuation
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def _fold(text: str) -> str:
+    """Casefolded text without accents, e.g. "Poção Mágica" -> "pocao magica"."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Casefolded alphanumeric tokens with accents stripped; '_', apostrophes and
+    other punctuation split tokens.
+    """
+    return _TOKEN_RE.findall(_fold(text))
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of the padded, normalized text."""
+    text = " " + " ".join(tokenize(text)) + " "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Token prefix index with a trigram fallback for misspelled queries.
+
+    Each entry is a key (what the picker returns, e.g. an accessory ID) plus
+    the texts it can be found by (ID, name, year). Every prefix of every token
+    maps to the entries containing it, so a lookup is one dict access per
+    query token and a set intersection.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, Sequence[str]]]):
+        self.keys: List[str] = []
+        self.labels: Dict[str, str] = {}
+        self._prefixes = defaultdict(set)
+        self._trigrams = defaultdict(set)
+        self._texts: List[str] = []
+
+        for position, (key, texts) in enumerate(entries):
+            key = str(key)
+            texts = [str(text).strip() for text in texts if str(text).strip()]
+            self.keys.append(key)
+            self.labels[key] = texts[1] if len(texts) > 1 else key
+            self._texts.append(_fold(" ".join([key, *texts])))
+
+            for token in {t for text in [key, *texts] for t in tokenize(text)}:
+                for length in range(1, min(len(token), MAX_PREFIX_LENGTH) + 1):
+                    self._prefixes[token[:length]].add(position)
+            for gram in trigrams(" ".join([key, *texts])):
+                self._trigrams[gram].add(position)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rank(self, position: int, query: str) -> tuple:
+        key = _fold(self.keys[position])
+        label = _fold(self.labels[self.keys[position]])
+        return (
+            key != query and label != query,
+            not (key.startswith(query) or label.startswith(query)),
+            len(label),
+            label,
+        )
+
+    def _prefix_matches(self, tokens: List[str]) -> set:
+        matches = None
+        for token in tokens:
+            found = self._prefixes.get(token[:MAX_PREFIX_LENGTH], set())
+            if len(token) > MAX_PREFIX_LENGTH:
+                found = {p for p in found if token in self._texts[p]}
+            matches = found if matches is None else matches & found
+            if not matches:
+                return set()
+        return matches
+
+    def _fuzzy_matches(self, query: str, limit: int) -> List[int]:
+        query_grams = trigrams(query)
+        scores = defaultdict(int)
+        for gram in query_grams:
+            for position in self._trigrams.get(gram, ()):
+                scores[position] += 1
+        # Require a third of the query trigrams, so noise does not match
+        minimum = max(1, len(query_grams) // 3)
+        ranked = sorted(
+            (position for position, score in scores.items() if score >= minimum),
+            key=lambda position: (-scores[position], self._rank(position, query)),
+        )
+        return ranked[:limit]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> List[str]:
+        """
+        Keys of the best matches for query, at most limit. Every query token
+        must prefix some token of the entry; if nothing matches, entries
+        sharing the most trigrams with the query are returned instead.
+        An empty query returns the first entries in catalog order.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return self.keys[:limit]
+
+        normalized = " ".join(tokens)
+        matches = self._prefix_matches(tokens)
+        if matches:
+            ranked = sorted(matches, key=lambda p: self._rank(p, normalized))
+        else:
+            ranked = self._fuzzy_matches(normalized, limit)
+
+        return [self.keys[position] for position in ranked[:limit]]
+
+    def label(self, key: str) -> str:
+        return self.labels.get(key, key)
@@ -0,0 +1,175 @@
+"""
+HMAC-signed, expiring session tokens.
+
+A token is ``<payload>.<signature>``, both base64url encoded, where payload is
+the JSON claims (``sub``, ``role``, ``iat``, ``exp``, ``jti``) and signature is
+HMAC-SHA256 of the encoded payload. Verifying a token only needs the secret
+and the in-memory revocation list, so it never touches the database.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import secrets
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The cookie carrying the token is written from JavaScript and cannot be
+# HttpOnly, so tokens are kept short-lived
+SESSION_TTL: int = 12 * 60 * 60  # seconds
+REVOCATION_REFRESH_INTERVAL: int = 5 * 60  # seconds
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class RevocationList:
+    """Revoked token ids (jti) kept in memory until they would have expired.
+
+    ``load`` returns the (jti, expires_at) pairs revoked by any process and is
+    called lazily, at most once every ``refresh_interval`` seconds. ``persist``
+    stores a new revocation so that it survives restarts.
+    """
+
+    def __init__(
+        self,
+        load: Optional[Callable[[], Iterable[Tuple[str, float]]]] = None,
+        persist: Optional[Callable[[str, float], None]] = None,
+        refresh_interval: float = REVOCATION_REFRESH_INTERVAL,
+        clock=time.time,
+    ):
+        self.load = load
+        self.persist = persist
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        self._revoked: Dict[str, float] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self, now):
+        """Reload the revocations when due. The load runs outside the lock, so
+        concurrent checks keep using the current list meanwhile."""
+        if self.load is None:
+            return
+
+        with self._lock:
+            if (
+                self._loaded_at is not None
+                and now - self._loaded_at < self.refresh_interval
+            ):
+                return
+            # Claimed before loading, so only one caller reloads at a time
+            self._loaded_at = now
+
+        try:
+            loaded = list(self.load())
+        except Exception as e:
+            logger.warning(f"Could not load revoked session tokens: {e}")
+            loaded = []
+
+        with self._lock:
+            revoked = dict(self._revoked)
+            revoked.update(loaded)
+            self._revoked = {
+                jti: expires_at
+                for jti, expires_at in revoked.items()
+                if expires_at > now
+            }
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+        if self.persist is not None:
+            try:
+                self.persist(jti, expires_at)
+            except Exception as e:
+                logger.warning(f"Could not persist revoked session token: {e}")
+
+    def is_revoked(self, jti: str) -> bool:
+        self._refresh(self.clock())
+        return jti in self._revoked
+
+
+class SessionTokenSigner:
+    """Issues and verifies session tokens signed with a shared secret."""
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        ttl: int = SESSION_TTL,
+        revocations: Optional[RevocationList] = None,
+        clock=time.time,
+    ):
+        if not secret:
+            logger.warning(
+                "No session secret configured; sessions will not survive a restart."
+            )
+            secret = secrets.token_hex(32)
+
+        self._key = secret.encode()
+        self.ttl = ttl
+        self.revocations = revocations or RevocationList()
+        self.clock = clock
+
+    def _sign(self, payload: str) -> str:
+        digest = hmac.new(self._key, payload.encode(), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    def issue(self, login: str, role: str) -> str:
+        """Return a signed token for login carrying its role claim."""
+        now = int(self.clock())
+        claims = {
+            "sub": login,
+            "role": role,
+            "iat": now,
+            "exp": now + self.ttl,
+            "jti": secrets.token_urlsafe(16),
+        }
+        payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def _decode(self, token: str) -> Optional[dict]:
+        """Return the claims of a correctly signed token, expired or not."""
+        try:
+            payload, signature = token.split(".")
+        except (AttributeError, ValueError):
+            return None
+
+        if not hmac.compare_digest(signature.encode(), self._sign(payload).encode()):
+            return None
+
+        try:
+            return json.loads(_b64decode(payload))
+        except ValueError:
+            return None
+
+    def verify(self, token: str) -> Optional[dict]:
+        """Return the claims of a valid, unexpired and unrevoked token, else None."""
+        claims = self._decode(token)
+        if claims is None:
+            return None
+
+        if claims.get("exp", 0) <= self.clock():
+            return None
+
+        if self.revocations.is_revoked(claims.get("jti")):
+            return None
+
+        return claims
+
+    def revoke(self, token: str) -> None:
+        """Revoke a token server-side so that verify rejects it from now on."""
+        claims = self._decode(token)
+        if claims is not None:
+            self.revocations.revoke(claims["jti"], claims["exp"])
@@ -0,0 +1,168 @@
+"""
+Random style assignment for whole events, drawn with NumPy in one batch.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.utils.roulette import new_seed
+
+STYLE_VERSIONS = ("A", "B")
+
+
+def _category_ids(style_pool: Sequence[str], categories: Optional[Dict]):
+    """Category index of every style of the pool; uncategorized styles share one."""
+    if not categories:
+        return np.zeros(len(style_pool), dtype=np.int64)
+
+    category_of = {
+        style: idx for idx, styles in enumerate(categories.values()) for style in styles
+    }
+    other = len(categories)
+    ids = [category_of.get(style, other) for style in style_pool]
+    # Only categories present in the pool take part in the round-robin
+    return np.unique(ids, return_inverse=True)[1].astype(np.int64)
+
+
+def _permutations(rng, num_perms: int, category_ids: np.ndarray, offsets=None):
+    """
+    Returns num_perms random permutations of the pool, one per row.
+
+    With offsets, each permutation interleaves the categories round-robin,
+    starting at category offsets[row], so any window of consecutive styles
+    uses every category as evenly as possible.
+    """
+    keys = rng.random((num_perms, len(category_ids)))
+    if offsets is None:
+        return np.argsort(keys, axis=1)
+
+    num_categories = int(category_ids.max()) + 1
+    # Rank of each style inside its category, in random order
+    grouped = np.argsort(category_ids + keys, axis=1)
+    starts = np.searchsorted(np.sort(category_ids), np.arange(num_categories))
+    ranks = np.empty_like(grouped)
+    np.put_along_axis(
+        ranks,
+        grouped,
+        np.arange(len(category_ids)) - starts[category_ids[grouped]],
+        axis=1,
+    )
+
+    turn = (category_ids - np.asarray(offsets)[:, None]) % num_categories
+    return np.argsort(ranks * num_categories + turn, axis=1, kind="stable")
+
+
+class StyleAssignment:
+    """
+    Styles drawn for every player of every team. style_idx and versions hold,
+    for each player in team order, the pool index and version of each style.
+    """
+
+    def __init__(
+        self,
+        seed: int,
+        teams: List[List[str]],
+        style_pool: Sequence[str],
+        style_idx: np.ndarray,
+        versions: np.ndarray,
+    ):
+        self.seed = seed
+        self.teams = teams
+        self.style_pool = list(style_pool)
+        self.style_idx = style_idx
+        self.versions = versions
+
+        names = np.array(self.style_pool, dtype=object)
+        suffixes = np.array(STYLE_VERSIONS, dtype=object)
+        self.style_names = (names[style_idx] + suffixes[versions]).tolist()
+
+        bounds = np.cumsum([0] + [len(team) for team in teams])
+        self._team_bounds = list(zip(bounds[:-1], bounds[1:]))
+
+    def team_columns(self, team_idx: int) -> List[List[str]]:
+        """Columns of one team for the image composer: [player, style1, ...]."""
+        start, end = self._team_bounds[team_idx]
+        return [
+            [player] + styles
+            for player, styles in zip(self.teams[team_idx], self.style_names[start:end])
+        ]
+
+    def columns(self) -> List[List[str]]:
+        """Columns of every player of every team, in team order."""
+        return [
+            column
+            for team_idx in range(len(self.teams))
+            for column in self.team_columns(team_idx)
+        ]
+
+    def pairs(self) -> List[List[str]]:
+        """Flat [player, style] pairs, as returned by assign_unique_styles_to_players."""
+        return [[column[0], style] for column in self.columns() for style in column[1:]]
+
+
+def assign_styles(
+    teams: List[List[str]],
+    style_pool: Sequence[str],
+    num_styles_per_player: int,
+    seed: Optional[int] = None,
+    unique_within_team: bool = False,
+    categories: Optional[Dict[str, List[str]]] = None,
+    balance_categories: bool = False,
+    warn_func: Optional[Callable[[str], None]] = None,
+) -> StyleAssignment:
+    """
+    Draws num_styles_per_player distinct styles for every player at once.
+
+    unique_within_team: no style is repeated inside a team, as long as the
+        pool is large enough; otherwise styles are reused across players.
+    balance_categories: the styles of each player (and of the event overall)
+        are spread evenly over the categories, given as {category: styles}.
+
+    The same seed, teams and settings always give the same assignment.
+    """
+    if not style_pool:
+        raise ValueError("Nenhum estilo disponível para sortear.")
+    if seed is None:
+        seed = new_seed()
+
+    pool_size = len(style_pool)
+    if num_styles_per_player > pool_size and warn_func:
+        warn_func(
+            f"Número de estilos por jogador ({num_styles_per_player}) excede o número de estilos disponíveis ({pool_size}). Serão usados apenas estilos únicos."
+        )
+    k = min(num_styles_per_player, pool_size)
+
+    team_sizes = np.array([len(team) for team in teams], dtype=np.int64)
+    num_players = int(team_sizes.sum())
+    rng = np.random.default_rng(seed)
+    category_ids = _category_ids(style_pool, categories)
+
+    if unique_within_team:
+        # One permutation per team, split in consecutive chunks of k styles
+        if warn_func and (team_sizes * k > pool_size).any():
+            warn_func(
+                "Não há estilos suficientes para que todos os jogadores de um time "
+                "tenham estilos diferentes. Alguns estilos serão repetidos."
+            )
+        row_of_player = np.repeat(np.arange(len(teams)), team_sizes)
+        first_player = np.cumsum(team_sizes) - team_sizes
+        slot_of_player = np.arange(num_players) - first_player[row_of_player]
+        styles_before_row = first_player * k
+    else:
+        # One permutation per player
+        row_of_player = np.arange(num_players)
+        slot_of_player = np.zeros(num_players, dtype=np.int64)
+        styles_before_row = row_of_player * k
+
+    offsets = None
+    if balance_categories:
+        # Continue the round-robin where the previous row stopped
+        offsets = styles_before_row % (int(category_ids.max()) + 1)
+
+    perms = _permutations(rng, len(styles_before_row), category_ids, offsets)
+    positions = (slot_of_player[:, None] * k + np.arange(k)) % pool_size
+    style_idx = perms[row_of_player[:, None], positions]
+    versions = rng.integers(0, len(STYLE_VERSIONS), size=(num_players, k))
+
+    return StyleAssignment(seed, teams, style_pool, style_idx, versions)
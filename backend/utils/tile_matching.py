@@ -0,0 +1,237 @@
+"""
+Reverse lookup of team sheets: recognizes the player and accessory tiles of an
+uploaded sheet by nearest-neighbour search over downsampled tile features.
+
+A sheet is a grid of 94x94 tiles, one column per player: the player picture
+on the first row and its accessories below, as built by the image composers.
+"""
+
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+TILE_SIZE: int = 94
+FEATURE_SIZE: Tuple[int, int] = (16, 16)
+# Mean squared distance (pixels in 0..1) above which a tile is left unrecognized
+MAX_MATCH_DISTANCE: float = 0.01
+# Placeholder tiles (missing or "no" images, black fill below short columns)
+# are recognized but never reported
+BLANK_NAMES = ("", "no")
+BLANK_COLORS = ((255, 255, 255), (0, 0, 0))
+
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def tile_features(tiles) -> np.ndarray:
+    """
+    Feature vectors of a batch of RGB tiles of shape (n, h, w, 3): each tile
+    downsampled to FEATURE_SIZE with a box filter, flattened, in 0..1.
+    """
+    tiles = np.asarray(tiles)
+    features = np.empty((len(tiles), FEATURE_SIZE[0] * FEATURE_SIZE[1] * 3), np.float32)
+    for i, tile in enumerate(tiles):
+        small = Image.fromarray(tile).resize(FEATURE_SIZE, Image.Resampling.BOX)
+        features[i] = np.asarray(small, dtype=np.float32).ravel()
+
+    return features / 255
+
+
+def folder_fingerprint(folder: Path) -> Tuple[Tuple[str, int, int], ...]:
+    """Sorted (file name, size, mtime in ns) of every image of folder."""
+    fingerprint = []
+    for file in sorted(Path(folder).iterdir()):
+        if file.suffix.lower() not in _IMAGE_EXTENSIONS:
+            continue
+        stat = file.stat()
+        fingerprint.append((file.name, stat.st_size, stat.st_mtime_ns))
+
+    return tuple(fingerprint)
+
+
+def _as_tile(image: Image.Image) -> np.ndarray:
+    """Renders an asset the way the composers do: RGB, resized to a tile."""
+    return np.asarray(image.convert("RGB").resize((TILE_SIZE, TILE_SIZE)))
+
+
+class TileIndex:
+    """
+    Feature vectors of known tiles, searched with one matrix product.
+    fingerprint is the folder_fingerprint of the folder the index was built
+    from, if any.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        features: np.ndarray,
+        fingerprint: Tuple[Tuple[str, int, int], ...] = (),
+    ):
+        self.names = list(names)
+        self.features = np.ascontiguousarray(features, dtype=np.float32)
+        self.sq_norms = (self.features**2).sum(axis=1)
+        self.fingerprint = tuple(fingerprint)
+
+    def __len__(self):
+        return len(self.names)
+
+    @classmethod
+    def from_folder(cls, folder: Path) -> "TileIndex":
+        """Indexes every image of folder (non recursive), plus the blank tiles."""
+        fingerprint = folder_fingerprint(folder)
+        names = [""] * len(BLANK_COLORS)
+        tiles = [
+            np.full((TILE_SIZE, TILE_SIZE, 3), color, dtype=np.uint8)
+            for color in BLANK_COLORS
+        ]
+        for file_name, _, _ in fingerprint:
+            file = Path(folder) / file_name
+            try:
+                with Image.open(file) as img:
+                    tiles.append(_as_tile(img))
+            except OSError:
+                continue
+            names.append(file.stem)
+
+        return cls(names, tile_features(np.stack(tiles)), fingerprint)
+
+    def save(self, path: Path) -> None:
+        files, sizes, mtimes = zip(*self.fingerprint) if self.fingerprint else ((),) * 3
+        np.savez_compressed(
+            path,
+            names=np.array(self.names),
+            features=self.features,
+            files=np.array(files, dtype=str),
+            sizes=np.array(sizes, dtype=np.int64),
+            mtimes=np.array(mtimes, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "TileIndex":
+        with np.load(path) as data:
+            fingerprint = ()
+            if "files" in data:
+                fingerprint = zip(
+                    data["files"].tolist(),
+                    data["sizes"].tolist(),
+                    data["mtimes"].tolist(),
+                )
+            return cls(data["names"].tolist(), data["features"], fingerprint)
+
+    def search(self, features: np.ndarray):
+        """
+        Nearest known tile of each feature vector.
+        Returns (indices, mean squared distances).
+        """
+        features = np.asarray(features, dtype=np.float32)
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, for all pairs at once
+        distances = (
+            (features**2).sum(axis=1)[:, None]
+            + self.sq_norms[None, :]
+            - 2 * features @ self.features.T
+        )
+        best = distances.argmin(axis=1)
+        best_distances = np.maximum(distances[np.arange(len(best)), best], 0)
+
+        return best, best_distances / features.shape[1]
+
+
+def load_or_build_index(folder: Path, cache_path: Optional[Path] = None) -> TileIndex:
+    """
+    Returns the index of folder, reusing cache_path while it was built from
+    the same image files (names, sizes and mtimes). The folder mtime alone
+    misses files replaced in place.
+    """
+    if cache_path is not None and cache_path.exists():
+        try:
+            cached = TileIndex.load(cache_path)
+        except (OSError, ValueError, KeyError):
+            cached = None
+        if cached is not None and cached.fingerprint == folder_fingerprint(folder):
+            return cached
+
+    index = TileIndex.from_folder(folder)
+    if cache_path is not None:
+        index.save(cache_path)
+
+    return index
+
+
+def slice_sheet(sheet, tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Slices an RGB sheet into a (rows, columns, tile, tile, 3) view of its tiles.
+    Partial tiles at the right and bottom edges are ignored.
+    """
+    arr = np.asarray(sheet)[..., :3]
+    rows = arr.shape[0] // tile_size
+    cols = arr.shape[1] // tile_size
+    arr = arr[: rows * tile_size, : cols * tile_size]
+
+    return arr.reshape(rows, tile_size, cols, tile_size, 3).swapaxes(1, 2)
+
+
+class RecognizedColumn:
+    """Player and accessories recognized in one column of a sheet."""
+
+    __slots__ = ("player", "accessories", "unknown")
+
+    def __init__(self, player: Optional[str], accessories: List[str], unknown: int):
+        self.player = player
+        self.accessories = accessories
+        self.unknown = unknown
+
+    def to_line(self) -> str:
+        return ",".join([self.player or "?"] + self.accessories)
+
+
+def recognize_sheet(
+    sheet,
+    player_index: TileIndex,
+    accessory_index: TileIndex,
+    max_distance: float = MAX_MATCH_DISTANCE,
+) -> List[RecognizedColumn]:
+    """
+    Recognizes every column of a team sheet. Placeholder tiles are skipped and
+    tiles with no close enough match are counted as unknown.
+    """
+    tiles = slice_sheet(sheet)
+    num_rows, num_cols = tiles.shape[:2]
+    if num_rows == 0 or num_cols == 0:
+        return []
+
+    player_idx, player_dist = player_index.search(tile_features(tiles[0]))
+
+    accessory_tiles = tiles[1:].reshape(-1, TILE_SIZE, TILE_SIZE, 3)
+    acc_idx, acc_dist = accessory_index.search(tile_features(accessory_tiles))
+    acc_idx = acc_idx.reshape(num_rows - 1, num_cols)
+    acc_dist = acc_dist.reshape(num_rows - 1, num_cols)
+
+    columns = []
+    for col in range(num_cols):
+        player = None
+        if player_dist[col] <= max_distance:
+            name = player_index.names[player_idx[col]]
+            player = None if name in BLANK_NAMES else name
+
+        accessories = []
+        unknown = 0 if player is not None else 1
+        for row in range(num_rows - 1):
+            if acc_dist[row, col] > max_distance:
+                unknown += 1
+                continue
+            name = accessory_index.names[acc_idx[row, col]]
+            if name not in BLANK_NAMES:
+                accessories.append(name)
+
+        if player is None and not accessories:
+            # Empty column, e.g. padding of a narrow sheet
+            continue
+        columns.append(RecognizedColumn(player, accessories, unknown))
+
+    return columns
+
+
+def columns_to_text(columns: Sequence[RecognizedColumn]) -> str:
+    """Tournament input text: one 'player,id1,id2,...' line per column."""
+    return "\n".join(column.to_line() for column in columns)
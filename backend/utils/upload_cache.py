@@ -0,0 +1,120 @@
+"""
+Decode-once cache for uploaded team sheets, keyed by the uploaded content hash.
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from backend.utils.image_utils import gather_rows
+
+DEFAULT_UPLOAD_CACHE_BYTES: int = 128 * 1024 * 1024
+
+
+class DecodedSheet:
+    """
+    A decoded team sheet: a read-only, C-contiguous pixel array plus its row
+    slicing. Supports np.asarray(sheet), so it can be passed anywhere an image
+    array is expected.
+    """
+
+    __slots__ = ("digest", "array", "row_height", "num_rows", "row_offsets")
+
+    def __init__(self, digest: str, array: np.ndarray, row_height: int = 94):
+        array = np.ascontiguousarray(array)
+        array.setflags(write=False)
+
+        self.digest = digest
+        self.array = array
+        self.row_height = row_height
+        self.num_rows = array.shape[0] // row_height
+        self.row_offsets = np.arange(self.num_rows) * row_height
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.array
+        return self.array.astype(dtype)
+
+    @property
+    def nbytes(self) -> int:
+        return self.array.nbytes
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    def row(self, index: int) -> np.ndarray:
+        """Returns a view of one row band."""
+        start = self.row_offsets[index]
+        return self.array[start : start + self.row_height]
+
+    def rows(self, indices) -> np.ndarray:
+        """Returns the given row bands stacked in one gather."""
+        return gather_rows(self.array, indices, self.row_height)
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.array)
+
+
+def decode_sheet(
+    data: bytes, mode: str = "RGBA", row_height: int = 94, digest: str = None
+):
+    """Decodes uploaded image bytes into a DecodedSheet."""
+    digest = digest or hashlib.sha256(data).hexdigest()
+    with Image.open(io.BytesIO(data)) as img:
+        array = np.asarray(img.convert(mode))
+
+    return DecodedSheet(digest, array, row_height)
+
+
+class UploadCache:
+    """
+    LRU cache of decoded sheets keyed by (content hash, mode, row height) and
+    bounded by the total size of the decoded pixels.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_UPLOAD_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def get(self, data: bytes, mode: str = "RGBA", row_height: int = 94):
+        """Returns the decoded sheet for the given bytes, decoding them on a miss."""
+        digest = hashlib.sha256(data).hexdigest()
+        key = (digest, mode, row_height)
+
+        with self._lock:
+            sheet = self._entries.get(key)
+            if sheet is not None:
+                self._entries.move_to_end(key)
+                return sheet
+
+        sheet = decode_sheet(data, mode, row_height, digest)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = sheet
+                self._size += sheet.nbytes
+
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.nbytes
+
+        return sheet
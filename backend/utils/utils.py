@@ -1,98 +1,27 @@
-"""Utility functions for list manipulation and other general-purpose operations."""
+"""Streamlit helpers shared by the pages: catalogs, uploads, pickers and downloads.
+
+Pure helpers that do not need Streamlit live in backend.utils.list_utils.
+"""
 
 import os
-import random
-from collections import defaultdict
-from typing import List
+from pathlib import Path
 
 import pandas as pd
 import streamlit as st
 
-from backend.utils import PLAYERS_FOLDER, STYLES_FOLDER
-
-
-def parse_teams_from_text(text: str):
-    """
-    Parse teams from multiline text. Each line is a team, players separated by commas.
-    Returns a list of teams, each team is a list of player names.
-    """
-    teams = []
-    for line in text.strip().splitlines():
-        team = [player.strip() for player in line.split(",") if player.strip()]
-        if team:
-            teams.append(team)
-
-    return teams
-
-
-def assign_unique_styles_to_players(
-    teams, style_pool, num_styles_per_player, warn_func=None
-):
-    """
-    Assign unique random styles to each player (no repeats for the same player).
-    Returns a list of [player, style] pairs.
-    If warn_func is provided, call it with a warning string if num_styles_per_player > len(style_pool).
-    """
-    player_style_pairs = []
-    for team in teams:
-        for player in team:
-            if num_styles_per_player > len(style_pool):
-                if warn_func:
-                    warn_func(
-                        f"Número de estilos por jogador ({num_styles_per_player}) excede o número de estilos disponíveis ({len(style_pool)}). Serão usados apenas estilos únicos."
-                    )
-                styles = random.sample(style_pool, len(style_pool))
-                styles = styles[:num_styles_per_player]
-            else:
-                styles = random.sample(style_pool, num_styles_per_player)
-            for style in styles:
-                version = random.choice(["A", "B"])
-                style_name = f"{style}{version}"
-                player_style_pairs.append([player, style_name])
-
-    return player_style_pairs
-
-
-def build_image_columns(teams, player_style_pairs):
-    """
-    Build columns for the image composer:
-    For single player: [player, style1, style2, ...]
-    For multiple players: [[player1, style1, style2, ...], [player2, style1, style2, ...], ...]
-    """
-    columns = []
-    if len(teams) == 1 and len(teams[0]) == 1:
-        # Single player
-        player = teams[0][0]
-        player_styles = [pair[1] for pair in player_style_pairs if pair[0] == player]
-        columns = [[player] + player_styles]
-    else:
-        # Multiple players
-        player_styles_dict = defaultdict(list)
-        for pair in player_style_pairs:
-            player_styles_dict[pair[0]].append(pair[1])
-        for team in teams:
-            for player in team:
-                columns.append([player] + player_styles_dict[player])
-
-    return columns
-
-
-def pad_list(
-    lst: List[str], min_len: int = 5, max_len: int = 7, fill_with: str = "no"
-) -> List[str]:
-    """Pads the list with fill_with if it's shorter than max_len."""
-    len_lst = len(lst)
-    if min_len <= len_lst < max_len:
-        lst.extend([fill_with] * (max_len - len_lst))
-
-    return lst
+from backend.utils import ACCS_BY_YEAR_FILE, PLAYERS_FOLDER, STYLES_FOLDER
+from backend.utils.encoders import encode_many
+from backend.utils.export import EXPORT_FORMATS, SessionExport, export_to_tempfile
+from backend.utils.search_index import DEFAULT_LIMIT, SearchIndex
+from backend.utils.upload_cache import UploadCache
 
 
 def load_players_df():
+    PLAYERS_FOLDER.mkdir(parents=True, exist_ok=True)
     player_files = []
     for file in os.listdir(PLAYERS_FOLDER):
-        if file.endswith(".png") or file.endswith(".jpg"):
-            name = file.replace(".png", "").replace(".jpg", "")
+        if Path(file).suffix.lower() in {".png", ".jpg", ".jpeg"}:
+            name = Path(file).stem
             if name and name != "no":
                 player_files.append(name)
 
@@ -105,8 +34,14 @@ def get_players_df():
     return load_players_df()
 
 
+def invalidate_players_catalog():
+    """Drops the cached player list so new uploads show up right away."""
+    get_players_df.clear()
+
+
 @st.cache_data
 def get_styles_df():
+    STYLES_FOLDER.mkdir(parents=True, exist_ok=True)
     style_files = []
     for file in os.listdir(STYLES_FOLDER):
         if file.endswith(".png") or file.endswith(".jpg"):
@@ -118,6 +53,201 @@ def get_styles_df():
     return styles_df.sort_values("Name")
 
 
+def get_upload_cache() -> UploadCache:
+    """Returns the decoded uploads cache of the current Streamlit session."""
+    if "upload_cache" not in st.session_state:
+        st.session_state["upload_cache"] = UploadCache()
+
+    return st.session_state["upload_cache"]
+
+
+def ingest_upload(uploaded_file, mode: str = "RGBA", row_height: int = 94):
+    """
+    Decodes an uploaded team sheet once per content hash and session.
+    Returns a DecodedSheet, or None if nothing was uploaded.
+    """
+    if uploaded_file is None:
+        return None
+
+    return get_upload_cache().get(uploaded_file.getvalue(), mode, row_height)
+
+
+ENCODER_PRESETS = {
+    "PNG otimizado": ("PNG", {"optimize": True}),
+    "PNG com paleta (256 cores)": ("PNG", {"palette_colors": 256}),
+    "WebP sem perdas": ("WEBP", {"lossless": True}),
+    "WebP": ("WEBP", {"quality": 80}),
+    "JPEG": ("JPEG", {"quality": 90}),
+    "JPEG com tamanho máximo": ("JPEG", {}),
+}
+
+
+def select_encoder(key: str, default: str = "PNG otimizado"):
+    """Lets the user pick the output encoder. Returns (format, options)."""
+    with st.sidebar:
+        preset = st.selectbox(
+            "Formato de saída das imagens",
+            list(ENCODER_PRESETS),
+            index=list(ENCODER_PRESETS).index(default),
+            key=f"{key}_encoder_preset",
+        )
+        format, options = ENCODER_PRESETS[preset]
+        options = dict(options)
+
+        if preset == "JPEG com tamanho máximo":
+            target_kb = st.number_input(
+                "Tamanho máximo (KB)",
+                min_value=50,
+                max_value=25_000,
+                value=1_000,
+                step=50,
+                key=f"{key}_encoder_target_kb",
+            )
+            options["target_bytes"] = int(target_kb * 1024)
+
+    return format, options
+
+
+LAYOUT_MODE_LABELS = {
+    "Faixa única": "strip",
+    "Colunas fixas": "columns",
+    "Proporção da imagem": "aspect",
+}
+LAYOUT_ASPECT_RATIOS = {"16:9": 16 / 9, "4:3": 4 / 3, "1:1": 1.0, "9:16": 9 / 16}
+
+
+def select_layout(key: str):
+    """
+    Lets the user pick how the tournament image is laid out: one strip, a
+    grid with fixed columns or with a target aspect ratio, optionally split
+    into pages. Returns the layout options of compose_pages.
+    """
+    with st.sidebar:
+        label = st.selectbox(
+            "Layout da imagem do torneio",
+            list(LAYOUT_MODE_LABELS),
+            key=f"{key}_layout_mode",
+        )
+        options = {"mode": LAYOUT_MODE_LABELS[label]}
+
+        if options["mode"] == "columns":
+            options["columns"] = int(
+                st.number_input(
+                    "Jogadores por linha",
+                    min_value=1,
+                    max_value=64,
+                    value=8,
+                    key=f"{key}_layout_columns",
+                )
+            )
+        elif options["mode"] == "aspect":
+            ratio = st.selectbox(
+                "Proporção", list(LAYOUT_ASPECT_RATIOS), key=f"{key}_layout_aspect"
+            )
+            options["aspect"] = LAYOUT_ASPECT_RATIOS[ratio]
+
+        if options["mode"] != "strip":
+            rows_per_page = st.number_input(
+                "Linhas por página (0 = página única)",
+                min_value=0,
+                max_value=32,
+                value=0,
+                key=f"{key}_layout_rows_per_page",
+            )
+            options["rows_per_page"] = int(rows_per_page) or None
+
+    return options
+
+
+def render_encoded_images(images, captions, file_stems, encoder, key: str):
+    """
+    Encodes the images concurrently off the script thread with the chosen
+    encoder, then shows each one with its encoded size and time and a
+    download button.
+    """
+    format, options = encoder
+    encoded_images = encode_many(images, format, **options)
+
+    for encoded, caption, file_stem in zip(encoded_images, captions, file_stems):
+        st.image(encoded.data, caption=caption)
+        st.caption(encoded.summary())
+        st.download_button(
+            f"Baixar {caption}",
+            encoded.data,
+            file_name=f"{file_stem}.{encoded.extension}",
+            mime=encoded.mime,
+            key=f"{key}_{file_stem}_download",
+        )
+
+    return encoded_images
+
+
+def get_session_export() -> SessionExport:
+    """Returns the images generated in the current Streamlit session for export."""
+    if "session_export" not in st.session_state:
+        st.session_state["session_export"] = SessionExport()
+
+    return st.session_state["session_export"]
+
+
+def render_session_export(key: str):
+    """
+    Lets the user pick the format and quality of each image generated in the
+    session and download all of them in a single zip.
+    """
+    session_export = get_session_export()
+    entries = session_export.entries()
+
+    with st.expander(f"Exportar imagens da sessão ({len(entries)})"):
+        if not entries:
+            st.caption("Nenhuma imagem gerada nesta sessão.")
+            return
+
+        edited = st.data_editor(
+            pd.DataFrame(
+                {
+                    "Imagem": [entry.name for entry in entries],
+                    "Formato": [entry.format for entry in entries],
+                    "Qualidade": [entry.quality for entry in entries],
+                }
+            ),
+            disabled=["Imagem"],
+            hide_index=True,
+            column_config={
+                "Formato": st.column_config.SelectboxColumn(
+                    options=list(EXPORT_FORMATS), required=True
+                ),
+                "Qualidade": st.column_config.NumberColumn(
+                    min_value=1, max_value=100, step=1, required=True
+                ),
+            },
+            key=f"{key}_export_editor",
+        )
+
+        if not st.button("Gerar zip", key=f"{key}_export_button"):
+            return
+
+        for entry, (_, row) in zip(entries, edited.iterrows()):
+            entry.format = row["Formato"]
+            entry.quality = int(row["Qualidade"])
+
+        with st.spinner("Gerando zip..."):
+            path, manifest = export_to_tempfile(entries)
+            try:
+                with open(path, "rb") as f:
+                    st.download_button(
+                        "Baixar zip",
+                        f,
+                        file_name="imagens_getampedvive.zip",
+                        mime="application/zip",
+                        key=f"{key}_export_download",
+                    )
+            finally:
+                os.remove(path)
+
+        st.caption(f"{len(manifest['entries'])} imagens exportadas.")
+
+
 def hide_header_actions():
     """Hide header action elements."""
     st.markdown(
@@ -130,3 +260,78 @@ def hide_header_actions():
         """,
         unsafe_allow_html=True,
     )
+
+
+@st.cache_resource
+def get_accessory_search_index():
+    """Search index over accessory ID, name and year, shared by all sessions."""
+    accs_df = pd.read_excel(ACCS_BY_YEAR_FILE)
+    return SearchIndex(
+        (row.ID, (row.ID, row.Name, row.Ano)) for row in accs_df.itertuples()
+    )
+
+
+@st.cache_resource
+def _names_search_index(names: tuple):
+    return SearchIndex((name, (name,)) for name in names)
+
+
+def get_player_search_index():
+    """Search index over player names; rebuilt when the catalog changes."""
+    return _names_search_index(tuple(get_players_df()["Name"]))
+
+
+def get_style_search_index():
+    return _names_search_index(tuple(get_styles_df()["Name"]))
+
+
+def search_picker(
+    label: str,
+    index: SearchIndex,
+    key: str,
+    multiple: bool = True,
+    limit: int = DEFAULT_LIMIT,
+):
+    """
+    Search-as-you-type picker: only the top matches of the typed query are
+    sent to the browser, instead of the whole catalog. Selected items stay
+    selected across queries.
+    Returns the selected keys, or the selected key (None if empty) when
+    multiple is False.
+    """
+    selected_key = f"{key}_selected"
+    selected = st.session_state.setdefault(selected_key, [])
+
+    query = st.text_input(
+        f"Buscar: {label}",
+        key=f"{key}_query",
+        placeholder="Digite parte do ID ou do nome",
+    )
+    options = list(dict.fromkeys(selected + index.search(query, limit)))
+
+    def format_option(option):
+        option_label = index.label(option)
+        return option if option_label == option else f"{option_label} ({option})"
+
+    if multiple:
+        chosen = st.multiselect(
+            label,
+            options,
+            default=selected,
+            format_func=format_option,
+            key=f"{key}_widget",
+        )
+    else:
+        chosen = st.selectbox(
+            label,
+            options,
+            index=0 if options else None,
+            format_func=format_option,
+            key=f"{key}_widget",
+        )
+        chosen = [chosen] if chosen is not None else []
+
+    st.session_state[selected_key] = chosen
+    if multiple:
+        return chosen
+    return chosen[0] if chosen else None
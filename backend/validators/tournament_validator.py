@@ -1,16 +1,21 @@
-import streamlit as st
-
-
 class TournamentDataValidator:
     @staticmethod
-    def validate(tournament_data, error_message=None):
-        """Validates the input data format."""
+    def validate(tournament_data, error_message=None, error_func=None):
+        """Validates the input data format.
+
+        Errors are reported with error_func, st.error by default; Streamlit is
+        only imported when an error has to be shown.
+        """
         players_data = []
         for line in tournament_data.splitlines():
             if line.strip():  # Skip empty lines
                 player_data = [item.strip() for item in line.split(",")]
                 if len(player_data) < 2:
-                    st.error(
+                    if error_func is None:
+                        import streamlit as st
+
+                        error_func = st.error
+                    error_func(
                         error_message
                         or "Formato inválido! Cada linha deve conter pelo menos dois itens separados por vírgula."
                     )
@@ -0,0 +1,85 @@
+"""
+Downloads the accessory embeddings from Supabase into a local quantized index
+(see backend/services/accessory_index.py) and prints a recall/latency report
+of the quantized search against the exact float search.
+
+Usage:
+    python -m embeddings.build_local_accessory_index [output_dir]
+
+Point GETAMPEDVIVE_ACCESSORY_INDEX_DIR at output_dir to make the app use it.
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+from dotenv import load_dotenv
+from supabase import create_client
+
+from backend.services.accessory_index import QuantizedAccessoryIndex, recall_report
+
+PAGE_SIZE = 1000
+DEFAULT_OUTPUT_DIR = "generated_images/accessory_index"
+# Report queries: stored embeddings perturbed to about this cosine similarity,
+# standing in for misspelled names
+QUERY_SIMILARITY = 0.85
+NUM_QUERIES = 500
+
+
+def fetch_accessory_embeddings(supabase):
+    """All (accessory_id, accessory_name, embedding) rows, paged."""
+    rows = []
+    start = 0
+    while True:
+        response = (
+            supabase.table("accessory_embeddings")
+            .select("accessory_id, accessory_name, embedding")
+            .order("id")
+            .range(start, start + PAGE_SIZE - 1)
+            .execute()
+        )
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+def perturbed_queries(vectors, num_queries, similarity, seed=0):
+    rng = np.random.default_rng(seed)
+    base = vectors[rng.choice(len(vectors), num_queries, replace=False)]
+    noise = rng.normal(size=base.shape).astype(np.float32)
+    noise -= (noise * base).sum(axis=1, keepdims=True) * base
+    noise /= np.linalg.norm(noise, axis=1, keepdims=True)
+    return similarity * base + np.sqrt(1 - similarity**2) * noise
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUTPUT_DIR
+    supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+
+    rows = fetch_accessory_embeddings(supabase)
+    print(f"Fetched {len(rows)} embeddings.")
+
+    # PostgREST returns vector columns in their text form, e.g. '[0.1,0.2]'
+    vectors = np.array([json.loads(row["embedding"]) for row in rows], np.float32)
+    index = QuantizedAccessoryIndex(
+        [row["accessory_id"] for row in rows],
+        [row["accessory_name"] for row in rows],
+        vectors,
+    )
+    index.save(output_dir)
+    print(f"Saved index to {output_dir}")
+
+    queries = perturbed_queries(
+        index.vectors, min(NUM_QUERIES, len(index)), QUERY_SIMILARITY
+    )
+    print(f"\n{'mode':<28}{'recall@3':>10}{'ms/query':>10}{'resident':>12}")
+    for line in recall_report(index.vectors, queries):
+        print(
+            f"{line['mode']:<28}{line['recall']:>10.3f}"
+            f"{line['ms_per_query']:>10.3f}"
+            f"{line['resident_bytes'] / 1024:>10.0f}KB"
+        )
@@ -27,6 +27,38 @@ ORDER BY ae.embedding <=> query_embedding
 LIMIT match_count;
 END;
 $$;
+-- Top-k matches for many queries in one statement. Each query runs its own
+-- ORDER BY distance LIMIT k through a LATERAL join, so it can use the HNSW
+-- index; the threshold is applied after the limit, which keeps the inner
+-- query index-friendly and returns the same rows as filtering first.
+-- query_index is the 0-based position of the query in query_embeddings.
+CREATE OR REPLACE FUNCTION match_accessories(
+        query_embeddings VECTOR(768) [],
+        match_threshold FLOAT DEFAULT 0.7,
+        match_count INT DEFAULT 3
+    ) RETURNS TABLE (
+        query_index INT,
+        accessory_id TEXT,
+        accessory_name TEXT,
+        similarity FLOAT
+    ) LANGUAGE sql STABLE AS $$
+SELECT (q.ordinality - 1)::INT AS query_index,
+    m.accessory_id,
+    m.accessory_name,
+    m.similarity
+FROM unnest(query_embeddings) WITH ORDINALITY AS q(embedding, ordinality)
+    CROSS JOIN LATERAL (
+        SELECT ae.accessory_id,
+            ae.accessory_name,
+            1 - (ae.embedding <=> q.embedding) AS similarity
+        FROM accessory_embeddings ae
+        ORDER BY ae.embedding <=> q.embedding
+        LIMIT match_count
+    ) m
+WHERE m.similarity > match_threshold
+ORDER BY q.ordinality,
+    m.similarity DESC;
+$$;
 ALTER TABLE accessory_embeddings ENABLE ROW LEVEL SECURITY;
 -- Allow anyone to read (for querying embeddings from your app)
 CREATE POLICY "Allow public read access" ON accessory_embeddings FOR
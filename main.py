@@ -5,6 +5,7 @@ Main intro page for the GetAmped Tournament image creation app.
 
 import streamlit as st
 
+from backend.utils import ensure_directories_exist
 from backend.utils.utils import hide_header_actions
 
 
@@ -108,6 +109,7 @@ def main():
     )
 
     hide_header_actions()
+    ensure_directories_exist()
 
     # Render the main intro page
     render_intro_page()
@@ -3,16 +3,42 @@ Module for the creating images for GetAmped Tournament.
 """
 
 import logging
+from pathlib import Path
 
 import pandas as pd
 import streamlit as st
-from PIL import Image
 
 from backend.composers.image_composer import PlayerImageComposer, TeamImageComposer
 from backend.services.accessory_agent_service import AccessoryAgentService
-from backend.utils import ACCESSORIES_FOLDER, ACCS_BY_YEAR_FILE, PLAYERS_FOLDER
-from backend.utils.image_utils import get_or_create_image
-from backend.utils.utils import get_players_df, hide_header_actions
+from backend.services.accessory_index import load_accessory_index
+from backend.services.resilience import LexicalMatcher
+from backend.utils import (
+    ACCESSORIES_FOLDER,
+    ACCS_BY_YEAR_FILE,
+    GETAMPEDVIVE_ACCESSORY_INDEX_DIR,
+    GETAMPEDVIVE_ACCESSORY_INDEX_QUANTIZATION,
+    PLAYERS_FOLDER,
+)
+from backend.utils.image_utils import get_player_thumbnail
+from backend.utils.tile_matching import (
+    columns_to_text,
+    folder_fingerprint,
+    load_or_build_index,
+    recognize_sheet,
+)
+from backend.utils.utils import (
+    get_accessory_search_index,
+    get_player_search_index,
+    get_players_df,
+    get_session_export,
+    hide_header_actions,
+    ingest_upload,
+    render_encoded_images,
+    render_session_export,
+    search_picker,
+    select_encoder,
+    select_layout,
+)
 from backend.validators.tournament_validator import TournamentDataValidator
 
 
@@ -50,6 +76,36 @@ def get_printable_accs_df():
     return accs_df
 
 
+@st.cache_resource(max_entries=1)
+def get_tile_indexes(players_fingerprint, accessories_fingerprint):
+    """
+    Feature indexes of the player and accessory tiles, shared by every session.
+    Keyed by the fingerprints of both folders, so uploads rebuild them.
+    """
+    cache_dir = Path("generated_images")
+    return (
+        load_or_build_index(PLAYERS_FOLDER, cache_dir / "tile_index_players.npz"),
+        load_or_build_index(ACCESSORIES_FOLDER, cache_dir / "tile_index_accs.npz"),
+    )
+
+
+@st.cache_resource
+def get_accessory_index():
+    """Local accessory embeddings, shared by every session. None if not built."""
+    return load_accessory_index(
+        GETAMPEDVIVE_ACCESSORY_INDEX_DIR, GETAMPEDVIVE_ACCESSORY_INDEX_QUANTIZATION
+    )
+
+
+@st.cache_resource
+def get_lexical_matcher():
+    """Name matcher used while Gemini or Supabase are unavailable."""
+    accs_df = get_accs_df()
+    return LexicalMatcher(
+        accs_df["ID"].astype(str).tolist(), accs_df["Name"].astype(str).tolist()
+    )
+
+
 class TournamentApp:
     def __init__(self):
         self.player_image_composer = PlayerImageComposer(
@@ -61,15 +117,21 @@ class TournamentApp:
         # Initialize the agent service for ID generation
         if "agent_service" not in st.session_state:
             try:
-                st.session_state.agent_service = AccessoryAgentService()
+                st.session_state.agent_service = AccessoryAgentService(
+                    local_index=get_accessory_index(),
+                    lexical_matcher=get_lexical_matcher(),
+                )
             except Exception as e:
                 st.error(f"Erro ao inicializar o serviço de geração de IDs: {str(e)}")
                 st.stop()
 
     def run(self):
         self._render_sidebar()
+        self.encoder = select_encoder("acessorios", default="JPEG")
+        self.layout = select_layout("acessorios")
         self._render_tournament_section()
         self._render_team_section()
+        render_session_export("acessorios")
 
     def _render_sidebar(self):
         with st.sidebar:
@@ -84,11 +146,7 @@ class TournamentApp:
                         index = i * num_cols + j
                         if index < len(players_df):
                             player_name = players_df.iloc[index]["Name"]
-                            player_image = get_or_create_image(
-                                folder_path=PLAYERS_FOLDER,
-                                image_name=player_name,
-                                size=(32, 32),
-                            )
+                            player_image = get_player_thumbnail(player_name)
                             with col:
                                 st.image(player_image)
                                 st.write(
@@ -121,9 +179,10 @@ class TournamentApp:
         st.markdown("## Criar imagens de acessórios")
         st.markdown("### Torneio")
 
-        tab_ai, tab_manual = st.tabs(
+        tab_ai, tab_sheet, tab_manual = st.tabs(
             [
                 "🔍 Gerar IDs a partir de nomes",
+                "🧩 Reconhecer imagem de time",
                 "👆 Selecionar manualmente",
             ]
         )
@@ -157,23 +216,23 @@ class TournamentApp:
                             st.error(f"Ocorreu um erro ao processar os dados: {str(e)}")
                             logging.exception("Error processing accessory IDs")
 
+        with tab_sheet:
+            self._render_sheet_recognition()
+
         with tab_manual:
             st.caption(
                 "Selecione o jogador e os IDs dos acessórios manualmente usando os campos abaixo."
             )
-            players_df = get_players_df()
-            player_options = players_df["Name"].tolist()
-            player_name_input = st.selectbox(
+            player_name_input = search_picker(
                 "Selecione o jogador",
-                player_options,
+                get_player_search_index(),
                 key="player_name_input",
+                multiple=False,
             )
 
-            accs_df = get_accs_df().sort_values(by="ID")
-            acc_options = accs_df["ID"].tolist()
-            selected_accs_input = st.multiselect(
+            selected_accs_input = search_picker(
                 "Selecione os acessórios",
-                acc_options,
+                get_accessory_search_index(),
                 key="selected_accs_input",
             )
 
@@ -215,21 +274,77 @@ class TournamentApp:
                 return
 
             st.session_state.players_data = players_data
-            composite_image = self.player_image_composer.compose(
+            composite_images = self.player_image_composer.compose_pages(
                 players_data=players_data,
                 image_size=(94, 94),
+                **self.layout,
             )
-            composite_image.save("generated_images/tournament_image.jpg")
-            st.session_state.composite_image = composite_image
-
-        if "composite_image" in st.session_state:
-            st.image(
-                image=Image.open("generated_images/tournament_image.jpg"),
-                caption="Imagem do Torneio",
+            session_export = get_session_export()
+            # Drop the pages of the previous render, which may have had more
+            session_export.remove_prefix("torneio_acessorios")
+            for i, page in enumerate(composite_images):
+                suffix = f"_{i + 1}" if len(composite_images) > 1 else ""
+                page.save(f"generated_images/tournament_image{suffix}.jpg")
+                session_export.add(
+                    f"torneio_acessorios{suffix}", page, "JPEG", page="acessorios"
+                )
+            st.session_state.composite_images = composite_images
+
+        if "composite_images" in st.session_state:
+            num_pages = len(st.session_state.composite_images)
+            render_encoded_images(
+                st.session_state.composite_images,
+                [
+                    "Imagem do Torneio"
+                    + (f" (página {i + 1}/{num_pages})" if num_pages > 1 else "")
+                    for i in range(num_pages)
+                ],
+                [
+                    "torneio" + (f"_{i + 1}" if num_pages > 1 else "")
+                    for i in range(num_pages)
+                ],
+                self.encoder,
+                key="acessorios",
             )
 
         st.markdown("---")
 
+    def _render_sheet_recognition(self):
+        st.caption(
+            "Envie uma imagem de time gerada pelo app (jogadores na primeira linha e "
+            "acessórios abaixo) para recuperar os IDs sem digitar os nomes."
+        )
+        uploaded_file = st.file_uploader(
+            "Imagem do time",
+            type=["png", "jpg", "jpeg"],
+            key="sheet_recognition_upload",
+        )
+        if uploaded_file is None:
+            return
+
+        if st.button("🧩 Reconhecer acessórios", key="recognize_sheet_button"):
+            sheet = ingest_upload(uploaded_file, mode="RGB")
+            with st.spinner("Reconhecendo..."):
+                player_index, accessory_index = get_tile_indexes(
+                    folder_fingerprint(PLAYERS_FOLDER),
+                    folder_fingerprint(ACCESSORIES_FOLDER),
+                )
+                columns = recognize_sheet(sheet, player_index, accessory_index)
+
+            if not columns:
+                st.error("Nenhum jogador ou acessório reconhecido na imagem.")
+                return
+
+            unknown = sum(column.unknown for column in columns)
+            if unknown:
+                st.warning(
+                    f"{unknown} quadro(s) não reconhecido(s). Confira o resultado "
+                    "antes de criar a imagem."
+                )
+
+            st.session_state.tournament_data_input = columns_to_text(columns)
+            st.success("IDs reconhecidos e copiados para o campo de dados do torneio!")
+
     def _render_team_section(self):
         st.markdown("### Formação de Times")
         tournament_players = []
@@ -286,6 +401,9 @@ class TournamentApp:
                 return
 
             players_data = st.session_state.players_data
+            session_export = get_session_export()
+            session_export.remove_prefix("time_acessorios_")
+            team_images = []
             for i, team_members in enumerate(team_members_data):
                 team_image = self.team_image_composer.compose_team(
                     team_members=team_members,
@@ -295,10 +413,23 @@ class TournamentApp:
 
                 if team_image is not None:
                     team_image.save(f"generated_images/team_{i + 1}.jpg")
-                    st.image(
-                        image=Image.open(f"generated_images/team_{i + 1}.jpg"),
-                        caption=f"Time {i + 1}",
+                    session_export.add(
+                        f"time_acessorios_{i + 1}",
+                        team_image,
+                        "JPEG",
+                        page="acessorios",
+                        team=i + 1,
+                        players=team_members,
                     )
+                    team_images.append((i + 1, team_image))
+
+            render_encoded_images(
+                [team_image for _, team_image in team_images],
+                [f"Time {team_num}" for team_num, _ in team_images],
+                [f"time_{team_num}" for team_num, _ in team_images],
+                self.encoder,
+                key="acessorios",
+            )
 
 
 if __name__ == "__main__":
@@ -1,12 +1,24 @@
 import streamlit as st
-from PIL import Image
 
 from backend.composers.style_image_composer import (
     PlayerStyleImageComposer,
     TeamStyleImageComposer,
 )
 from backend.utils import PLAYERS_FOLDER, STYLES_FOLDER
-from backend.utils.utils import get_players_df, get_styles_df, hide_header_actions
+from backend.utils.image_utils import get_player_thumbnail
+from backend.utils.utils import (
+    get_player_search_index,
+    get_players_df,
+    get_session_export,
+    get_style_search_index,
+    get_styles_df,
+    hide_header_actions,
+    render_encoded_images,
+    render_session_export,
+    search_picker,
+    select_encoder,
+    select_layout,
+)
 from backend.validators.tournament_validator import TournamentDataValidator
 
 
@@ -22,8 +34,11 @@ class StyleTournamentApp:
 
     def run(self):
         self._render_sidebar()
+        self.encoder = select_encoder("estilos", default="JPEG")
+        self.layout = select_layout("estilos")
         self._render_tournament_section()
         self._render_team_section()
+        render_session_export("estilos")
 
     def _render_sidebar(self):
         with st.sidebar:
@@ -38,9 +53,7 @@ class StyleTournamentApp:
                         index = i * num_cols + j
                         if index < len(players_df):
                             player_name = players_df.iloc[index]["Name"]
-                            player_image = self.player_style_image_composer.compose(
-                                [[player_name]], (32, 32)
-                            )
+                            player_image = get_player_thumbnail(player_name)
                             with col:
                                 st.image(player_image)
                                 st.write(
@@ -68,19 +81,16 @@ class StyleTournamentApp:
 
         st.markdown("### Torneio de Estilos")
 
-        players_df = get_players_df()
-        player_options = players_df["Name"].tolist()
-        player_name_input = st.selectbox(
+        player_name_input = search_picker(
             "Selecione o jogador",
-            player_options,
+            get_player_search_index(),
             key="player_style_name_input",
+            multiple=False,
         )
 
-        styles_df = get_styles_df()
-        style_options = styles_df["Name"].tolist()
-        selected_styles_input = st.multiselect(
+        selected_styles_input = search_picker(
             "Selecione os estilos",
-            style_options,
+            get_style_search_index(),
             key="selected_styles_input",
         )
 
@@ -122,18 +132,38 @@ class StyleTournamentApp:
                 return
 
             st.session_state.player_styles_data = players_data
-            composite_image = self.player_style_image_composer.compose(
+            composite_images = self.player_style_image_composer.compose_pages(
                 players_data=players_data,
                 image_size=(94, 94),
+                **self.layout,
             )
 
-            composite_image.save("generated_images/tournament_style_image.jpg")
-            st.session_state.composite_style_image = composite_image
+            session_export = get_session_export()
+            # Drop the pages of the previous render, which may have had more
+            session_export.remove_prefix("torneio_estilos")
+            for i, page in enumerate(composite_images):
+                suffix = f"_{i + 1}" if len(composite_images) > 1 else ""
+                page.save(f"generated_images/tournament_style_image{suffix}.jpg")
+                session_export.add(
+                    f"torneio_estilos{suffix}", page, "JPEG", page="estilos"
+                )
+            st.session_state.composite_style_images = composite_images
 
-        if "composite_style_image" in st.session_state:
-            st.image(
-                image=Image.open("generated_images/tournament_style_image.jpg"),
-                caption="Imagem dos jogadores e seus estilos",
+        if "composite_style_images" in st.session_state:
+            num_pages = len(st.session_state.composite_style_images)
+            render_encoded_images(
+                st.session_state.composite_style_images,
+                [
+                    "Imagem dos jogadores e seus estilos"
+                    + (f" (página {i + 1}/{num_pages})" if num_pages > 1 else "")
+                    for i in range(num_pages)
+                ],
+                [
+                    "torneio_estilos" + (f"_{i + 1}" if num_pages > 1 else "")
+                    for i in range(num_pages)
+                ],
+                self.encoder,
+                key="estilos",
             )
 
         st.markdown("---")
@@ -193,6 +223,9 @@ class StyleTournamentApp:
                 return
 
             players_data = st.session_state.player_styles_data
+            session_export = get_session_export()
+            session_export.remove_prefix("time_estilos_")
+            team_images = []
             for i, team_members in enumerate(team_members_data):
                 team_image = self.team_style_image_composer.compose_team(
                     team_members=team_members,
@@ -201,10 +234,23 @@ class StyleTournamentApp:
                 )
                 if team_image is not None:
                     team_image.save(f"generated_images/team_styles_{i+1}.jpg")
-                    st.image(
-                        image=Image.open(f"generated_images/team_styles_{i+1}.jpg"),
-                        caption=f"Time {i+1} com Estilos",
+                    session_export.add(
+                        f"time_estilos_{i + 1}",
+                        team_image,
+                        "JPEG",
+                        page="estilos",
+                        team=i + 1,
+                        players=team_members,
                     )
+                    team_images.append((i + 1, team_image))
+
+            render_encoded_images(
+                [team_image for _, team_image in team_images],
+                [f"Time {team_num} com Estilos" for team_num, _ in team_images],
+                [f"time_estilos_{team_num}" for team_num, _ in team_images],
+                self.encoder,
+                key="estilos",
+            )
 
 
 if __name__ == "__main__":
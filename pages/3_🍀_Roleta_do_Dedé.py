@@ -1,53 +1,50 @@
 import datetime
-import io
 
-import numpy as np
 import streamlit as st
-from PIL import Image
 
-from backend.utils.image_utils import roulette_team_rows
-from backend.utils.utils import hide_header_actions
+from backend.utils.encoders import encode_async, encode_many
+from backend.utils.roulette import (
+    TeamDrawSettings,
+    contact_sheet,
+    results_zip,
+    run_batch_draw,
+)
+from backend.utils.roulette_simulation import simulate_draws
+from backend.utils.utils import (
+    get_session_export,
+    hide_header_actions,
+    ingest_upload,
+    render_session_export,
+    select_encoder,
+)
 
+ROW_HEIGHT = 94
 
-def get_uploaded_team_images():
-    uploaded_team1 = st.sidebar.file_uploader(
-        "Carregue a imagem do Time 1", type=["png", "jpg", "jpeg"], key="team1"
-    )
-    uploaded_team2 = st.sidebar.file_uploader(
-        "Carregue a imagem do Time 2", type=["png", "jpg", "jpeg"], key="team2"
-    )
-    team_images = []
-    if uploaded_team1:
-        team_images.append(Image.open(uploaded_team1))
-    if uploaded_team2:
-        team_images.append(Image.open(uploaded_team2))
 
-    return team_images
+MAX_TEAMS = 16
 
 
-def show_team_previews(team_images):
-    cols = st.columns(2)
-    for i, img in enumerate(team_images):
-        cols[i].image(img, caption=f"Time {i+1}", width=300)
-
-
-def show_team_rows_with_index(team_images):
-    ROW_HEIGHT = 94
+def get_uploaded_team_images():
+    uploaded_files = st.sidebar.file_uploader(
+        f"Carregue as imagens dos times (até {MAX_TEAMS})",
+        type=["png", "jpg", "jpeg"],
+        accept_multiple_files=True,
+        key="team_sheets",
+    )
+    if len(uploaded_files) > MAX_TEAMS:
+        st.sidebar.warning(f"Apenas os primeiros {MAX_TEAMS} times serão usados.")
 
-    cols = st.columns(2)
-    for team_idx, img in enumerate(team_images):
-        if img is None:
-            continue
+    return [
+        ingest_upload(uploaded, row_height=ROW_HEIGHT)
+        for uploaded in uploaded_files[:MAX_TEAMS]
+    ]
 
-        arr = np.array(img)
-        num_rows = arr.shape[0] // ROW_HEIGHT
 
-        with cols[team_idx]:
-            st.markdown(f"<b>Time {team_idx+1}</b>", unsafe_allow_html=True)
-            for i in range(num_rows):
-                y0 = i * ROW_HEIGHT
-                y1 = y0 + ROW_HEIGHT
-                row_img = Image.fromarray(arr[y0:y1, :, :])
+def show_team_rows_with_index(team_sheets):
+    for team_idx, sheet in enumerate(team_sheets):
+        with st.expander(f"Linhas do Time {team_idx + 1}"):
+            for i in range(sheet.num_rows):
+                row_img = sheet.row(i)
 
                 row_cols = st.columns([1, 12])
                 with row_cols[0]:
@@ -94,59 +91,94 @@ def get_team_row_settings(team_num, num_rows):
     return fixed_rows, selectable_rows, num_rows_to_draw
 
 
-def get_roulette_settings():
-    num_rows = st.number_input(
-        "Linhas na imagem (inclui players)",
-        min_value=2,
-        max_value=20,
-        value=8,
-    )
+def get_roulette_settings(team_sheets):
+    team_settings = []
+    for pair_start in range(0, len(team_sheets), 2):
+        cols = st.columns(2)
+        for offset, sheet in enumerate(team_sheets[pair_start : pair_start + 2]):
+            with cols[offset]:
+                fixed_rows, selectable_rows, num_rows_to_draw = get_team_row_settings(
+                    pair_start + offset + 1, sheet.num_rows
+                )
+                team_settings.append(
+                    TeamDrawSettings(selectable_rows, num_rows_to_draw, fixed_rows)
+                )
 
-    col1, col2 = st.columns(2)
+    seed = st.number_input(
+        "Semente do sorteio",
+        min_value=0,
+        value=None,
+        step=1,
+        help="Deixe vazio para uma semente aleatória. A mesma semente e as "
+        "mesmas configurações repetem o sorteio.",
+    )
+    roulette_clicked = st.button("Sortear todos os times", key="roulette_button")
 
-    # Team 1 settings
-    with col1:
-        fixed_rows_team1, selectable_rows_team1, num_rows_team1 = get_team_row_settings(
-            1, num_rows
-        )
+    return team_settings, seed, roulette_clicked
 
-    # Team 2 settings
-    with col2:
-        fixed_rows_team2, selectable_rows_team2, num_rows_team2 = get_team_row_settings(
-            2, num_rows
-        )
 
-    col1, col2 = st.columns(2)
-    with col1:
-        roulette_clicked_team1 = st.button(
-            "Sortear Time 1", key="roulette_button_team1"
+def show_fairness_simulation(team_sheets, team_settings):
+    with st.expander("Simulação de justiça do sorteio"):
+        st.caption(
+            "Simula muitos sorteios com as configurações atuais, sem gerar "
+            "imagens, e mostra a frequência de cada linha."
         )
-    with col2:
-        roulette_clicked_team2 = st.button(
-            "Sortear Time 2", key="roulette_button_team2"
+        trials = st.number_input(
+            "Quantidade de sorteios simulados",
+            min_value=1_000,
+            max_value=10_000_000,
+            value=1_000_000,
+            step=100_000,
         )
+        if not st.button("Simular", key="simulate_button"):
+            return
+
+        try:
+            report = simulate_draws(
+                team_settings, [sheet.num_rows for sheet in team_sheets], trials
+            )
+        except Exception as e:
+            st.error(f"Erro ao simular os sorteios: {str(e)}")
+            return
+
+        st.markdown(f"**Semente da simulação:** `{report.seed}`")
+        for team_idx, team in enumerate(report.teams):
+            st.markdown(
+                f"**Time {team_idx + 1}** — χ² = {team.chi2:.2f}, "
+                f"p-valor = {team.p_value:.4f}"
+            )
+            if team.rows:
+                st.dataframe(
+                    {
+                        "Linha": team.rows,
+                        "Frequência": team.frequencies,
+                        "Esperado": [team.expected] * len(team.rows),
+                    },
+                    hide_index=True,
+                )
 
-    return (
-        num_rows,
-        {"team1": num_rows_team1, "team2": num_rows_team2},
-        {"team1": selectable_rows_team1, "team2": selectable_rows_team2},
-        {"team1": fixed_rows_team1, "team2": fixed_rows_team2},
-        roulette_clicked_team1,
-        roulette_clicked_team2,
-    )
-
-
-def show_team_result(
-    team_idx,
-    sampled_rows,
-    avatar_img,
-    accessory_imgs_team,
-    fixed_rows=None,
-    team_image=None,
-):
+        if report.identical:
+            st.markdown("**Chance de sorteios idênticos entre times**")
+            st.dataframe(
+                {
+                    "Times": [f"{i + 1} e {j + 1}" for i, j in report.identical],
+                    "Simulada": list(report.identical.values()),
+                    "Exata": list(report.identical_exact.values()),
+                },
+                hide_index=True,
+            )
+            st.write(
+                "Chance de ao menos dois times sortearem as mesmas linhas: "
+                f"{report.any_identical:.4%}"
+            )
+
+
+def show_team_result(team_idx, result, encoded):
     st.subheader(f"Resultado do Time {team_idx + 1}")
+    sampled_rows = result.sampled_rows[team_idx]
+    fixed_rows = result.team_settings[team_idx].fixed_rows
     st.write(
-        f"Linhas de acessórios sorteadas: {', '.join(str(r) for r in sampled_rows[0])}"
+        f"Linhas de acessórios sorteadas: {', '.join(str(r) for r in sampled_rows)}"
     )
 
     if fixed_rows:
@@ -155,46 +187,85 @@ def show_team_result(
             unsafe_allow_html=True,
         )
 
-    rows_to_stack = [np.array(avatar_img)]
-
-    # Add fixed rows from the original team image
-    if fixed_rows and team_image is not None:
-        arr = np.array(team_image)
-        row_height = avatar_img.height  # Should be 94
-        for row in sorted(fixed_rows):
-            y0 = row * row_height
-            y1 = y0 + row_height
-            fixed_row_img = arr[y0:y1, :, :]
-            rows_to_stack.append(fixed_row_img)
-
-    # Add accessory rows
-    rows_to_stack.extend(
-        [np.array(acc) for acc in accessory_imgs_team if acc is not None]
-    )
-
-    if not rows_to_stack:
-        st.warning("Nenhuma imagem para exibir.")
-        return
-
-    stacked = np.vstack(rows_to_stack)
-    st.image(stacked, caption=f"Time {team_idx + 1}", width=300)
+    st.image(encoded.data, caption=f"Time {team_idx + 1}", width=300)
+    st.caption(encoded.summary())
 
     # Download button
-    img_pil = Image.fromarray(stacked)
-    buf = io.BytesIO()
-    img_pil.save(buf, format="PNG")
-
     now_str = datetime.datetime.now().strftime("%d-%m-%Y-%H-%M-%S")
-    file_name = f"time_{team_idx + 1}_{now_str}.png"
+    file_name = f"time_{team_idx + 1}_{now_str}.{encoded.extension}"
 
     st.download_button(
         label=f"Baixar imagem do Time {team_idx + 1}",
-        data=buf.getvalue(),
+        data=encoded.data,
         file_name=file_name,
-        mime="image/png",
+        mime=encoded.mime,
+        key=f"download_team{team_idx + 1}",
     )
 
 
+def add_results_to_export(result, images):
+    session_export = get_session_export()
+    session_export.remove_prefix("roleta_time_")
+    for team_idx, stacked in enumerate(images):
+        session_export.add(
+            f"roleta_time_{team_idx + 1:02d}",
+            stacked,
+            page="roleta",
+            team=team_idx + 1,
+            seed=result.seed,
+            rows=result.result_rows(team_idx),
+        )
+
+
+def get_result_outputs(result, team_sheets, encoder):
+    """
+    Images, zip and encodings of a result, built once per result and encoder
+    instead of on every rerun. The key covers the seed, the sheet digests and
+    the rows of every team.
+    """
+    format, options = encoder
+    key = (result.cache_key(), format, sorted(options.items()))
+    outputs = st.session_state.get("roulette_outputs")
+    if outputs is not None and outputs["key"] == key:
+        return outputs
+
+    images = result.images(team_sheets)
+    # All team images are encoded concurrently, off the script thread
+    contact = encode_async(contact_sheet(images), format, **options)
+    outputs = {
+        "key": key,
+        "images": images,
+        "zip": results_zip(result, images),
+        "encoded": encode_many(images, format, **options),
+        "contact_sheet": contact.result(),
+    }
+    st.session_state["roulette_outputs"] = outputs
+    return outputs
+
+
+def show_batch_downloads(result, outputs):
+    st.markdown(f"**Semente do sorteio:** `{result.seed}`")
+
+    now_str = datetime.datetime.now().strftime("%d-%m-%Y-%H-%M-%S")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="Baixar todos os resultados (zip)",
+            data=outputs["zip"],
+            file_name=f"roleta_{result.seed}_{now_str}.zip",
+            mime="application/zip",
+        )
+    with col2:
+        encoded = outputs["contact_sheet"]
+        st.download_button(
+            label="Baixar folha de contato",
+            data=encoded.data,
+            file_name=f"roleta_{result.seed}_{now_str}.{encoded.extension}",
+            mime=encoded.mime,
+        )
+        st.caption(encoded.summary())
+
+
 if __name__ == "__main__":
     st.set_page_config(
         page_title="Roleta do Dedé",
@@ -205,72 +276,45 @@ if __name__ == "__main__":
 
     st.title("Roleta do Dedé")
 
-    team_images = get_uploaded_team_images()
-    if len(team_images) == 2:
-        show_team_rows_with_index(team_images)
-
-        (
-            num_rows,
-            num_accessory_rows,
-            selectable_rows,
-            fixed_rows,
-            roulette_clicked_team1,
-            roulette_clicked_team2,
-        ) = get_roulette_settings()
-
-        if "roulette_results" not in st.session_state:
-            st.session_state["roulette_results"] = {}
-
-        if roulette_clicked_team1 or roulette_clicked_team2:
-            team_num = "team1" if roulette_clicked_team1 else "team2"
-            team_idx = 0 if roulette_clicked_team1 else 1
-            try:
-                # Process only the clicked team's image
-                single_team_images = [team_images[team_idx]]
-                sampled_rows, avatar_imgs, accessory_imgs = roulette_team_rows(
-                    single_team_images,
-                    num_rows=num_rows,
-                    row_height=94,
-                    num_accessory_rows=num_accessory_rows[team_num],
-                    selectable_rows=selectable_rows[team_num],
-                )
+    team_sheets = get_uploaded_team_images()
+    encoder = select_encoder("roleta")
+    if team_sheets:
+        show_team_rows_with_index(team_sheets)
 
-                # Store results for each team separately
-                if "team_results" not in st.session_state["roulette_results"]:
-                    st.session_state["roulette_results"]["team_results"] = [None, None]
+        team_settings, seed, roulette_clicked = get_roulette_settings(team_sheets)
+        show_fairness_simulation(team_sheets, team_settings)
 
-                st.session_state["roulette_results"]["team_results"][team_idx] = {
-                    "sampled_rows": sampled_rows,
-                    "avatar_imgs": avatar_imgs,
-                    "accessory_imgs": accessory_imgs,
-                    "fixed_rows": fixed_rows[team_num],
-                }
+        if roulette_clicked:
+            try:
+                st.session_state["roulette_results"] = run_batch_draw(
+                    team_sheets, team_settings, seed=seed
+                )
             except Exception as e:
-                st.error(f"Erro ao sortear Time {team_idx + 1}: {str(e)}")
-
-        results = st.session_state.get("roulette_results", {})
-        team_results = results.get("team_results", [None, None])
-
-        # Show results for each team if they exist
-        result_cols = st.columns(2)
-        for i in range(2):
-            with result_cols[i]:
-                if team_results[i] and team_results[i]["accessory_imgs"]:
-                    show_team_result(
-                        team_idx=i,
-                        sampled_rows=[team_results[i]["sampled_rows"]],
-                        avatar_img=(
-                            team_results[i]["avatar_imgs"][0]
-                            if team_results[i]["avatar_imgs"]
-                            else None
-                        ),
-                        accessory_imgs_team=(
-                            team_results[i]["accessory_imgs"][0]
-                            if team_results[i]["accessory_imgs"]
-                            else []
-                        ),
-                        fixed_rows=team_results[i].get("fixed_rows", []),
-                        team_image=team_images[i] if i < len(team_images) else None,
-                    )
+                st.error(f"Erro ao sortear os times: {str(e)}")
+
+        result = st.session_state.get("roulette_results")
+
+        # Results only apply to the sheets they were drawn for
+        if result is not None and not result.matches(team_sheets):
+            st.session_state.pop("roulette_results", None)
+            st.session_state.pop("roulette_outputs", None)
+            get_session_export().remove_prefix("roleta_time_")
+            result = None
+
+        if result is not None:
+            outputs = get_result_outputs(result, team_sheets, encoder)
+            show_batch_downloads(result, outputs)
+            add_results_to_export(result, outputs["images"])
+
+            encoded_images = outputs["encoded"]
+            for pair_start in range(0, len(encoded_images), 2):
+                result_cols = st.columns(2)
+                for offset, encoded in enumerate(
+                    encoded_images[pair_start : pair_start + 2]
+                ):
+                    with result_cols[offset]:
+                        show_team_result(pair_start + offset, result, encoded)
     else:
-        st.info("Carregue as imagens dos dois times para começar.")
+        st.info("Carregue as imagens dos times para começar.")
+
+    render_session_export("roleta")
@@ -2,41 +2,85 @@
 Page for uploading two images, selecting rows to exclude, and downloading the processed images.
 """
 
-from io import BytesIO
-
-import numpy as np
 import streamlit as st
-from PIL import Image
 
-from backend.utils.image_utils import (
-    apply_transparent_gray,
-    draw_row_numbers,
-    get_num_rows,
-    remove_rows,
+from backend.utils.encoders import encode_async
+from backend.utils.image_utils import remove_rows
+from backend.utils.row_selection import RowSelectionCanvas
+from backend.utils.utils import (
+    get_session_export,
+    hide_header_actions,
+    ingest_upload,
+    render_session_export,
+    select_encoder,
 )
-from backend.utils.utils import hide_header_actions
 
 ROW_HEIGHT = 94
 
 
 def upload_image(label):
     uploaded = st.file_uploader(label, type=["png", "jpg", "jpeg"], key=label)
-    if uploaded:
-        img = Image.open(uploaded).convert("RGBA")
-        return img
-    return None
+    return ingest_upload(uploaded, mode="RGBA", row_height=ROW_HEIGHT)
+
+
+def get_row_canvas(team_num, sheet):
+    """Returns the row selection canvas of a team, rebuilt only for new uploads."""
+    state_key = f"draft_canvas_team{team_num}"
+    cached = st.session_state.get(state_key)
+    if cached is None or cached[0] != sheet.digest:
+        cached = (sheet.digest, RowSelectionCanvas(sheet, row_height=ROW_HEIGHT))
+        st.session_state[state_key] = cached
+
+    return cached[1]
 
 
-def download_image(img, label):
-    buf = BytesIO()
-    img.save(buf, format="PNG")
+def download_image(img, label, encoder):
+    format, options = encoder
+    encoded = encode_async(img, format, **options).result()
     st.download_button(
         f"Baixar {label}",
-        buf.getvalue(),
-        file_name=f"{label}.png",
-        mime="image/png",
+        encoded.data,
+        file_name=f"{label}.{encoded.extension}",
+        mime=encoded.mime,
+    )
+    st.caption(encoded.summary())
+
+
+def render_team_picker(team_num, encoder):
+    sheet = upload_image(f"Imagem do Time {team_num}")
+    if sheet is None:
+        return
+
+    canvas = get_row_canvas(team_num, sheet)
+
+    # Row 0 holds the players and can never be excluded
+    excluded_rows = (
+        st.pills(
+            "Linhas excluídas",
+            options=list(range(1, sheet.num_rows)),
+            selection_mode="multi",
+            key=f"excluded_rows_team{team_num}",
+        )
+        or []
     )
 
+    canvas.update(excluded_rows)
+    st.image(canvas.to_png(), use_container_width=True)
+
+    img_final = remove_rows(sheet, excluded_rows, ROW_HEIGHT)
+    if img_final:
+        download_image(img_final, f"Draft {team_num}", encoder)
+        get_session_export().add(
+            f"draft_time_{team_num}",
+            img_final,
+            page="draft",
+            team=team_num,
+            excluded_rows=sorted(excluded_rows),
+        )
+    else:
+        get_session_export().remove_prefix(f"draft_time_{team_num}")
+        st.warning(f"Nenhuma linha selecionada para manter em Time {team_num}.")
+
 
 if __name__ == "__main__":
     st.set_page_config(page_title="Draft Amped", layout="wide")
@@ -45,91 +89,13 @@ if __name__ == "__main__":
 
     st.title("Draft Amped")
 
-    st.markdown(
-        """
-        <style>
-        [data-testid="stImageContainer"] {
-            max-width: 275px !important;
-        }
-        </style>
-    """,
-        unsafe_allow_html=True,
-    )
-
+    encoder = select_encoder("draft")
     col1, col2 = st.columns(2)
 
     with col1:
-        img1 = upload_image("Imagem do Time 1")
-        if img1:
-            num_rows1 = get_num_rows(img1)
-            excluded_rows1 = []
-            row_segments1 = []
-            arr1 = np.array(img1)
-            for i in range(num_rows1):
-                y0 = i * ROW_HEIGHT
-                y1 = y0 + ROW_HEIGHT
-                row_img = Image.fromarray(arr1[y0:y1, :, :])
-                cols = st.columns([1, 12])
-                with cols[0]:
-                    if i == 0:
-                        exclude = st.checkbox(
-                            str(i), value=False, key=f"exclude1_{i}", disabled=True
-                        )
-                    else:
-                        exclude = st.checkbox(str(i), key=f"exclude1_{i}")
-                with cols[1]:
-                    display_img = row_img
-                    if exclude:
-                        display_img = apply_transparent_gray(row_img)
-                    st.image(display_img, use_container_width=True)
-                if exclude:
-                    excluded_rows1.append(i)
-                row_segments1.append((row_img, exclude))
+        render_team_picker(1, encoder)
 
     with col2:
-        img2 = upload_image("Imagem do Time 2")
-        if img2:
-            num_rows2 = get_num_rows(img2)
-            excluded_rows2 = []
-            row_segments2 = []
-            arr2 = np.array(img2)
-            for i in range(num_rows2):
-                y0 = i * ROW_HEIGHT
-                y1 = y0 + ROW_HEIGHT
-                row_img = Image.fromarray(arr2[y0:y1, :, :])
-                cols = st.columns([1, 12])
-                with cols[0]:
-                    if i == 0:
-                        exclude = st.checkbox(
-                            str(i), value=False, key=f"exclude2_{i}", disabled=True
-                        )
-                    else:
-                        exclude = st.checkbox(str(i), key=f"exclude2_{i}")
-                with cols[1]:
-                    display_img = row_img
-                    if exclude:
-                        display_img = apply_transparent_gray(row_img)
-                    st.image(display_img, use_container_width=True)
-                if exclude:
-                    excluded_rows2.append(i)
-                row_segments2.append((row_img, exclude))
-        else:
-            excluded_rows2 = []
-
-    with col1:
-        # Team 1 download button after Team 1 rows
-        if img1:
-            img1_final = remove_rows(img1, excluded_rows1)
-            if img1_final:
-                download_image(img1_final, "Draft 1")
-            else:
-                st.warning("Nenhuma linha selecionada para manter em Time 1.")
+        render_team_picker(2, encoder)
 
-    with col2:
-        # Team 2 download button after Team 2 rows
-        if img2:
-            img2_final = remove_rows(img2, excluded_rows2)
-            if img2_final:
-                download_image(img2_final, "Draft 2")
-            else:
-                st.warning("Nenhuma linha selecionada para manter em Time 2.")
+    render_session_export("draft")
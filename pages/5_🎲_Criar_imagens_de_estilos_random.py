@@ -1,18 +1,21 @@
-from typing import List, Optional, Tuple
+from typing import Tuple
 
 import streamlit as st
 
 from backend.composers.style_image_composer import PlayerStyleImageComposer
 from backend.utils import PLAYERS_FOLDER, STYLES_FOLDER
+from backend.utils.list_utils import parse_teams_from_text
+from backend.utils.style_assignment import StyleAssignment, assign_styles
 from backend.utils.utils import (
-    assign_unique_styles_to_players,
-    build_image_columns,
-    get_players_df,
+    get_player_search_index,
+    get_session_export,
     hide_header_actions,
-    parse_teams_from_text,
+    render_session_export,
+    search_picker,
 )
 
 IMAGE_SIZE: Tuple[int, int] = (94, 94)
+COMPOSE_WORKERS: int = 4
 
 STYLE_CATEGORIES = {
     "BASIC": [
@@ -70,59 +73,71 @@ def prefill_team_input(selected_players):
     return ""
 
 
-def get_style_pool(selected):
+def get_selected_categories(selected):
     if "Todos" in selected or not selected:
-        return ALL_STYLE_NAMES
-    pool = []
+        return STYLE_CATEGORIES
+
+    return {cat: STYLE_CATEGORIES[cat] for cat in selected if cat in STYLE_CATEGORIES}
 
-    for cat in selected:
-        pool.extend(STYLE_CATEGORIES.get(cat, []))
 
-    return pool
+def get_style_pool(selected):
+    return sum(get_selected_categories(selected).values(), [])
 
 
 def render_team_images_grid(
-    teams: List[List[str]],
-    player_style_pairs: List[List[str]],
+    assignment: StyleAssignment,
     player_style_image_composer: PlayerStyleImageComposer,
     images_per_row: int = 2,
 ) -> None:
     """
     Render team images in a grid layout using Streamlit columns.
+    The grid is laid out first with placeholders, which are filled as each
+    team image completes.
     """
-    images_and_captions: List[Tuple[Optional[object], str]] = []
-    for idx, team in enumerate(teams, 1):
-        team_pairs = [pair for pair in player_style_pairs if pair[0] in team]
-        columns = build_image_columns([team], team_pairs)
-        if columns:
-            try:
-                img = player_style_image_composer.generic.compose(columns, IMAGE_SIZE)
-                if img is not None:
-                    images_and_captions.append((img, f"Time {idx}"))
-                else:
-                    images_and_captions.append(
-                        (None, f"Imagem do time {idx} não pôde ser criada.")
-                    )
-            except Exception as e:
-                images_and_captions.append(
-                    (None, f"Erro ao criar imagem do time {idx}: {e}")
-                )
-        else:
-            images_and_captions.append(
-                (None, f"Nenhuma coluna de imagem gerada para o time {idx}.")
+    placeholders = []
+    for i in range(0, len(assignment.teams), images_per_row):
+        cols = st.columns(images_per_row)
+        for j in range(min(images_per_row, len(assignment.teams) - i)):
+            placeholder = cols[j].empty()
+            placeholder.info(f"Gerando imagem do time {i + j + 1}...")
+            placeholders.append(placeholder)
+
+    team_columns = [
+        assignment.team_columns(idx) for idx in range(len(assignment.teams))
+    ]
+    batch_idxs = [idx for idx, columns in enumerate(team_columns) if columns]
+    for idx, columns in enumerate(team_columns):
+        if not columns:
+            placeholders[idx].warning(
+                f"Nenhuma coluna de imagem gerada para o time {idx + 1}."
             )
 
-    # Display in a grid
-    for i in range(0, len(images_and_captions), images_per_row):
-        cols = st.columns(images_per_row)
-        for j in range(images_per_row):
-            if i + j < len(images_and_captions):
-                img, caption = images_and_captions[i + j]
-                with cols[j]:
-                    if img is not None:
-                        st.image(img, caption=caption)
-                    else:
-                        st.warning(caption)
+    session_export = get_session_export()
+    session_export.remove_prefix("estilos_random_time_")
+
+    results = player_style_image_composer.compose_many(
+        [team_columns[idx] for idx in batch_idxs],
+        IMAGE_SIZE,
+        max_workers=COMPOSE_WORKERS,
+    )
+    for batch_idx, img, error in results:
+        idx = batch_idxs[batch_idx]
+        if error is not None:
+            placeholders[idx].warning(
+                f"Erro ao criar imagem do time {idx + 1}: {error}"
+            )
+        elif img is None:
+            placeholders[idx].warning(f"Imagem do time {idx + 1} não pôde ser criada.")
+        else:
+            placeholders[idx].image(img, caption=f"Time {idx + 1}")
+            session_export.add(
+                f"estilos_random_time_{idx + 1}",
+                img,
+                page="estilos_random",
+                team=idx + 1,
+                seed=assignment.seed,
+                columns=team_columns[idx],
+            )
 
 
 if __name__ == "__main__":
@@ -157,11 +172,30 @@ if __name__ == "__main__":
             key="category_multiselect_random_style",
         )
 
-    players_df = get_players_df()
-    player_options = players_df["Name"].tolist()
-    selected_players = st.multiselect(
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        unique_within_team = st.checkbox(
+            "Sem estilos repetidos no time",
+            key="unique_within_team_random_style",
+        )
+    with col2:
+        balance_categories = st.checkbox(
+            "Equilibrar categorias",
+            key="balance_categories_random_style",
+        )
+    with col3:
+        seed = st.number_input(
+            "Semente",
+            min_value=0,
+            value=None,
+            step=1,
+            help="Deixe vazio para uma semente aleatória.",
+            key="seed_random_style",
+        )
+
+    selected_players = search_picker(
         "Selecione os jogadores",
-        options=player_options,
+        get_player_search_index(),
         key="selected_players_random_style",
     )
 
@@ -201,11 +235,19 @@ if __name__ == "__main__":
                 if not teams:
                     st.error("Insira pelo menos um jogador válido!")
                 else:
-                    player_style_pairs = assign_unique_styles_to_players(
-                        teams, style_pool, num_styles_per_player, warn_func=st.warning
+                    assignment = assign_styles(
+                        teams,
+                        style_pool,
+                        num_styles_per_player,
+                        seed=seed,
+                        unique_within_team=unique_within_team,
+                        categories=get_selected_categories(selected_categories),
+                        balance_categories=balance_categories,
+                        warn_func=st.warning,
                     )
-                    st.session_state["player_styles_data"] = player_style_pairs
+                    st.session_state["player_styles_data"] = assignment.pairs()
 
-                    render_team_images_grid(
-                        teams, player_style_pairs, player_style_image_composer
-                    )
+                    st.markdown(f"**Semente do sorteio:** `{assignment.seed}`")
+                    render_team_images_grid(assignment, player_style_image_composer)
+
+    render_session_export("estilos_random")
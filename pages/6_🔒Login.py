@@ -2,7 +2,13 @@ import time
 
 import streamlit as st
 
-from backend.utils.auth import authenticate_user
+from backend.utils.auth import (
+    authenticate_user,
+    get_client_ip,
+    is_login_throttled,
+    resume_session,
+    start_session,
+)
 from backend.utils.utils import hide_header_actions
 
 
@@ -25,13 +31,12 @@ def login_form():
     placeholder = st.empty()
 
     if login_btn:
-        success, role = authenticate_user(username, password)
+        client_ip = get_client_ip()
+        success, role = authenticate_user(username, password, client_ip=client_ip)
         if success:
             placeholder.empty()
 
-            st.session_state.logged_in = True
-            st.session_state.login = username
-            st.session_state.role = role
+            start_session(username, role)
 
             if not st.session_state.get("showed_login_balloons", False):
                 st.balloons()
@@ -46,7 +51,10 @@ def login_form():
             st.rerun()  # Ensures session state is updated before redirect
         else:
             st.session_state.logged_in = False
-            st.error("Usuário ou senha incorretos.")
+            if is_login_throttled(username, client_ip):
+                st.error("Muitas tentativas de login. Aguarde alguns instantes.")
+            else:
+                st.error("Usuário ou senha incorretos.")
 
 
 if __name__ == "__main__":
@@ -58,7 +66,7 @@ if __name__ == "__main__":
     hide_header_actions()
 
     if "logged_in" not in st.session_state:
-        st.session_state.logged_in = False
+        st.session_state.logged_in = resume_session()
 
     if st.session_state.logged_in:
         st.switch_page("pages/7_👑_Admin.py")
@@ -2,11 +2,15 @@ from datetime import datetime
 
 import streamlit as st
 
+from backend.db import pool_metrics
 from backend.repository import user_repository
-from backend.utils import PLAYERS_FOLDER
-from backend.utils.auth import require_login
-from backend.utils.image_utils import get_or_create_image, handle_player_image_upload
-from backend.utils.utils import hide_header_actions, load_players_df
+from backend.utils.auth import end_session, require_login
+from backend.utils.image_utils import get_player_thumbnail, handle_player_image_upload
+from backend.utils.utils import (
+    get_players_df,
+    hide_header_actions,
+    invalidate_players_catalog,
+)
 
 
 def create_user():
@@ -41,6 +45,83 @@ def create_user():
                     st.error(str(e))
 
 
+def import_users():
+    st.header("Importar usuários")
+    st.caption("Envie um CSV com o cabeçalho `login,password,role`.")
+
+    uploaded_csv = st.file_uploader(
+        label="Arquivo CSV de usuários", type=["csv"], key="import_users_csv"
+    )
+
+    if uploaded_csv is not None and st.button("Importar usuários"):
+        created_at = datetime.now().strftime("%Y-%m-%d")
+        csv_text = uploaded_csv.getvalue().decode("utf-8-sig")
+
+        try:
+            try:
+                users = user_repository.parse_users_csv(
+                    csv_text, user_repository.fetch_roles()
+                )
+            except ValueError:
+                # A role may have been added since the roles were cached
+                user_repository.invalidate_roles_cache()
+                users = user_repository.parse_users_csv(
+                    csv_text, user_repository.fetch_roles()
+                )
+
+            with st.spinner("Importando usuários..."):
+                count = user_repository.create_users(created_at, users)
+            st.success(f"{count} usuário(s) importado(s) com sucesso!")
+        except Exception as e:
+            st.error(str(e))
+
+
+def manage_roles():
+    st.header("Papéis")
+
+    try:
+        roles = user_repository.fetch_roles()
+    except Exception as e:
+        st.error(str(e))
+        roles = []
+    role_options = {name: role_id for role_id, name in roles}
+
+    with st.form("create_role_form", clear_on_submit=True):
+        name = st.text_input("Nome do novo papel")
+        if st.form_submit_button("Criar papel"):
+            if not name.strip():
+                st.warning("Informe o nome do papel.")
+            else:
+                try:
+                    user_repository.create_role(name.strip())
+                    st.success(f"Papel '{name.strip()}' criado com sucesso!")
+                except Exception as e:
+                    st.error(str(e))
+
+    if not role_options:
+        return
+
+    with st.form("edit_role_form"):
+        role_name = st.selectbox("Papel", list(role_options.keys()))
+        new_name = st.text_input("Novo nome")
+        rename_col, delete_col = st.columns(2)
+        rename = rename_col.form_submit_button("Renomear papel")
+        delete = delete_col.form_submit_button("Excluir papel")
+
+        try:
+            if rename:
+                if not new_name.strip():
+                    st.warning("Informe o novo nome do papel.")
+                elif user_repository.rename_role(
+                    role_options[role_name], new_name.strip()
+                ):
+                    st.success(f"Papel '{role_name}' renomeado.")
+            elif delete and user_repository.delete_role(role_options[role_name]):
+                st.success(f"Papel '{role_name}' excluído.")
+        except Exception as e:
+            st.error(str(e))
+
+
 def upload_image():
     st.header("Adicionar imagens de jogadores")
 
@@ -63,6 +144,7 @@ def upload_image():
                 if status == "error":
                     st.error(message)
                 elif status == "success":
+                    invalidate_players_catalog()
                     st.success(message)
     else:
         st.info("Você não tem permissão para fazer upload de imagens de jogadores.")
@@ -70,7 +152,7 @@ def upload_image():
     with st.sidebar:
         st.write("### Lista de jogadores")
         with st.container(height=250):
-            players_df = load_players_df()
+            players_df = get_players_df()
             num_cols = 5
             num_rows = (len(players_df) + num_cols - 1) // num_cols
 
@@ -80,11 +162,7 @@ def upload_image():
                     index = i * num_cols + j
                     if index < len(players_df):
                         player_name = players_df.iloc[index]["Name"]
-                        player_image = get_or_create_image(
-                            folder_path=PLAYERS_FOLDER,
-                            image_name=player_name,
-                            size=(32, 32),
-                        )
+                        player_image = get_player_thumbnail(player_name)
                         with col:
                             st.image(player_image)
                             st.write(
@@ -104,5 +182,15 @@ if __name__ == "__main__":
 
     st.title("Admin")
 
+    if st.sidebar.button("Sair", key="logout_btn"):
+        end_session()
+        st.success("Sessão encerrada.")
+        st.stop()
+
     create_user()
+    import_users()
+    manage_roles()
     upload_image()
+
+    with st.expander("Conexões com o banco de dados"):
+        st.json(pool_metrics())
@@ -0,0 +1,105 @@
+"""
+Memory benchmark of the streaming PNG path against compose() + PIL save.
+
+Each (mode, players) case runs in a fresh process, which warms the tile cache
+first and then reports how much its peak RSS grew while rendering. PIL
+allocates image memory outside tracemalloc, so RSS is the fair measure here.
+Uses the local players and accessories when present, blank tiles otherwise.
+
+Usage:
+    python -m scripts.benchmark_streaming_png --players 64 256 1024
+"""
+
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from backend.composers.generic_image_composer import GenericImageComposer
+from backend.utils import ACCESSORIES_FOLDER, PLAYERS_FOLDER
+from backend.utils.image_utils import TileCache
+
+MODES = ("pil", "stream")
+TILE_SIZE = (94, 94)
+
+
+def build_entities(num_players: int, seed: int = 0):
+    rng = random.Random(seed)
+    players = sorted(path.stem for path in PLAYERS_FOLDER.glob("*.png")) or ["p"]
+    accessories = sorted(path.stem for path in ACCESSORIES_FOLDER.glob("*.png"))
+    accessories = accessories or ["a"]
+    return [
+        [rng.choice(players)] + [rng.choice(accessories) for _ in range(7)]
+        for _ in range(num_players)
+    ]
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_case(mode: str, num_players: int) -> dict:
+    composer = GenericImageComposer(PLAYERS_FOLDER, ACCESSORIES_FOLDER, TileCache())
+    entities = build_entities(num_players)
+    for tiles in composer._column_tiles(entities):
+        for folder, name in tiles:
+            composer._get_image(folder, name, TILE_SIZE)
+
+    # Written to a file, so the encoded output is not counted as memory
+    with tempfile.TemporaryFile() as output:
+        baseline = peak_rss_bytes()
+        start = time.perf_counter()
+        if mode == "pil":
+            composer.compose(entities, TILE_SIZE).save(output, format="PNG")
+        else:
+            composer.compose_to_png(entities, TILE_SIZE, output)
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_bytes() - baseline
+        png_bytes = output.tell()
+
+    width, height = composer.composite_size(entities, TILE_SIZE)
+    return {
+        "mode": mode,
+        "players": num_players,
+        "canvas_mb": width * height * 3 / 2**20,
+        "peak_mb": peak / 2**20,
+        "seconds": elapsed,
+        "png_mb": png_bytes / 2**20,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--players", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--case", nargs=2, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.case:
+        print(json.dumps(run_case(args.case[0], int(args.case[1]))))
+        sys.exit(0)
+
+    print(
+        f"{'players':>8}{'mode':>8}{'canvas MB':>11}{'peak MB':>9}"
+        f"{'seconds':>9}{'PNG MB':>8}"
+    )
+    for num_players in args.players:
+        for mode in MODES:
+            child = subprocess.run(
+                [sys.executable, "-m", __spec__.name, "--case", mode, str(num_players)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            r = json.loads(child.stdout)
+            print(
+                f"{r['players']:>8}{r['mode']:>8}{r['canvas_mb']:>11.1f}"
+                f"{r['peak_mb']:>9.1f}{r['seconds']:>9.2f}{r['png_mb']:>8.2f}"
+            )
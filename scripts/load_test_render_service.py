@@ -0,0 +1,111 @@
+"""
+Local load test of the render service (backend/server.py).
+
+Starts the service in-process on a free port (or targets --url), then fires
+--requests requests from --clients concurrent clients. The requests cycle
+through --distinct tournament specs built from the local players and
+accessories, so bursts of identical requests exercise coalescing and the
+render cache. Reports throughput, latency percentiles, status codes and the
+service counters.
+
+Usage:
+    python -m scripts.load_test_render_service --clients 32 --requests 2000
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.server import RenderServer, RenderService
+from backend.utils import ACCESSORIES_FOLDER, PLAYERS_FOLDER
+
+
+def build_specs(distinct: int, players_per_spec: int = 8, seed: int = 0):
+    rng = random.Random(seed)
+    players = sorted(path.stem for path in PLAYERS_FOLDER.glob("*.png"))
+    accessories = sorted(path.stem for path in ACCESSORIES_FOLDER.glob("*.png"))
+    if not players or not accessories:
+        raise SystemExit(f"No images found in {PLAYERS_FOLDER} / {ACCESSORIES_FOLDER}")
+
+    specs = []
+    for _ in range(distinct):
+        chosen = rng.sample(players, min(players_per_spec, len(players)))
+        lines = [", ".join([player] + rng.sample(accessories, 6)) for player in chosen]
+        specs.append({"players_data": "\n".join(lines)})
+    return specs
+
+
+def send(url: str, body: bytes):
+    request = urllib.request.Request(url, data=body)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = "connection error"
+    return status, time.perf_counter() - start
+
+
+def run(base_url: str, specs, clients: int, requests: int):
+    bodies = [json.dumps(spec).encode("utf-8") for spec in specs]
+    url = f"{base_url}/compose"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        results = list(
+            executor.map(lambda i: send(url, bodies[i % len(bodies)]), range(requests))
+        )
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for _, latency in results]) * 1000
+    statuses = Counter(status for status, _ in results)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{requests} requests, {clients} clients, {len(specs)} distinct specs")
+    print(f"throughput: {requests / elapsed:.1f} req/s in {elapsed:.2f}s")
+    print(
+        f"latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}  max {latencies.max():.1f}"
+    )
+    print(f"status: {dict(statuses)}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", help="Existing service; default starts one in-process")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=32)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    specs = build_specs(args.distinct)
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        service = RenderService(workers=args.workers, queue_size=args.queue_size)
+        server = RenderServer(("127.0.0.1", 0), service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    run(base_url.rstrip("/"), specs, args.clients, args.requests)
+
+    with urllib.request.urlopen(f"{base_url}/health") as response:
+        print(f"service: {json.loads(response.read())}")
+    if server is not None:
+        server.shutdown()
+        server.server_close()
@@ -27,11 +27,14 @@ class TestAccessoryAgentService(TestCase):
             ),
         ):
             from backend.services.accessory_agent_service import AccessoryAgentService
+            from backend.services.resilience import CircuitBreaker
 
             self.service = AccessoryAgentService(
                 api_key=self.api_key,
                 supabase_url="https://test.supabase.co",
                 supabase_key="test_supabase_key",
+                gemini_breaker=CircuitBreaker("gemini"),
+                supabase_breaker=CircuitBreaker("supabase"),
             )
 
     @patch("google.generativeai.configure")
@@ -171,14 +174,12 @@ class TestAccessoryAgentService(TestCase):
             "backend.services.accessory_agent_service",
             fromlist=["AccessoryAgentService"],
         ).AccessoryAgentService,
-        "_find_accessory_id",
+        "_find_accessory_ids",
     )
     def test_get_accessory_ids_single_player(self, mock_find):
         """Test getting accessory IDs for a single player."""
-        mock_find.side_effect = lambda name: {
-            "Red Cape": "k_ksset3",
-            "Blue Shield": "xmas_sword",
-        }.get(name)
+        ids = {"Red Cape": "k_ksset3", "Blue Shield": "xmas_sword"}
+        mock_find.side_effect = lambda names: [ids.get(name) for name in names]
 
         result = self.service.get_accessory_ids("Player1, Red Cape, Blue Shield")
 
@@ -189,32 +190,37 @@ class TestAccessoryAgentService(TestCase):
             "backend.services.accessory_agent_service",
             fromlist=["AccessoryAgentService"],
         ).AccessoryAgentService,
-        "_find_accessory_id",
+        "_find_accessory_ids",
     )
     def test_get_accessory_ids_multiple_players(self, mock_find):
         """Test getting accessory IDs for multiple players."""
-        mock_find.side_effect = lambda name: {
+        ids = {
             "Red Cape": "k_ksset3",
             "Blue Shield": "xmas_sword",
             "Green Sword": "dw1_black",
-        }.get(name)
+        }
+        mock_find.side_effect = lambda names: [ids.get(name) for name in names]
 
         input_text = "Player1, Red Cape, Blue Shield\nPlayer2, Green Sword, Red Cape"
         result = self.service.get_accessory_ids(input_text)
 
         self.assertIn("Player1,k_ksset3,xmas_sword", result)
         self.assertIn("Player2,dw1_black,k_ksset3", result)
+        # The whole paste is resolved in a single batch
+        mock_find.assert_called_once_with(
+            ["Red Cape", "Blue Shield", "Green Sword", "Red Cape"]
+        )
 
     @patch.object(
         __import__(
             "backend.services.accessory_agent_service",
             fromlist=["AccessoryAgentService"],
         ).AccessoryAgentService,
-        "_find_accessory_id",
+        "_find_accessory_ids",
     )
     def test_get_accessory_ids_no_match(self, mock_find):
         """Test getting accessory IDs with no matches keeps original names."""
-        mock_find.return_value = None
+        mock_find.return_value = [None]
 
         result = self.service.get_accessory_ids("Player1, NonExistentItem")
 
@@ -262,11 +268,13 @@ class TestAccessoryAgentService(TestCase):
             "backend.services.accessory_agent_service",
             fromlist=["AccessoryAgentService"],
         ).AccessoryAgentService,
-        "_find_accessory_id",
+        "_find_accessory_ids",
     )
     def test_get_accessory_ids_skips_empty_parts(self, mock_find):
         """Test that lines producing empty parts are skipped."""
-        mock_find.side_effect = lambda name: {"Sword": "id_sword"}.get(name)
+        mock_find.side_effect = lambda names: [
+            {"Sword": "id_sword"}.get(name) for name in names
+        ]
 
         # The ",,,," line produces parts=[] after stripping blanks
         input_text = ",,,,\nPlayer1, Sword"
@@ -279,7 +287,7 @@ class TestAccessoryAgentService(TestCase):
             "backend.services.accessory_agent_service",
             fromlist=["AccessoryAgentService"],
         ).AccessoryAgentService,
-        "_find_accessory_id",
+        "_find_accessory_ids",
     )
     def test_get_accessory_ids_exception_returns_error(self, mock_find):
         """Test that unexpected exceptions in get_accessory_ids return error string."""
@@ -289,3 +297,145 @@ class TestAccessoryAgentService(TestCase):
 
         self.assertTrue(result.startswith("Error:"))
         self.assertIn("Unexpected error", result)
+
+    @patch("google.generativeai.embed_content")
+    def test_find_accessory_ids_single_rpc_call(self, mock_embed):
+        """Test that many names are embedded and matched in one round trip."""
+        mock_embed.return_value = {"embedding": [[0.1] * 768, [0.2] * 768]}
+
+        mock_rpc_response = MagicMock()
+        mock_rpc_response.data = [
+            {
+                "query_index": 0,
+                "accessory_id": "k_ksset3",
+                "accessory_name": "Long Boots",
+                "similarity": 0.95,
+            },
+            {
+                "query_index": 0,
+                "accessory_id": "id_other",
+                "accessory_name": "Other Boots",
+                "similarity": 0.80,
+            },
+        ]
+        self.mock_supabase.rpc.return_value.execute.return_value = mock_rpc_response
+
+        result = self.service._find_accessory_ids(
+            ["Long Boots", "Unknown", "Long Boots"]
+        )
+
+        self.assertEqual(result, ["k_ksset3", None, "k_ksset3"])
+        mock_embed.assert_called_once()
+        self.assertEqual(
+            mock_embed.call_args.kwargs["content"], ["Long Boots", "Unknown"]
+        )
+        self.mock_supabase.rpc.assert_called_once()
+        name, params = self.mock_supabase.rpc.call_args.args
+        self.assertEqual(name, "match_accessories")
+        self.assertEqual(len(params["query_embeddings"]), 2)
+        self.assertTrue(params["query_embeddings"][0].startswith("[0.1,"))
+
+    @patch("google.generativeai.embed_content")
+    def test_find_accessory_ids_exception_returns_none(self, mock_embed):
+        """Test that a failed batch returns None for every name."""
+        mock_embed.side_effect = RuntimeError("Embedding API down")
+
+        result = self.service._find_accessory_ids(["A", "B"])
+
+        self.assertEqual(result, [None, None])
+
+    def test_find_accessory_ids_empty(self):
+        """Test that an empty batch makes no calls."""
+        self.assertEqual(self.service._find_accessory_ids([]), [])
+        self.mock_supabase.rpc.assert_not_called()
+
+    @patch("google.generativeai.embed_content")
+    def test_find_accessory_ids_uses_local_index(self, mock_embed):
+        """Test that a local index replaces the Supabase round trip."""
+        import numpy as np
+
+        from backend.services.accessory_index import QuantizedAccessoryIndex
+
+        mock_embed.return_value = {"embedding": [[1.0, 0.0], [0.0, -1.0]]}
+        self.service.local_index = QuantizedAccessoryIndex(
+            ["k_ksset3", "xmas_sword"], ["Long Boots", "Xmas Sword"], np.eye(2)
+        )
+
+        result = self.service._find_accessory_ids(["Long Boots", "Nothing"])
+
+        self.assertEqual(result, ["k_ksset3", None])
+        self.mock_supabase.rpc.assert_not_called()
+
+    @patch("google.generativeai.embed_content")
+    def test_find_accessory_ids_outage_uses_lexical_fallback(self, mock_embed):
+        """Test that a provider outage falls back to local lexical matching."""
+        from backend.services.resilience import LexicalMatcher
+
+        mock_embed.side_effect = RuntimeError("Embedding API down")
+        self.service.lexical_matcher = LexicalMatcher(
+            ["longboots1", "drill"], ["Long Boots", "Drill Hand"]
+        )
+
+        result = self.service._find_accessory_ids(["Long Boot", "Drill Hnd"])
+
+        self.assertEqual(result, ["longboots1", "drill"])
+
+    @patch("google.generativeai.embed_content")
+    def test_open_circuit_skips_provider(self, mock_embed):
+        """Test that repeated failures open the circuit and stop calling Gemini."""
+        mock_embed.side_effect = RuntimeError("Embedding API down")
+
+        for _ in range(self.service.gemini_breaker.failure_threshold):
+            self.assertEqual(self.service._find_accessory_ids(["A"]), [None])
+        calls_until_open = mock_embed.call_count
+
+        self.assertEqual(self.service._find_accessory_ids(["A"]), [None])
+        self.assertEqual(mock_embed.call_count, calls_until_open)
+
+    @patch("google.generativeai.embed_content")
+    def test_slow_disambiguation_falls_back_to_top_match(self, mock_embed):
+        """Test that a Gemini call past its deadline uses the top match."""
+        import time
+
+        mock_embed.return_value = {"embedding": [0.1] * 768}
+        mock_rpc_response = MagicMock()
+        mock_rpc_response.data = [
+            {"accessory_id": "id_top", "accessory_name": "Top", "similarity": 0.8},
+            {"accessory_id": "id_2", "accessory_name": "Second", "similarity": 0.75},
+        ]
+        self.mock_supabase.rpc.return_value.execute.return_value = mock_rpc_response
+        self.mock_model.generate_content.side_effect = lambda prompt: time.sleep(0.5)
+        self.service.timeout = 0.05
+
+        start = time.monotonic()
+        result = self.service._find_accessory_id("Some Query")
+
+        self.assertEqual(result, "id_top")
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    @patch("google.generativeai.embed_content")
+    def test_find_accessory_ids_disambiguates_within_one_deadline(self, mock_embed):
+        """Test that many slow disambiguations share one deadline."""
+        import time
+
+        names = [f"Name {i}" for i in range(20)]
+        mock_embed.return_value = {"embedding": [[0.1] * 768] * len(names)}
+        mock_rpc_response = MagicMock()
+        mock_rpc_response.data = [
+            {
+                "query_index": i,
+                "accessory_id": f"id_{i}",
+                "accessory_name": f"Top {i}",
+                "similarity": 0.8,
+            }
+            for i in range(len(names))
+        ]
+        self.mock_supabase.rpc.return_value.execute.return_value = mock_rpc_response
+        self.mock_model.generate_content.side_effect = lambda prompt: time.sleep(0.5)
+        self.service.timeout = 0.1
+
+        start = time.monotonic()
+        result = self.service._find_accessory_ids(names)
+
+        self.assertEqual(result, [f"id_{i}" for i in range(len(names))])
+        self.assertLess(time.monotonic() - start, 0.6)
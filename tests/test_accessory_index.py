@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from backend.services.accessory_index import (
+    QuantizedAccessoryIndex,
+    _popcount64,
+    load_accessory_index,
+    quantize_binary,
+    recall_report,
+)
+
+
+def clustered_vectors(n=400, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n // 4, dim))
+    return centers[rng.integers(0, len(centers), n)] + rng.normal(
+        scale=0.5, size=(n, dim)
+    )
+
+
+def make_index(vectors, quantization="int8", **kwargs):
+    ids = [f"id_{i}" for i in range(len(vectors))]
+    names = [f"Accessory {i}" for i in range(len(vectors))]
+    return QuantizedAccessoryIndex(ids, names, vectors, quantization, **kwargs)
+
+
+def test_popcount64():
+    values = np.array([0, 1, 0xFF, 2**64 - 1, 0x8000000000000001], dtype=np.uint64)
+
+    assert _popcount64(values).tolist() == [0, 1, 8, 64, 2]
+
+
+def test_quantize_binary_pads_to_words():
+    codes = quantize_binary(np.ones((2, 70), dtype=np.float32))
+
+    assert codes.dtype == np.uint64
+    assert codes.shape == (2, 2)
+    assert _popcount64(codes).sum(axis=1).tolist() == [70, 70]
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_search_finds_own_vectors(quantization):
+    vectors = clustered_vectors()
+    index = make_index(vectors, quantization)
+
+    indices, similarities = index.search(vectors[:50], k=3)
+
+    assert indices[:, 0].tolist() == list(range(50))
+    assert np.allclose(similarities[:, 0], 1, atol=1e-5)
+    # Best first
+    assert (np.diff(similarities, axis=1) <= 0).all()
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_rescored_similarities_are_exact(quantization):
+    vectors = clustered_vectors()
+    queries = clustered_vectors(20, seed=1)
+    index = make_index(vectors, quantization, rescore_candidates=len(vectors))
+
+    approx_indices, approx_similarities = index.search(queries, k=3)
+    exact_indices, exact_similarities = index.search(queries, k=3, exact=True)
+
+    assert np.array_equal(approx_indices, exact_indices)
+    assert np.allclose(approx_similarities, exact_similarities, atol=1e-5)
+
+
+def test_invalid_quantization():
+    with pytest.raises(ValueError):
+        make_index(clustered_vectors(8), "float16")
+
+
+def test_match_rows_like_rpc():
+    vectors = np.eye(4, dtype=np.float32)
+    index = make_index(vectors)
+
+    (matches,) = index.match([[1, 0.1, 0, 0]], match_threshold=0.5, match_count=3)
+
+    assert matches == [
+        {
+            "accessory_id": "id_0",
+            "accessory_name": "Accessory 0",
+            "similarity": pytest.approx(0.995, abs=1e-3),
+        }
+    ]
+
+
+def test_save_and_load_memory_maps_vectors(tmp_path):
+    vectors = clustered_vectors()
+    make_index(vectors).save(tmp_path)
+
+    index = load_accessory_index(tmp_path, "binary")
+
+    assert isinstance(index.vectors, np.memmap)
+    assert index.accessory_ids[3] == "id_3"
+    assert index.resident_bytes < np.asarray(index.vectors).nbytes
+    assert index.search(vectors[3:4])[0][0, 0] == 3
+
+
+def test_load_accessory_index_missing(tmp_path):
+    assert load_accessory_index(None) is None
+    assert load_accessory_index(tmp_path) is None
+
+
+def test_recall_report():
+    vectors = clustered_vectors()
+    queries = vectors[:40] + np.random.default_rng(2).normal(
+        scale=0.2, size=(40, vectors.shape[1])
+    )
+
+    report = recall_report(vectors, queries, k=3, repeats=1)
+
+    assert [line["mode"] for line in report] == [
+        "float32 exact",
+        "int8 + rescore top 32",
+        "binary + rescore top 32",
+    ]
+    assert report[1]["resident_bytes"] < report[0]["resident_bytes"]
+    assert report[2]["resident_bytes"] < report[1]["resident_bytes"]
+    assert all(line["recall"] > 0.9 for line in report)
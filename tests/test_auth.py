@@ -1,9 +1,11 @@
+from contextlib import nullcontext
 from unittest.mock import MagicMock, patch
 
 import bcrypt
 import pytest
 
 from backend.utils import auth
+from backend.utils.rate_limit import RateLimiter
 
 # Set up test credentials (these should correspond to test users in your DB)
 TEST_USERS = [
@@ -11,6 +13,12 @@ TEST_USERS = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limiters(monkeypatch):
+    monkeypatch.setattr(auth, "LOGIN_RATE_LIMITER", RateLimiter(3, 0))
+    monkeypatch.setattr(auth, "IP_RATE_LIMITER", RateLimiter(5, 0))
+
+
 @pytest.mark.parametrize("user", TEST_USERS)
 def test_authenticate_user_valid(user):
     hashed = bcrypt.hashpw(user["password"].encode(), bcrypt.gensalt()).decode()
@@ -20,7 +28,7 @@ def test_authenticate_user_valid(user):
     mock_conn = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    with patch.object(auth.psycopg2, "connect", return_value=mock_conn):
+    with patch.object(auth, "get_connection", return_value=nullcontext(mock_conn)):
         success, role = auth.authenticate_user(user["login"], user["password"])
 
     assert success is True
@@ -33,7 +41,7 @@ def test_authenticate_user_invalid():
     mock_conn = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    with patch.object(auth.psycopg2, "connect", return_value=mock_conn):
+    with patch.object(auth, "get_connection", return_value=nullcontext(mock_conn)):
         success, role = auth.authenticate_user("nonexistent", "wrongpass")
 
     assert success is False
@@ -48,7 +56,7 @@ def test_authenticate_user_wrong_password():
     mock_conn = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    with patch.object(auth.psycopg2, "connect", return_value=mock_conn):
+    with patch.object(auth, "get_connection", return_value=nullcontext(mock_conn)):
         success, role = auth.authenticate_user("guest", "wrongpassword")
 
     assert success is False
@@ -56,10 +64,10 @@ def test_authenticate_user_wrong_password():
 
 
 def test_authenticate_user_exception(monkeypatch):
-    def fake_connect(*args, **kwargs):
+    def fake_get_connection():
         raise Exception("DB connection failed")
 
-    monkeypatch.setattr(auth.psycopg2, "connect", fake_connect)
+    monkeypatch.setattr(auth, "get_connection", fake_get_connection)
 
     success, role = auth.authenticate_user("guest", "guest")
 
@@ -83,3 +91,129 @@ def test_require_login_redirect(monkeypatch):
 
     auth.require_login("loginpage.py")
     assert called["page"] == "loginpage.py"
+
+
+def test_authenticate_user_rate_limited_per_login():
+    mock_get_connection = MagicMock()
+
+    with patch.object(auth, "get_connection", mock_get_connection):
+        for _ in range(3):
+            mock_get_connection.return_value = nullcontext(MagicMock())
+            auth.authenticate_user("guest", "wrongpassword")
+
+        assert auth.is_login_throttled("guest")
+        calls_before = mock_get_connection.call_count
+        success, role = auth.authenticate_user("guest", "guest")
+
+    assert (success, role) == (False, None)
+    # Rejected before touching the database or bcrypt
+    assert mock_get_connection.call_count == calls_before
+    assert not auth.is_login_throttled("other")
+
+
+def test_authenticate_user_rate_limited_per_ip():
+    mock_get_connection = MagicMock(return_value=nullcontext(MagicMock()))
+
+    with patch.object(auth, "get_connection", mock_get_connection):
+        for i in range(5):
+            mock_get_connection.return_value = nullcontext(MagicMock())
+            auth.authenticate_user(f"user{i}", "pw", client_ip="10.0.0.1")
+
+        assert auth.is_login_throttled("fresh", client_ip="10.0.0.1")
+        assert auth.authenticate_user("fresh", "pw", client_ip="10.0.0.1") == (
+            False,
+            None,
+        )
+
+
+def test_failed_logins_from_one_ip_do_not_lock_others_out():
+    with patch.object(
+        auth, "get_connection", MagicMock(return_value=nullcontext(MagicMock()))
+    ):
+        for _ in range(3):
+            auth.authenticate_user("guest", "wrongpassword", client_ip="10.0.0.1")
+
+    assert auth.is_login_throttled("guest", client_ip="10.0.0.1")
+    assert not auth.is_login_throttled("guest", client_ip="10.0.0.2")
+
+
+@pytest.mark.parametrize(
+    "headers, trusted_proxies, expected",
+    [
+        ({"X-Forwarded-For": "6.6.6.6, 1.2.3.4"}, 0, "10.0.0.9"),
+        ({"X-Forwarded-For": "6.6.6.6, 1.2.3.4"}, 1, "1.2.3.4"),
+        ({"X-Forwarded-For": "6.6.6.6, 1.2.3.4, 10.0.0.2"}, 2, "1.2.3.4"),
+        ({"X-Forwarded-For": "1.2.3.4"}, 2, "1.2.3.4"),
+        ({"X-Real-Ip": "1.2.3.4"}, 1, "1.2.3.4"),
+        ({}, 1, "10.0.0.9"),
+    ],
+)
+def test_client_ip_from_headers(headers, trusted_proxies, expected):
+    assert auth.client_ip_from_headers(headers, "10.0.0.9", trusted_proxies) == expected
+
+
+def test_authenticate_user_rehashes_on_cost_change(monkeypatch):
+    hashed = bcrypt.hashpw(b"guest", bcrypt.gensalt(rounds=4)).decode()
+
+    mock_cursor = MagicMock()
+    mock_cursor.fetchone.return_value = (hashed, "guest")
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    rehashed = {}
+    monkeypatch.setattr(auth, "needs_rehash", lambda stored: True)
+    monkeypatch.setattr(
+        auth,
+        "_rehash_password",
+        lambda login, password: rehashed.update(login=login, password=password),
+    )
+
+    with patch.object(auth, "get_connection", return_value=nullcontext(mock_conn)):
+        success, role = auth.authenticate_user("guest", "guest")
+
+    assert success is True
+    assert rehashed == {"login": "guest", "password": "guest"}
+
+
+def test_require_login_resumes_session_from_cookie(monkeypatch):
+    signer = auth.SessionTokenSigner(secret="secret")
+    token = signer.issue("alice", "admin")
+
+    class DummyState(dict):
+        __getattr__ = dict.get
+        __setattr__ = dict.__setitem__
+
+    state = DummyState()
+    monkeypatch.setattr(auth, "SESSION_SIGNER", signer)
+    monkeypatch.setattr(auth.st, "session_state", state)
+    monkeypatch.setattr(auth, "_get_session_cookie", lambda: token)
+    monkeypatch.setattr(
+        auth.st, "switch_page", lambda page: pytest.fail("should not redirect")
+    )
+
+    auth.require_login("loginpage.py")
+
+    assert state["logged_in"] is True
+    assert state["login"] == "alice"
+    assert state["role"] == "admin"
+
+
+def test_end_session_revokes_token(monkeypatch):
+    signer = auth.SessionTokenSigner(secret="secret")
+    token = signer.issue("alice", "admin")
+
+    class DummyState(dict):
+        __getattr__ = dict.get
+        __setattr__ = dict.__setitem__
+
+    state = DummyState(logged_in=True, role="admin", session_token=token)
+    monkeypatch.setattr(auth, "SESSION_SIGNER", signer)
+    monkeypatch.setattr(auth.st, "session_state", state)
+    monkeypatch.setattr(auth, "_get_session_cookie", lambda: token)
+    monkeypatch.setattr(auth, "_set_session_cookie", lambda value, max_age: None)
+
+    auth.end_session()
+
+    assert "logged_in" not in state
+    assert signer.verify(token) is None
+    assert auth.resume_session() is False
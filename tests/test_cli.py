@@ -0,0 +1,127 @@
+import json
+
+import pytest
+from PIL import Image
+
+from backend import cli
+
+SPECS = [
+    {
+        "name": "semana_1",
+        "players_data": "p1, acc1, acc2\np2, acc1",
+        "teams": ["p1, p2", "p2"],
+    },
+    {
+        "name": "estilos",
+        "kind": "styles",
+        "players_data": [["p1", "style1"], ["p2", "style1"]],
+    },
+    {"name": "quebrado", "players_data": "p1"},
+]
+
+
+@pytest.fixture
+def folders(tmp_path):
+    folders = {}
+    for name, tiles in [
+        ("players", ["p1", "p2"]),
+        ("accs", ["acc1", "acc2"]),
+        ("styles", ["style1"]),
+    ]:
+        folder = tmp_path / name
+        folder.mkdir()
+        for i, tile in enumerate(tiles):
+            Image.new("RGB", (20, 20), (i * 50, 0, 0)).save(folder / f"{tile}.png")
+        folders[name] = folder
+    return folders
+
+
+def render(folders, output_dir, workers):
+    return cli.render_batch(
+        SPECS,
+        output_dir,
+        workers=workers,
+        image_size=(8, 8),
+        image_format="png",
+        players_folder=folders["players"],
+        accessories_folder=folders["accs"],
+        styles_folder=folders["styles"],
+    )
+
+
+def test_load_specs_from_jsonl_and_directory(tmp_path):
+    (tmp_path / "liga.jsonl").write_text(
+        json.dumps(SPECS[0]) + "\n\n" + json.dumps({"players_data": "p1, a"}) + "\n"
+    )
+    (tmp_path / "final.json").write_text(json.dumps({"players_data": "p2, b"}))
+
+    assert [spec["name"] for spec in cli.load_specs(tmp_path / "liga.jsonl")] == [
+        "semana_1",
+        "liga_3",
+    ]
+    assert [spec["name"] for spec in cli.load_specs(tmp_path)] == [
+        "final",
+        "semana_1",
+        "liga_3",
+    ]
+
+
+def test_load_specs_rejects_duplicate_names(tmp_path):
+    path = tmp_path / "specs.jsonl"
+    path.write_text(json.dumps(SPECS[0]) + "\n" + json.dumps(SPECS[0]) + "\n")
+
+    with pytest.raises(cli.SpecError):
+        cli.load_specs(path)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_batch_writes_images_and_report(folders, tmp_path, workers):
+    output_dir = tmp_path / "out"
+    report = render(folders, output_dir, workers)
+
+    assert [entry["name"] for entry in report["entries"]] == [
+        "semana_1",
+        "estilos",
+        "quebrado",
+    ]
+    assert report["images"] == 4
+    assert report["failed"] == 1
+    assert "error" in report["entries"][2]
+
+    tournament = Image.open(output_dir / "semana_1" / "tournament.png")
+    # Two 8 px columns, as tall as the longest one (p1 + 2 accessories)
+    assert tournament.size == (16, 24)
+    assert Image.open(output_dir / "semana_1" / "team_2.png").size == (8, 16)
+    assert (output_dir / "estilos" / "tournament.png").exists()
+    assert json.loads((output_dir / "report.json").read_text()) == report
+
+
+def test_worker_tile_cache_stays_warm_across_specs(folders, tmp_path):
+    report = render(folders, tmp_path / "out", workers=1)
+    semana, estilos, _ = report["entries"]
+
+    # p1, p2, acc1 and acc2 are loaded once, then reused by the team images
+    assert semana["tiles_loaded"] == 4
+    # Only style1 is new; the players come from the warm cache
+    assert estilos["tiles_loaded"] == 1
+
+
+def test_main_exit_code_and_summary(folders, tmp_path, capsys):
+    specs_path = tmp_path / "specs.jsonl"
+    specs_path.write_text(json.dumps(SPECS[0]) + "\n")
+    args = [
+        str(specs_path),
+        "-o",
+        str(tmp_path / "out"),
+        "--workers",
+        "1",
+        "--players-folder",
+        str(folders["players"]),
+        "--accessories-folder",
+        str(folders["accs"]),
+    ]
+
+    assert cli.main(args) == 0
+    assert "1 specs, 3 images, 0 failed" in capsys.readouterr().out
+    assert (tmp_path / "out" / "semana_1" / "tournament.jpg").exists()
+    assert cli.main([str(tmp_path / "missing.jsonl")]) == 2
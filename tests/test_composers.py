@@ -1,6 +1,9 @@
+import io
+import tracemalloc
 from pathlib import Path
 from unittest.mock import patch
 
+import numpy as np
 import pytest
 from PIL import Image
 
@@ -13,6 +16,7 @@ from backend.composers.style_image_composer import (
     PlayerStyleImageComposer,
     TeamStyleImageComposer,
 )
+from backend.utils.image_utils import TileCache
 from backend.validators.tournament_validator import TournamentDataValidator
 
 
@@ -61,6 +65,51 @@ def test_generic_team_image_composer_compose_team(
     assert mock_create_column_image.call_count == 1
 
 
+def test_generic_image_composer_compose_many():
+    composer = GenericImageComposer(Path("base"), Path("modifier"))
+
+    def fake_compose(entities_data, image_size):
+        if entities_data == "boom":
+            raise ValueError("boom")
+        return f"image-{entities_data}"
+
+    with patch.object(composer, "compose", side_effect=fake_compose):
+        serial = list(composer.compose_many(["a", "boom", "c"], (10, 20), 1))
+        parallel = sorted(
+            composer.compose_many(["a", "boom", "c"], (10, 20), 3),
+            key=lambda result: result[0],
+        )
+
+    for results in (serial, parallel):
+        assert [(idx, img) for idx, img, _ in results] == [
+            (0, "image-a"),
+            (1, None),
+            (2, "image-c"),
+        ]
+        assert isinstance(results[1][2], ValueError)
+        assert results[0][2] is None
+
+
+@patch("backend.composers.generic_image_composer.get_or_create_image")
+@patch("backend.composers.generic_image_composer.create_column_image")
+def test_generic_team_image_composer_keeps_member_order(
+    mock_create_column_image, mock_get_or_create_image, dummy_image
+):
+    mock_get_or_create_image.return_value = dummy_image
+    mock_create_column_image.return_value = dummy_image
+
+    composer = GenericImageComposer(Path("base"), Path("modifier"))
+    team_composer = GenericTeamImageComposer(composer)
+    entities_data = [["p1", "a"], ["p2", "b"], ["p1", "c"]]
+
+    with patch.object(
+        composer, "_compose_columns", wraps=composer._compose_columns
+    ) as mock_columns:
+        team_composer.compose_team(["p2", "p1"], entities_data, (10, 20))
+
+    assert mock_columns.call_args[0][0] == [["p2", "b"], ["p1", "a"], ["p1", "c"]]
+
+
 def test_player_image_composer_compose():
     pic = PlayerImageComposer("players", "accessories")
     with patch.object(pic.generic, "compose", return_value="image") as mock_compose:
@@ -103,6 +152,113 @@ def test_team_style_image_composer_compose_team():
         mock_team.assert_called_once()
 
 
+@pytest.fixture
+def tile_folders(tmp_path):
+    for name, tiles in [("players", ["p1", "p2"]), ("accs", ["a", "b", "c"])]:
+        (tmp_path / name).mkdir()
+        for i, tile in enumerate(tiles):
+            color = (40 * i, 200 - 30 * i, 7 * len(tile))
+            Image.new("RGB", (12, 12), color).save(tmp_path / name / f"{tile}.png")
+    return tmp_path / "players", tmp_path / "accs"
+
+
+def test_compose_to_png_matches_compose(tile_folders):
+    composer = GenericImageComposer(*tile_folders)
+    # Uneven columns (black below the short one) and a padded one
+    entities = [["p1", "a", "b"], ["p2"], ["missing", "a", "b", "c", "a", "b"]]
+    buf = io.BytesIO()
+
+    assert composer.compose_to_png(entities, (8, 10), buf) == (24, 80)
+    assert np.array_equal(
+        np.asarray(Image.open(buf)), np.asarray(composer.compose(entities, (8, 10)))
+    )
+
+
+def test_compose_to_png_writes_nothing_when_empty(tmp_path):
+    composer = GenericImageComposer(tmp_path, tmp_path)
+
+    assert composer.compose_to_png([], (8, 8), tmp_path / "out.png") is None
+    assert not (tmp_path / "out.png").exists()
+
+
+def test_compose_teams_to_png_stacks_teams(tile_folders, tmp_path):
+    team_composer = GenericTeamImageComposer(GenericImageComposer(*tile_folders))
+    entities = [["p1", "a", "b"], ["p2", "c"]]
+    output = tmp_path / "teams.png"
+
+    size = team_composer.compose_teams_to_png(
+        [["p1", "p2"], ["nobody"], ["p2"]], entities, (8, 8), output
+    )
+
+    stacked = np.asarray(Image.open(output))
+    both = np.asarray(team_composer.compose_team(["p1", "p2"], entities, (8, 8)))
+    p2 = np.asarray(team_composer.compose_team(["p2"], entities, (8, 8)))
+    assert size == (16, 40)
+    assert np.array_equal(stacked[:24], both)
+    assert np.array_equal(stacked[24:, :8], p2)
+    assert not stacked[24:, 8:].any()
+
+
+def test_compose_pages_wraps_columns_into_grid_pages(tile_folders):
+    composer = GenericImageComposer(*tile_folders)
+    entities = [["p1", "a"], ["p2", "b", "c"], ["p1"], ["p2", "c"], ["p1", "b"]]
+    strip = np.asarray(composer.compose(entities, (8, 8)))
+
+    pages = composer.compose_pages(
+        entities, (8, 8), mode="columns", columns=2, rows_per_page=2
+    )
+
+    assert [page.size for page in pages] == [(16, 40), (16, 16)]
+    first, second = (np.asarray(page) for page in pages)
+    # Grid row heights follow their tallest column
+    assert np.array_equal(first[:24], strip[:24, :16])
+    assert np.array_equal(first[24:], strip[:16, 16:32])
+    assert np.array_equal(second[:, :8], strip[:16, 32:])
+    assert not second[:, 8:].any()
+
+
+def test_compose_pages_defaults_to_the_strip(tile_folders):
+    composer = GenericImageComposer(*tile_folders)
+    entities = [["p1", "a"], ["p2", "b", "c"]]
+
+    (page,) = composer.compose_pages(entities, (8, 8))
+
+    assert np.array_equal(
+        np.asarray(page), np.asarray(composer.compose(entities, (8, 8)))
+    )
+    assert composer.compose_pages([], (8, 8)) == []
+
+
+def test_compose_page_to_png_matches_compose_pages(tile_folders):
+    composer = GenericImageComposer(*tile_folders)
+    entities = [["p1", "a"], ["p2", "b", "c"], ["p1"]]
+    layout = composer.plan_layout(entities, (8, 8), mode="columns", columns=2)
+    buf = io.BytesIO()
+
+    assert composer.compose_page_to_png(entities, (8, 8), layout, 0, buf) == (16, 32)
+    assert np.array_equal(
+        np.asarray(Image.open(buf)),
+        np.asarray(composer.compose_pages(entities, (8, 8), layout)[0]),
+    )
+
+
+def test_compose_to_png_memory_is_bounded_by_one_band(tmp_path):
+    composer = GenericImageComposer(tmp_path, tmp_path, TileCache())
+    entities = [[f"p{i}", "a", "b", "c", "d", "e", "f"] for i in range(100)]
+    band_bytes = 100 * 94 * 94 * 3
+
+    tracemalloc.start()
+    try:
+        size = composer.compose_to_png(entities, (94, 94), io.BytesIO())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # The composite is 8 bands; streaming holds one plus filter scratch
+    assert size == (9400, 752)
+    assert peak < 2 * band_bytes
+
+
 def test_tournament_data_validator_valid():
     data = "player1, acc1\nplayer2, acc2"
     result = TournamentDataValidator.validate(data)
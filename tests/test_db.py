@@ -1,6 +1,69 @@
+import pytest
+from psycopg2 import extensions
+
 from backend import db
 
 
+class DummyCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, q):
+        if self.conn.broken:
+            raise db.psycopg2.OperationalError("server closed the connection")
+        self.conn.pings += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class DummyConn:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.pings = 0
+        self.rollbacks = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return DummyCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    @property
+    def info(self):
+        return self
+
+    @property
+    def transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def dummy_connect(monkeypatch):
+    created = []
+
+    def connect(**kwargs):
+        conn = DummyConn()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(db.psycopg2, "connect", connect)
+    yield created
+    db.close_pool()
+
+
 def test_get_connection_env(monkeypatch):
     # Setup dummy environment variables
     monkeypatch.setenv("GETAMPEDVIVE_USER", "dummy_user")
@@ -9,11 +72,6 @@ def test_get_connection_env(monkeypatch):
     monkeypatch.setenv("GETAMPEDVIVE_PORT", "1234")
     monkeypatch.setenv("GETAMPEDVIVE_DBNAME", "dummy_db")
 
-    # Patch psycopg2.connect to a dummy function to avoid real DB connection
-    class DummyConn:
-        def close(self):
-            pass
-
     def dummy_connect(**kwargs):
         assert kwargs["user"] == "dummy_user"
         assert kwargs["password"] == "dummy_pass"
@@ -23,9 +81,79 @@ def test_get_connection_env(monkeypatch):
         return DummyConn()
 
     monkeypatch.setattr(db.psycopg2, "connect", dummy_connect)
+    db.close_pool()
+
+    with db.get_connection() as conn:
+        assert isinstance(conn, DummyConn)
+
+    db.close_pool()
+
+
+def test_get_connection_reuses_pooled_connection(dummy_connect):
+    with db.get_connection() as first:
+        pass
+
+    with db.get_connection() as second:
+        pass
+
+    assert first is second
+    assert len(dummy_connect) == 1
+
+    metrics = db.pool_metrics()
+    assert metrics["checkouts"] == 2
+    assert metrics["connections_created"] == 1
+    assert metrics["in_use"] == 0
+    assert metrics["idle"] == 1
+
+
+def test_connection_returned_on_error_and_rolled_back(dummy_connect):
+    with pytest.raises(RuntimeError):
+        with db.get_connection() as conn:
+            conn.status = extensions.TRANSACTION_STATUS_INTRANS
+            raise RuntimeError("query failed")
+
+    assert conn.rollbacks == 1
+    assert db.pool_metrics()["in_use"] == 0
+
+
+def test_pool_recycles_connections_past_max_lifetime(dummy_connect):
+    pool = db.ConnectionPool(maxconn=2, max_lifetime=0)
+
+    with pool.connection() as first:
+        pass
+
+    with pool.connection() as second:
+        pass
+
+    assert first is not second
+    assert first.closed
+    assert pool.metrics()["connections_recycled"] >= 1
+    pool.close()
+
+
+def test_pool_discards_broken_connections(dummy_connect):
+    pool = db.ConnectionPool(maxconn=2, health_check_interval=0)
+
+    with pool.connection() as first:
+        pass
+
+    first.broken = True
+
+    with pool.connection() as second:
+        pass
+
+    assert second is not first
+    assert first.closed
+    assert pool.metrics()["connections_discarded"] == 1
+    pool.close()
+
 
-    conn = db.get_connection()
+def test_pool_checkout_times_out_when_exhausted(dummy_connect):
+    pool = db.ConnectionPool(maxconn=1, checkout_timeout=0.01)
 
-    assert isinstance(conn, DummyConn)
+    with pool.connection():
+        with pytest.raises(db.psycopg2.pool.PoolError):
+            pool.getconn()
 
-    conn.close()
+    assert pool.metrics()["checkout_timeouts"] == 1
+    pool.close()
@@ -0,0 +1,114 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.utils import encoders
+from backend.utils.encoders import (
+    encode,
+    encode_async,
+    encode_jpeg,
+    encode_many,
+    encode_png,
+)
+
+
+def noisy_image(size=(128, 128), seed=0):
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (*size, 3), dtype=np.uint8))
+
+
+def test_encode_png_palette():
+    image = Image.new("RGBA", (16, 16), (10, 20, 30, 255))
+
+    data, quality = encode_png(image, palette_colors=16)
+
+    decoded = Image.open(io.BytesIO(data))
+    assert decoded.format == "PNG"
+    assert decoded.mode == "P"
+    assert quality is None
+
+
+@pytest.mark.parametrize(
+    "format, options, mode",
+    [
+        ("PNG", {"optimize": True}, "RGB"),
+        ("WEBP", {"lossless": True}, "RGB"),
+        ("WEBP", {"quality": 50}, "RGB"),
+        ("JPEG", {"quality": 70}, "RGB"),
+    ],
+)
+def test_encode_formats(format, options, mode):
+    image = noisy_image((32, 32))
+
+    encoded = encode(image, format, **options)
+
+    decoded = Image.open(io.BytesIO(encoded.data))
+    assert decoded.format == format
+    assert (encoded.width, encoded.height) == (32, 32)
+    assert encoded.size == len(encoded.data)
+    assert encoded.elapsed >= 0
+    assert encoded.mime == f"image/{format.lower()}"
+    assert "KB" in encoded.summary()
+    if format == "WEBP" and options.get("lossless"):
+        assert np.array_equal(np.asarray(decoded.convert(mode)), np.asarray(image))
+
+
+def test_encode_invalid_format():
+    with pytest.raises(ValueError):
+        encode(noisy_image((4, 4)), "BMP")
+
+
+def test_encode_jpeg_target_bytes():
+    image = noisy_image()
+    full, _ = encode_jpeg(image, quality=95)
+    target = len(full) // 2
+
+    data, quality = encode_jpeg(image, target_bytes=target)
+
+    assert len(data) <= target
+    # The next quality step would not fit anymore
+    assert len(encode_jpeg(image, quality=quality + 1)[0]) > target
+
+
+def test_encode_jpeg_target_too_small_returns_min_quality():
+    data, quality = encode_jpeg(noisy_image(), target_bytes=10)
+
+    assert quality == encoders.JPEG_MIN_QUALITY
+    assert Image.open(io.BytesIO(data)).format == "JPEG"
+
+
+def test_encode_jpeg_converts_rgba():
+    data, _ = encode_jpeg(Image.new("RGBA", (8, 8), (1, 2, 3, 4)))
+
+    assert Image.open(io.BytesIO(data)).mode == "RGB"
+
+
+def test_encode_async_caches_identical_pixels(monkeypatch):
+    calls = []
+    real_encode = encoders.encode
+
+    def counting_encode(image, format="PNG", **options):
+        calls.append(format)
+        return real_encode(image, format, **options)
+
+    monkeypatch.setattr(encoders, "encode", counting_encode)
+    monkeypatch.setattr(encoders, "_cache", encoders.OrderedDict())
+    monkeypatch.setattr(encoders, "_cache_size", 0)
+
+    first = encode_async(noisy_image((8, 8)), "PNG").result()
+    second = encode_async(noisy_image((8, 8)), "PNG").result()
+    encode_async(noisy_image((8, 8)), "WEBP").result()
+
+    assert second is first
+    assert calls == ["PNG", "WEBP"]
+
+
+def test_encode_many_preserves_order():
+    images = [noisy_image((8, 8 + i), seed=i) for i in range(5)]
+
+    encoded = encode_many(images, "PNG")
+
+    assert [e.height for e in encoded] == [8] * 5
+    assert [e.width for e in encoded] == [8, 9, 10, 11, 12]
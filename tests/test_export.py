@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.utils.export import (
+    SessionExport,
+    encode_image,
+    export_to_tempfile,
+    write_zip,
+)
+
+
+def make_image(value, mode="RGB"):
+    return Image.new(mode, (8, 8), (value,) * len(mode))
+
+
+@pytest.mark.parametrize("format", ["PNG", "JPEG", "WEBP"])
+def test_encode_image_formats(format):
+    data = encode_image(make_image(10, "RGBA"), format, quality=50)
+
+    assert Image.open(io.BytesIO(data)).format == format
+
+
+def test_encode_image_accepts_arrays_and_rejects_unknown_formats():
+    arr = np.zeros((4, 4, 3), dtype=np.uint8)
+
+    assert Image.open(io.BytesIO(encode_image(arr))).size == (4, 4)
+    with pytest.raises(ValueError):
+        encode_image(arr, "BMP")
+
+
+def test_session_export_replaces_by_name_and_removes_prefix():
+    session_export = SessionExport()
+    session_export.add("time_1", make_image(1))
+    session_export.add("time_2", make_image(2))
+    session_export.add("time_1", make_image(3), "JPEG", 70, team=1)
+    session_export.add("torneio", make_image(4))
+
+    assert [entry.name for entry in session_export.entries()] == [
+        "time_2",
+        "time_1",
+        "torneio",
+    ]
+    assert session_export.entries()[1].metadata == {"team": 1}
+
+    session_export.remove_prefix("time_")
+
+    assert [entry.name for entry in session_export.entries()] == ["torneio"]
+
+
+def test_write_zip_manifest_and_dedupe():
+    session_export = SessionExport()
+    session_export.add("a", make_image(1), "PNG", seed=42)
+    session_export.add("b", make_image(2), "JPEG", 60)
+    session_export.add("c", make_image(1), "PNG")
+
+    buf = io.BytesIO()
+    manifest = write_zip(session_export.entries(), buf)
+    archive = zipfile.ZipFile(buf)
+
+    assert sorted(archive.namelist()) == ["a.png", "b.jpg", "manifest.json"]
+    assert json.loads(archive.read("manifest.json")) == manifest
+
+    a, b, c = manifest["entries"]
+    assert a["metadata"] == {"seed": 42}
+    assert a["quality"] is None
+    assert b["quality"] == 60
+    assert c["file"] == "a.png"
+    assert c["duplicate"] is True
+    assert a["sha256"] == c["sha256"]
+    assert Image.open(io.BytesIO(archive.read("b.jpg"))).format == "JPEG"
+
+
+def test_export_to_tempfile():
+    session_export = SessionExport()
+    session_export.add("a", make_image(1))
+
+    path, manifest = export_to_tempfile(session_export.entries())
+    try:
+        with zipfile.ZipFile(path) as archive:
+            assert "a.png" in archive.namelist()
+        assert manifest["entries"][0]["file"] == "a.png"
+    finally:
+        os.remove(path)
+
+
+def test_session_export_keeps_encoded_bytes_only():
+    session_export = SessionExport()
+    entry = session_export.add("time_1", make_image(1), "JPEG", quality=50)
+
+    assert isinstance(entry.data, bytes)
+    assert not hasattr(entry, "image")
+    assert Image.open(io.BytesIO(entry.data)).format == "PNG"
+    assert Image.open(io.BytesIO(entry.encoded())).format == "JPEG"
+    assert session_export.size == len(entry.data)
+
+
+def test_session_export_drops_oldest_entries_past_its_caps():
+    session_export = SessionExport(max_entries=2)
+    for i in range(3):
+        session_export.add(f"time_{i}", make_image(i))
+
+    assert [entry.name for entry in session_export.entries()] == ["time_1", "time_2"]
+
+    max_bytes = session_export.size
+    session_export = SessionExport(max_bytes=max_bytes)
+    for i in range(3):
+        session_export.add(f"time_{i}", make_image(i))
+
+    assert [entry.name for entry in session_export.entries()] == ["time_1", "time_2"]
+    assert session_export.size == max_bytes
+
+    session_export.remove_prefix("time_1")
+    session_export.clear()
+    assert session_export.size == 0
@@ -1,18 +1,27 @@
+import io
+
 import numpy as np
 import pytest
 from PIL import Image
 
 from backend.utils.image_utils import (
+    TileCache,
     apply_transparent_gray,
     create_column_image,
     draw_row_numbers,
     find_image,
+    gather_rows,
     get_num_rows,
     get_or_create_image,
+    get_player_thumbnail,
     handle_player_image_upload,
     remove_rows,
     resize_image,
+    roulette_result_rows,
     roulette_team_rows,
+    row_mask,
+    row_pixel_indices,
+    shade_rows,
 )
 
 
@@ -46,6 +55,33 @@ def test_draw_row_numbers():
     assert not (arr[10, 45] == [255, 255, 255, 255]).all()
 
 
+def test_shade_rows_matches_alpha_composite():
+    rng = np.random.default_rng(0)
+    arr = rng.integers(0, 256, size=(30, 8, 4), dtype=np.uint8)
+    arr[..., 3] = 255
+    expected = Image.alpha_composite(
+        Image.fromarray(arr[10:20]), Image.new("RGBA", (8, 10), (60, 60, 60, 200))
+    )
+
+    out = shade_rows(arr.copy(), row_mask([1], 3), row_height=10)
+
+    np.testing.assert_allclose(out[10:20], np.array(expected), atol=1)
+    np.testing.assert_array_equal(out[:10], arr[:10])
+    np.testing.assert_array_equal(out[20:], arr[20:])
+
+
+def test_draw_row_numbers_many_rows():
+    img = Image.new("RGB", (60, 300 * 10), (255, 255, 255))
+    out = np.array(draw_row_numbers(img, excluded_rows=range(0, 300, 2), row_height=10))
+
+    # Excluded rows are shaded right of the label, kept rows stay white
+    assert (out[0:10, 45] < 255).all()
+    assert (out[10:20, 45] == 255).all()
+    # Every label has its number drawn in black
+    labels = out[:, :40].reshape(300, 10, 40, 3)
+    assert (labels == 0).all(axis=-1).any(axis=(1, 2)).all()
+
+
 def test_remove_rows():
     # Create image with 3 colored rows
     img = Image.new("RGB", (5, 15))
@@ -138,9 +174,15 @@ def test_get_or_create_image_found_and_blank(tmp_path):
     assert out2.size == (5, 5)
 
 
+def image_bytes(size=(400, 300), mode="RGBA", format="PNG"):
+    buf = io.BytesIO()
+    Image.new(mode, size, (200, 10, 10, 255)[: len(mode)]).save(buf, format=format)
+    return buf.getvalue()
+
+
 def test_handle_player_image_upload_success(tmp_path, monkeypatch):
     player_name = "player1"
-    img_content = b"fakeimagecontent"
+    img_content = image_bytes()
     uploaded_file = DummyUploadedFile(f"{player_name}.png", img_content)
 
     monkeypatch.setattr("backend.utils.image_utils.PLAYERS_FOLDER", tmp_path)
@@ -152,10 +194,78 @@ def test_handle_player_image_upload_success(tmp_path, monkeypatch):
 
     assert status == "success"
     assert "sucesso" in msg
-    assert (tmp_path / f"{player_name}.png").exists()
 
-    with open(tmp_path / f"{player_name}.png", "rb") as f:
-        assert f.read() == img_content
+    # Canonical 94x94 RGB PNG used by every render
+    canonical = Image.open(tmp_path / f"{player_name}.png")
+    assert canonical.format == "PNG"
+    assert canonical.mode == "RGB"
+    assert canonical.size == (94, 94)
+
+    thumb = Image.open(tmp_path / "thumbs" / f"{player_name}.png")
+    assert thumb.size == (32, 32)
+
+    assert (tmp_path / "originals" / f"{player_name}.png").read_bytes() == img_content
+
+
+def test_handle_player_image_upload_jpeg_is_stored_as_png(tmp_path, monkeypatch):
+    img_content = image_bytes(mode="RGB", format="JPEG")
+    uploaded_file = DummyUploadedFile("photo.jpeg", img_content)
+
+    monkeypatch.setattr("backend.utils.image_utils.PLAYERS_FOLDER", tmp_path)
+
+    status, _ = handle_player_image_upload("player2", uploaded_file)
+
+    assert status == "success"
+    assert find_image(tmp_path, "player2") == str(tmp_path / "player2.png")
+    assert (tmp_path / "originals" / "player2.jpeg").exists()
+
+
+def test_handle_player_image_upload_invalid_file(tmp_path, monkeypatch):
+    uploaded_file = DummyUploadedFile("player1.png", b"fakeimagecontent")
+
+    monkeypatch.setattr("backend.utils.image_utils.PLAYERS_FOLDER", tmp_path)
+
+    status, msg = handle_player_image_upload("player1", uploaded_file)
+
+    assert status == "error"
+    assert "inválido" in msg
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_handle_player_image_upload_too_large(tmp_path, monkeypatch):
+    uploaded_file = DummyUploadedFile("player1.png", image_bytes(size=(100, 100)))
+
+    monkeypatch.setattr("backend.utils.image_utils.PLAYERS_FOLDER", tmp_path)
+    monkeypatch.setattr("backend.utils.image_utils.MAX_UPLOAD_PIXELS", 100)
+
+    status, _ = handle_player_image_upload("player1", uploaded_file)
+
+    assert status == "error"
+
+
+def test_get_player_thumbnail(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.utils.image_utils.PLAYERS_FOLDER", tmp_path)
+    Image.new("RGB", (94, 94), (1, 2, 3)).save(tmp_path / "legacy.png")
+
+    # Players uploaded before thumbnails existed are resized on the fly
+    assert get_player_thumbnail("legacy").size == (32, 32)
+
+    (tmp_path / "thumbs").mkdir()
+    Image.new("RGB", (32, 32), (9, 9, 9)).save(tmp_path / "thumbs" / "legacy.png")
+
+    assert get_player_thumbnail("legacy").getpixel((0, 0)) == (9, 9, 9)
+
+
+def test_handle_player_image_upload_duplicate_case_insensitive(tmp_path, monkeypatch):
+    (tmp_path / "Player1.png").write_bytes(image_bytes())
+    uploaded_file = DummyUploadedFile("player1.png", image_bytes())
+
+    monkeypatch.setattr("backend.utils.image_utils.PLAYERS_FOLDER", tmp_path)
+
+    status, msg = handle_player_image_upload("player1", uploaded_file)
+
+    assert status == "error"
+    assert "Já existe" in msg
 
 
 def test_handle_player_image_upload_duplicate(tmp_path, monkeypatch):
@@ -336,3 +446,52 @@ def test_roulette_team_rows_basic():
     assert (
         (arr2 == [255, 0, 255]).all(axis=2).any()
     ), "Second image's accessory row should be magenta"
+
+
+def test_row_pixel_indices():
+    assert row_pixel_indices([2, 0], row_height=3).tolist() == [6, 7, 8, 0, 1, 2]
+    assert row_pixel_indices([], row_height=3).tolist() == []
+
+
+def test_gather_rows_stacks_rows_in_order():
+    arr = np.repeat(np.arange(4, dtype=np.uint8), 5)[:, None, None]
+    arr = np.broadcast_to(arr, (20, 3, 3))
+
+    out = gather_rows(arr, [3, 0, 2], row_height=5)
+
+    assert out.shape == (15, 3, 3)
+    assert out[:5].max() == 3 and out[:5].min() == 3
+    assert out[5:10].max() == 0
+    assert out[10:].min() == 2
+
+
+def test_roulette_result_rows():
+    assert roulette_result_rows([5, 2], fixed_rows=[4, 1]) == [0, 1, 4, 5, 2]
+    assert roulette_result_rows([3], avatar_row=2) == [1, 3]
+
+
+def test_tile_cache_matches_get_or_create_image(tmp_path):
+    Image.new("RGB", (10, 10), (255, 0, 0)).save(tmp_path / "Foo.png")
+    cache = TileCache()
+
+    tile = cache.get(tmp_path, "FOO", (4, 4))
+    blank = cache.get(tmp_path, "missing", (4, 4))
+
+    assert np.array_equal(
+        np.asarray(tile), np.asarray(get_or_create_image(tmp_path, "foo", (4, 4)))
+    )
+    assert np.asarray(blank).min() == 255
+    assert cache.get(tmp_path, "foo", (4, 4)) is tile
+    assert cache.stats() == {"tiles": 2, "hits": 1, "misses": 2}
+
+
+def test_tile_cache_evicts_least_recently_used(tmp_path):
+    cache = TileCache(max_tiles=2)
+    a = cache.get(tmp_path, "a", (2, 2))
+    cache.get(tmp_path, "b", (2, 2))
+    cache.get(tmp_path, "a", (2, 2))
+    cache.get(tmp_path, "c", (2, 2))
+
+    assert len(cache) == 2
+    assert cache.get(tmp_path, "a", (2, 2)) is a
+    assert cache.misses == 3
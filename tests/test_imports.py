@@ -0,0 +1,106 @@
+"""
+Guards the import cost of the rendering core: composers, image utils and the
+validator must load without Streamlit or pandas and within a time budget.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+HEADLESS_MODULES = [
+    "backend.composers.image_composer",
+    "backend.composers.style_image_composer",
+    "backend.utils.image_utils",
+    "backend.utils.list_utils",
+    "backend.validators.tournament_validator",
+]
+UI_ONLY_MODULES = ["streamlit", "pandas", "dotenv"]
+# Cumulative import time in microseconds, measured by -X importtime. The
+# rendering core needs ~80 ms (mostly NumPy) versus ~450 ms with the UI stack.
+IMPORT_BUDGET_US = int(os.environ.get("GETAMPEDVIVE_IMPORT_BUDGET_US", 250_000))
+
+
+def run_python(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_rendering_core_does_not_import_ui_stack():
+    code = (
+        "import sys\n"
+        + "".join(f"import {module}\n" for module in HEADLESS_MODULES)
+        + f"print(','.join(m for m in {UI_ONLY_MODULES!r} if m in sys.modules))"
+    )
+
+    assert run_python(code).stdout.strip() == ""
+
+
+def test_settings_are_resolved_lazily():
+    code = (
+        "import os, backend.utils as u\n"
+        "assert 'GETAMPEDVIVE_PROVIDER_TIMEOUT' not in vars(u)\n"
+        "os.environ['GETAMPEDVIVE_PROVIDER_TIMEOUT'] = '3'\n"
+        "print(u.GETAMPEDVIVE_PROVIDER_TIMEOUT)\n"
+    )
+
+    assert run_python(code).stdout.strip() == "3.0"
+
+
+def test_worker_settings_are_read_from_dotenv(tmp_path):
+    (tmp_path / ".env").write_text(
+        "GETAMPEDVIVE_BCRYPT_ROUNDS=5\n"
+        "GETAMPEDVIVE_PASSWORD_WORKERS=3\n"
+        "GETAMPEDVIVE_ENCODER_WORKERS=2\n"
+    )
+    env = {k: v for k, v in os.environ.items() if not k.startswith("GETAMPEDVIVE_")}
+    env["PYTHONPATH"] = str(ROOT)
+    code = (
+        "from backend.utils import encoders, passwords\n"
+        "print(passwords.BCRYPT_ROUNDS, passwords.PASSWORD_WORKERS,"
+        " encoders.ENCODER_WORKERS)\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.split() == ["5", "3", "2"]
+
+
+def test_unknown_setting_raises():
+    import backend.utils
+
+    with pytest.raises(AttributeError):
+        backend.utils.NOT_A_SETTING
+
+
+def test_import_time_budget():
+    code = "".join(f"import {module}\n" for module in HEADLESS_MODULES)
+    stderr = run_python(code, "-X", "importtime").stderr
+
+    # Lines look like "import time: <self> | <cumulative> | <indent><module>";
+    # top-level imports have no indent and include everything they pulled in
+    cumulative = 0
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        if name.startswith("backend"):
+            cumulative += int(parts[1])
+
+    assert 0 < cumulative < IMPORT_BUDGET_US, stderr
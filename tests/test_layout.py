@@ -0,0 +1,59 @@
+import pytest
+
+from backend.composers.layout import GridLayout, best_columns, plan_layout
+
+# One tournament column: 94 px wide, player + 7 accessories tall
+CELL = (94, 752)
+
+
+def test_strip_is_one_row():
+    layout = plan_layout(64, CELL)
+
+    assert (layout.columns, layout.num_rows, layout.num_pages) == (64, 1, 1)
+    assert layout.pages() == [[range(0, 64)]]
+
+
+def test_fixed_columns_wrap_and_paginate():
+    layout = plan_layout(10, CELL, mode="columns", columns=4, rows_per_page=2)
+
+    assert (layout.num_rows, layout.num_pages) == (3, 2)
+    assert layout.pages() == [[range(0, 4), range(4, 8)], [range(8, 10)]]
+    assert plan_layout(3, CELL, mode="columns", columns=8).columns == 3
+
+
+def test_aspect_picks_balanced_grid():
+    # 64 columns of 94x752: 24 per row make a 2256x2256 square, 32 per row
+    # (3008x1504) are the closest to 16:9 and 16 per row (1504x3008) to 1:2
+    assert best_columns(64, 1.0, CELL) == 24
+    assert best_columns(64, 16 / 9, CELL) == 32
+    assert best_columns(64, 0.5, CELL) == 16
+    assert best_columns(1, 16 / 9, CELL) == 1
+
+
+def test_aspect_targets_each_page():
+    # Pages of one grid row are as wide as the aspect asks, whatever the total
+    layout = plan_layout(64, CELL, mode="aspect", aspect=1.0, rows_per_page=1)
+
+    assert layout.columns == 8
+    assert layout.num_pages == 8
+
+
+def test_empty_layout_has_no_pages():
+    layout = GridLayout(0, 1)
+
+    assert layout.num_pages == 0
+    assert layout.pages() == []
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"mode": "columns"},
+        {"mode": "aspect", "aspect": 0},
+        {"mode": "spiral"},
+        {"mode": "columns", "columns": 2, "rows_per_page": 0},
+    ],
+)
+def test_invalid_layouts(options):
+    with pytest.raises(ValueError):
+        plan_layout(8, CELL, **options)
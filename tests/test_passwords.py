@@ -0,0 +1,36 @@
+import bcrypt
+
+from backend.utils import passwords
+
+
+def test_hash_and_verify_password():
+    hashed = passwords.hash_password("secret", rounds=4)
+
+    assert passwords.verify_password("secret", hashed)
+    assert not passwords.verify_password("wrong", hashed)
+
+
+def test_hash_passwords_preserves_order():
+    hashed = passwords.hash_passwords(["a", "b", "c"], rounds=4)
+
+    assert len(hashed) == 3
+    for password, hashed_password in zip(["a", "b", "c"], hashed):
+        assert bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+
+def test_get_cost():
+    hashed = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=5)).decode()
+
+    assert passwords.get_cost(hashed) == 5
+    assert passwords.get_cost("not-a-hash") is None
+
+
+def test_needs_rehash(monkeypatch):
+    hashed = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=4)).decode()
+
+    monkeypatch.setattr(passwords, "BCRYPT_ROUNDS", 4)
+    assert not passwords.needs_rehash(hashed)
+
+    monkeypatch.setattr(passwords, "BCRYPT_ROUNDS", 5)
+    assert passwords.needs_rehash(hashed)
+    assert not passwords.needs_rehash(hashed, rounds=4)
@@ -0,0 +1,82 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.utils import png_stream
+from backend.utils.png_stream import PNGStreamWriter, paeth_filter, write_png
+
+
+def decode(data):
+    return np.asarray(Image.open(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize("filter", ["none", "paeth"])
+@pytest.mark.parametrize("channels", [3, 4])
+def test_roundtrip_in_uneven_bands(filter, channels, monkeypatch):
+    # Small filter passes so bands are split across several of them
+    monkeypatch.setattr(png_stream, "FILTER_CHUNK_BYTES", 100)
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (37, 23, channels), dtype=np.uint8)
+    image[:, 10:] = image[:, :1]  # flat areas, as in tile composites
+
+    buf = io.BytesIO()
+    write_png(
+        buf,
+        23,
+        37,
+        [image[:5], image[5:6], image[6:]],
+        channels=channels,
+        filter=filter,
+    )
+
+    assert np.array_equal(decode(buf.getvalue()), image)
+
+
+def test_paeth_filter_matches_reference():
+    rng = np.random.default_rng(1)
+    rows = rng.integers(0, 256, (3, 12), dtype=np.uint8)
+    previous = rng.integers(0, 256, 12).astype(np.int16)
+    filtered = paeth_filter(rows, previous, 3)
+
+    for y in range(3):
+        above = previous if y == 0 else rows[y - 1].astype(np.int16)
+        for x in range(12):
+            a = int(rows[y, x - 3]) if x >= 3 else 0
+            b = int(above[x])
+            c = int(above[x - 3]) if x >= 3 else 0
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+            assert filtered[y, x] == (int(rows[y, x]) - predictor) % 256
+
+
+def test_paeth_compresses_flat_tiles_better():
+    image = np.zeros((94, 940, 3), dtype=np.uint8)
+    image[:, :, 0] = np.arange(940) % 256
+    sizes = {}
+    for filter in ("none", "paeth"):
+        buf = io.BytesIO()
+        write_png(buf, 940, 94, [image], filter=filter)
+        sizes[filter] = len(buf.getvalue())
+
+    assert sizes["paeth"] < sizes["none"]
+
+
+def test_writer_rejects_bad_input():
+    with pytest.raises(ValueError):
+        PNGStreamWriter(io.BytesIO(), 0, 10)
+    with pytest.raises(ValueError):
+        PNGStreamWriter(io.BytesIO(), 10, 10, channels=2)
+    with pytest.raises(ValueError):
+        PNGStreamWriter(io.BytesIO(), 10, 10, filter="sub")
+
+    writer = PNGStreamWriter(io.BytesIO(), 4, 2)
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((1, 5, 3), dtype=np.uint8))
+    writer.write(np.zeros((1, 4, 3), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        writer.write(np.zeros((2, 4, 3), dtype=np.uint8))
+    with pytest.raises(ValueError):
+        writer.close()
@@ -0,0 +1,56 @@
+from backend.utils.rate_limit import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_consume_and_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(capacity=2, refill_rate=1, clock=clock)
+
+    assert bucket.consume()
+    assert bucket.consume()
+    assert not bucket.consume()
+
+    clock.now = 1.0
+    assert bucket.consume()
+    assert not bucket.consume()
+
+    # Never refills past capacity
+    clock.now = 100.0
+    assert bucket.available() == 2
+
+
+def test_rate_limiter_keys_are_independent():
+    clock = FakeClock()
+    limiter = RateLimiter(capacity=1, refill_rate=0.5, clock=clock)
+
+    assert not limiter.is_limited("alice")
+    assert limiter.allow("alice")
+    assert not limiter.allow("alice")
+    assert limiter.is_limited("alice")
+    assert limiter.allow("bob")
+
+    clock.now = 2.0
+    assert not limiter.is_limited("alice")
+
+    limiter.allow("alice")
+    limiter.reset("alice")
+    assert limiter.allow("alice")
+
+
+def test_rate_limiter_evicts_least_recently_used_keys():
+    limiter = RateLimiter(capacity=1, refill_rate=0, max_keys=2, clock=FakeClock())
+
+    limiter.allow("a")
+    limiter.allow("b")
+    limiter.allow("c")
+
+    # "a" was evicted, so it starts with a full bucket again
+    assert limiter.allow("a")
+    assert not limiter.allow("c")
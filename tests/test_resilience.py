@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+
+from backend.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LexicalMatcher,
+    call_with_deadline,
+    guarded_call,
+    hedged_call,
+    map_with_deadline,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBackend:
+    """Answers after the next configured latency, or raises the next error."""
+
+    def __init__(self, latencies=(), errors=(), result="ok"):
+        self.latencies = list(latencies)
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        with self._lock:
+            self.calls += 1
+            latency = self.latencies.pop(0) if self.latencies else 0
+            error = self.errors.pop(0) if self.errors else None
+        time.sleep(latency)
+        if error is not None:
+            raise error
+        return self.result
+
+
+def test_call_with_deadline():
+    assert call_with_deadline(FakeBackend(), timeout=1) == "ok"
+
+    with pytest.raises(TimeoutError):
+        call_with_deadline(FakeBackend(latencies=[0.5]), timeout=0.05)
+
+
+def test_hedged_call_returns_fast_duplicate():
+    backend = FakeBackend(latencies=[1.0, 0.0])
+
+    start = time.monotonic()
+    assert hedged_call(backend, timeout=2, hedge_after=0.05) == "ok"
+
+    assert time.monotonic() - start < 0.5
+    assert backend.calls == 2
+
+
+def test_hedged_call_no_hedge_when_fast():
+    backend = FakeBackend()
+
+    assert hedged_call(backend, timeout=1, hedge_after=0.5) == "ok"
+    assert backend.calls == 1
+
+
+def test_hedged_call_retries_failure():
+    backend = FakeBackend(errors=[RuntimeError("boom")])
+
+    assert hedged_call(backend, timeout=1, hedge_after=0.5) == "ok"
+    assert backend.calls == 2
+
+
+def test_hedged_call_raises_last_error():
+    backend = FakeBackend(errors=[RuntimeError("first"), RuntimeError("second")])
+
+    with pytest.raises(RuntimeError, match="second"):
+        hedged_call(backend, timeout=1, hedge_after=0.5)
+
+
+def test_hedged_call_deadline():
+    backend = FakeBackend(latencies=[0.5, 0.5])
+
+    with pytest.raises(TimeoutError):
+        hedged_call(backend, timeout=0.1, hedge_after=0.02)
+
+
+def test_map_with_deadline_bounds_the_whole_batch():
+    def func(item):
+        if item == "boom":
+            raise RuntimeError(item)
+        time.sleep(0.5 if item == "slow" else 0.02)
+        return item.upper()
+
+    start = time.monotonic()
+    results = map_with_deadline(
+        func,
+        ["a", "slow", "boom"] + ["b"] * 10,
+        fallback=lambda item: f"fallback {item}",
+        timeout=0.2,
+    )
+
+    # 11 calls of 20 ms each on 8 threads, well within one deadline
+    assert time.monotonic() - start < 0.4
+    assert results == ["A", "fallback slow", "fallback boom"] + ["B"] * 10
+    assert map_with_deadline(func, [], fallback=None) == []
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("fake", failure_threshold=2, reset_timeout=10, clock=clock)
+    failing = FakeBackend(errors=[RuntimeError("down")] * 3)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            breaker.call(failing)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.call(failing)
+    assert failing.calls == 2
+
+    # Half open: a failed trial reopens for another reset_timeout
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(RuntimeError):
+        breaker.call(failing)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 20
+    assert breaker.call(FakeBackend()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_circuit_breaker_single_half_open_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker("fake", failure_threshold=1, reset_timeout=1, clock=clock)
+    breaker.record_failure()
+    clock.now = 1
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_guarded_call_counts_timeouts_as_failures():
+    breaker = CircuitBreaker("fake", failure_threshold=1)
+
+    with pytest.raises(TimeoutError):
+        guarded_call(breaker, FakeBackend(latencies=[0.5]), timeout=0.05)
+
+    with pytest.raises(CircuitOpenError):
+        guarded_call(breaker, FakeBackend(), timeout=1)
+
+
+def test_lexical_matcher():
+    matcher = LexicalMatcher(
+        ["longboots1", "drill", "drillance"],
+        ["Long Boots", "Drill Hand", "Giga Drill Lance"],
+    )
+
+    assert matcher.best_id("long boot") == "longboots1"
+    assert matcher.best_id("Drill hnd") == "drill"
+    assert [m[0] for m in matcher.match("drill", count=2)] == ["drill", "drillance"]
+    assert matcher.best_id("zzz") is None
+    assert matcher.match("!!") == []
@@ -0,0 +1,149 @@
+import io
+import json
+import zipfile
+
+import numpy as np
+import pytest
+
+from backend.utils.roulette import (
+    TeamDrawSettings,
+    contact_sheet,
+    draw_teams,
+    results_zip,
+    run_batch_draw,
+)
+from backend.utils.upload_cache import DecodedSheet
+
+
+def make_sheet(num_rows=8, row_height=10, width=6, team=0):
+    arr = np.zeros((num_rows * row_height, width, 4), dtype=np.uint8)
+    for i in range(num_rows):
+        arr[i * row_height : (i + 1) * row_height] = (team * 16 + i, i, 0, 255)
+    return DecodedSheet(f"team{team}", arr, row_height)
+
+
+def test_draw_teams_is_reproducible_from_seed():
+    settings = [TeamDrawSettings(range(8), 3) for _ in range(16)]
+
+    seed, first = draw_teams(settings, [8] * 16, seed=1234)
+    _, second = draw_teams(settings, [8] * 16, seed=1234)
+    _, other = draw_teams(settings, [8] * 16, seed=4321)
+
+    assert seed == 1234
+    assert first == second
+    assert first != other
+
+
+def test_draw_teams_records_random_seed():
+    settings = [TeamDrawSettings(range(8), 2)]
+
+    seed, sampled = draw_teams(settings, [8])
+
+    assert isinstance(seed, int)
+    assert draw_teams(settings, [8], seed=seed)[1] == sampled
+
+
+def test_draw_teams_respects_settings():
+    settings = [
+        TeamDrawSettings([0, 1, 2, 3], 2, fixed_rows=[1]),
+        TeamDrawSettings(range(20), 5),
+        TeamDrawSettings([4], 0),
+    ]
+
+    _, sampled = draw_teams(settings, [8, 6, 8], seed=7)
+
+    # Avatar row, fixed rows and rows beyond the sheet are never drawn
+    assert sorted(sampled[0]) == [2, 3]
+    assert len(set(sampled[1])) == 5
+    assert set(sampled[1]) <= {1, 2, 3, 4, 5}
+    assert sampled[2] == []
+
+
+def test_draw_teams_invalid_count():
+    with pytest.raises(ValueError, match="Time 2"):
+        draw_teams(
+            [TeamDrawSettings([1, 2], 1), TeamDrawSettings([1, 2], 3)],
+            [8, 8],
+            seed=0,
+        )
+
+
+def test_draw_teams_is_uniform():
+    settings = [TeamDrawSettings(range(1, 5), 1) for _ in range(4000)]
+
+    _, sampled = draw_teams(settings, [5] * 4000, seed=3)
+    counts = np.bincount([rows[0] for rows in sampled], minlength=5)
+
+    assert counts[0] == 0
+    assert (np.abs(counts[1:] - 1000) < 120).all()
+
+
+def test_run_batch_draw_images_and_zip():
+    sheets = [make_sheet(team=i) for i in range(3)]
+    settings = [TeamDrawSettings(range(8), 2, fixed_rows=[7]) for _ in sheets]
+
+    result = run_batch_draw(sheets, settings, seed=99)
+    images = result.images(sheets)
+
+    assert result.seed == 99
+    for team_idx, img in enumerate(images):
+        rows = result.result_rows(team_idx)
+        assert rows[:2] == [0, 7]
+        assert img.shape == (40, 6, 4)
+        assert img[::10, 0, 0].tolist() == [team_idx * 16 + r for r in rows]
+
+    archive = zipfile.ZipFile(io.BytesIO(results_zip(result, images)))
+    manifest = json.loads(archive.read("manifest.json"))
+
+    assert sorted(archive.namelist()) == [
+        "manifest.json",
+        "time_01.png",
+        "time_02.png",
+        "time_03.png",
+    ]
+    assert manifest["seed"] == 99
+    assert [team["sampled_rows"] for team in manifest["teams"]] == result.sampled_rows
+
+
+def test_batch_result_matches_only_its_sheets():
+    sheets = [make_sheet(team=i) for i in range(2)]
+    settings = [TeamDrawSettings(range(8), 2) for _ in sheets]
+    result = run_batch_draw(sheets, settings, seed=7)
+
+    assert result.matches(sheets)
+    assert result.matches([make_sheet(team=0), make_sheet(team=1)])
+    assert not result.matches(sheets[:1])
+    # Same digest but fewer rows, e.g. a replaced upload
+    assert not result.matches([sheets[0], make_sheet(num_rows=4, team=1)])
+    assert not result.matches([sheets[0], make_sheet(team=2)])
+
+
+def test_batch_result_cache_key():
+    sheets = [make_sheet(team=i) for i in range(2)]
+    settings = [TeamDrawSettings(range(8), 2) for _ in sheets]
+
+    key = run_batch_draw(sheets, settings, seed=7).cache_key()
+
+    assert run_batch_draw(sheets, settings, seed=7).cache_key() == key
+    assert run_batch_draw(sheets, settings, seed=8).cache_key() != key
+    assert run_batch_draw(sheets[::-1], settings, seed=7).cache_key() != key
+
+
+def test_run_batch_draw_needs_settings_per_team():
+    with pytest.raises(ValueError):
+        run_batch_draw([make_sheet()], [], seed=0)
+
+
+def test_contact_sheet_grid():
+    images = [np.full((20, 5, 3), i, dtype=np.uint8) for i in range(5)]
+    images[4] = np.full((10, 5, 4), 4, dtype=np.uint8)
+
+    sheet = contact_sheet(images, columns=2, gap=1)
+
+    assert sheet.shape == (3 * 20 + 2, 2 * 5 + 1, 4)
+    assert sheet[0, 0].tolist() == [0, 0, 0, 255]
+    assert sheet[0, 6].tolist() == [1, 1, 1, 255]
+    assert sheet[21, 0].tolist() == [2, 2, 2, 255]
+    assert sheet[42, 0].tolist() == [4, 4, 4, 4]
+    # Padding keeps the background
+    assert sheet[0, 5].tolist() == [255, 255, 255, 0]
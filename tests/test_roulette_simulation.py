@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+
+from backend.utils import roulette_simulation
+from backend.utils.roulette import TeamDrawSettings
+from backend.utils.roulette_simulation import (
+    BYTES_PER_CELL,
+    TeamFairness,
+    chi2_sf,
+    chunk_trials,
+    identical_draw_probability,
+    simulate_draws,
+)
+
+
+@pytest.mark.parametrize(
+    "stat, dof, expected",
+    [
+        (3.841, 1, 0.05),
+        (18.307, 10, 0.05),
+        (0.5, 4, 0.9735),
+        (100.0, 50, 3.455e-05),
+    ],
+)
+def test_chi2_sf(stat, dof, expected):
+    assert chi2_sf(stat, dof) == pytest.approx(expected, rel=1e-3)
+
+
+def test_chi2_sf_edges():
+    assert chi2_sf(0, 3) == 1.0
+    assert chi2_sf(1e4, 3) == pytest.approx(0.0, abs=1e-12)
+
+
+def test_identical_draw_probability():
+    # Both teams pick 2 of the same 6 rows: 1 / C(6, 2)
+    assert identical_draw_probability(range(6), 2, range(6), 2) == pytest.approx(1 / 15)
+    assert identical_draw_probability([1, 2], 1, [3, 4], 1) == 0.0
+    assert identical_draw_probability([1, 2, 3], 1, [1, 2, 3], 2) == 0.0
+
+
+def test_simulate_draws_fair_roulette():
+    settings = [
+        TeamDrawSettings(range(8), 2, fixed_rows=[3]),
+        TeamDrawSettings(range(8), 2, fixed_rows=[3]),
+    ]
+
+    report = simulate_draws(settings, [8, 8], trials=200_000, seed=5)
+
+    for team in report.teams:
+        assert team.rows == [1, 2, 4, 5, 6, 7]
+        assert team.counts.sum() == 2 * 200_000
+        assert team.expected == pytest.approx(1 / 3)
+        assert abs(team.frequencies - 1 / 3).max() < 0.01
+        assert team.p_value > 1e-4
+    assert report.identical[(0, 1)] == pytest.approx(
+        report.identical_exact[(0, 1)], abs=0.003
+    )
+    assert report.any_identical == report.identical[(0, 1)]
+
+
+def test_simulate_draws_large_subset_space():
+    # C(30, 15) possible draws is too many for the lookup table
+    settings = [TeamDrawSettings(range(31), 15)]
+
+    report = simulate_draws(settings, [31], trials=20_000, seed=1)
+
+    assert report.teams[0].counts.sum() == 15 * 20_000
+    assert report.teams[0].p_value > 1e-4
+
+
+def test_simulate_draws_is_reproducible_and_independent_of_workers():
+    settings = [TeamDrawSettings(range(6), 1), TeamDrawSettings(range(6), 1)]
+
+    single = simulate_draws(settings, [6, 6], trials=5_000, seed=9, chunk_size=1_000)
+    again = simulate_draws(settings, [6, 6], trials=5_000, seed=9, chunk_size=1_000)
+    parallel = simulate_draws(
+        settings, [6, 6], trials=5_000, seed=9, chunk_size=1_000, workers=2
+    )
+
+    for report in (again, parallel):
+        assert [t.counts.tolist() for t in report.teams] == [
+            t.counts.tolist() for t in single.teams
+        ]
+        assert report.identical == single.identical
+        assert report.any_identical == single.any_identical
+
+
+def test_simulate_draws_teams_without_randomness():
+    settings = [
+        TeamDrawSettings([1, 2], 2),
+        TeamDrawSettings([1, 2], 2),
+        TeamDrawSettings([4, 5], 0),
+    ]
+
+    report = simulate_draws(settings, [8, 8, 8], trials=1_000, seed=0)
+
+    assert report.teams[0].p_value == 1.0
+    assert report.identical[(0, 1)] == 1.0
+    assert report.any_identical == 1.0
+
+
+def test_simulate_draws_invalid_settings():
+    with pytest.raises(ValueError):
+        simulate_draws([TeamDrawSettings([1, 2], 3)], [8], trials=10)
+    with pytest.raises(ValueError):
+        simulate_draws([TeamDrawSettings([1, 2], 1)], [8], trials=0)
+
+
+@pytest.mark.parametrize("num_draws", [1, 3, 5])
+def test_simulate_draws_p_values_are_calibrated(num_draws):
+    settings = [TeamDrawSettings(range(8), num_draws)]
+
+    p_values = np.array(
+        [
+            simulate_draws(settings, [8], trials=500, seed=seed).teams[0].p_value
+            for seed in range(400)
+        ]
+    )
+
+    # Fair draws give uniform p-values
+    assert abs(p_values.mean() - 0.5) < 0.05
+    assert 0.02 < (p_values < 0.05).mean() < 0.1
+    assert 0.17 < (p_values < 0.25).mean() < 0.33
+
+
+def test_team_fairness_flags_biased_draws():
+    # 7 rows, 3 drawn per trial, row 1 drawn 5% more often than fair
+    trials = 100_000
+    counts = np.full(7, trials * 3 / 7)
+    counts[0] *= 1.05
+    counts[1:] -= (counts[0] - trials * 3 / 7) / 6
+
+    team = TeamFairness(list(range(1, 8)), 3, counts, trials)
+
+    assert team.p_value < 1e-6
+
+
+def test_simulate_draws_uses_the_production_sampler(monkeypatch):
+    real_shuffle = roulette_simulation.shuffle_candidates
+
+    def biased_shuffle(rng, candidates, trials=None):
+        # Row 1 always comes first, as a buggy draw_teams would do
+        shuffled = real_shuffle(rng, candidates, trials)
+        first = shuffled[..., :1].copy()
+        is_one = shuffled == 1
+        shuffled[..., :1] = 1
+        shuffled[is_one] = np.broadcast_to(first, shuffled.shape)[is_one]
+        return shuffled
+
+    monkeypatch.setattr(roulette_simulation, "shuffle_candidates", biased_shuffle)
+    report = simulate_draws([TeamDrawSettings(range(8), 2)], [8], trials=10_000)
+
+    assert report.teams[0].frequencies[0] == 1.0
+    assert report.teams[0].p_value < 1e-6
+
+
+def test_chunk_size_follows_the_byte_budget():
+    assert chunk_trials(16, 8, chunk_bytes=64 * 2**20) == 64 * 2**20 // (
+        BYTES_PER_CELL * 128
+    )
+    assert chunk_trials(1, 1, chunk_bytes=1) == 1
+    assert chunk_trials(0, 0) > 0
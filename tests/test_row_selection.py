@@ -0,0 +1,48 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+from backend.utils.row_selection import RowSelectionCanvas
+
+
+def make_sheet(num_rows=4, row_height=10, width=60):
+    return Image.new("RGBA", (width, num_rows * row_height), (255, 255, 255, 255))
+
+
+def test_canvas_draws_row_numbers_once():
+    canvas = RowSelectionCanvas(make_sheet(), row_height=10)
+
+    assert canvas.num_rows == 4
+    assert canvas.canvas.shape == (40, 60, 4)
+    # Nothing excluded: the canvas is the numbered sheet
+    assert (canvas.canvas == canvas.base).all()
+
+
+def test_canvas_update_only_touches_changed_rows():
+    canvas = RowSelectionCanvas(make_sheet(), row_height=10)
+
+    assert canvas.update([1, 3]) == {1, 3}
+    assert not (canvas.canvas[10:20] == canvas.base[10:20]).all()
+    assert (canvas.canvas[20:30] == canvas.base[20:30]).all()
+
+    assert canvas.update([1, 2]) == {2, 3}
+    assert (canvas.canvas[30:40] == canvas.base[30:40]).all()
+    assert not (canvas.canvas[20:30] == canvas.base[20:30]).all()
+
+    assert canvas.update([2, 1]) == set()
+    assert canvas.update([1, 2, 99]) == set()
+
+
+def test_canvas_png_is_reused_until_selection_changes():
+    canvas = RowSelectionCanvas(make_sheet(), row_height=10)
+
+    first = canvas.to_png()
+    assert canvas.to_png() is first
+
+    canvas.update([1])
+    second = canvas.to_png()
+    assert second is not first
+
+    decoded = np.array(Image.open(io.BytesIO(second)))
+    assert (decoded == canvas.canvas).all()
@@ -0,0 +1,93 @@
+import time
+
+from backend.utils.search_index import SearchIndex, tokenize, trigrams
+
+ACCESSORIES = [
+    ("longboots1", ("longboots1", "Long Boots", "PRE-2010")),
+    ("kengou_blade_long", ("kengou_blade_long", "Giant Katana (Manslayer)", "2012")),
+    ("drill", ("drill", "Drill Hand", "2015")),
+    ("drillance", ("drillance", "Giga Drill Lance", "2015")),
+    ("k_ksset_ice", ("k_ksset_ice", "Ice Cross\n", "2011")),
+]
+
+
+def test_tokenize_and_trigrams():
+    assert tokenize("k_ksset_ice (Ice Cross)") == ["k", "ksset", "ice", "ice", "cross"]
+    assert trigrams("Ab") == {" ab", "ab "}
+    assert trigrams("!!") == set()
+
+
+def test_accents_and_curly_apostrophes_are_normalized():
+    index = SearchIndex(
+        [
+            ("potion", ("potion", "Poção Mágica", "2013")),
+            ("dede", ("dede", "Dedé’s Hammer", "2014")),
+            ("magic", ("magic", "Magic Wand", "2013")),
+        ]
+    )
+
+    assert tokenize("Poção Mágica") == ["pocao", "magica"]
+    assert tokenize("Dedé’s") == tokenize("Dede's") == ["dede", "s"]
+    assert index.search("Poção Mágica") == ["potion"]
+    assert index.search("pocao") == ["potion"]
+    assert index.search("mágica") == ["potion"]
+    assert index.search("dede's ham") == ["dede"]
+    assert index.search("Poçao Magca")[0] == "potion"
+
+
+def test_prefix_search_ranks_prefix_of_label_first():
+    index = SearchIndex(ACCESSORIES)
+
+    assert index.search("long") == ["longboots1", "kengou_blade_long"]
+    assert index.search("dri") == ["drill", "drillance"]
+    assert index.search("drill lan") == ["drillance"]
+
+
+def test_search_by_id_and_year():
+    index = SearchIndex(ACCESSORIES)
+
+    assert index.search("k_ks") == ["k_ksset_ice"]
+    assert set(index.search("2015")) == {"drill", "drillance"}
+
+
+def test_exact_match_comes_first():
+    index = SearchIndex([("a", ("a", "Drill Hand Plus")), ("b", ("b", "Drill Hand"))])
+
+    assert index.search("drill hand") == ["b", "a"]
+
+
+def test_fuzzy_fallback_for_misspellings():
+    index = SearchIndex(ACCESSORIES)
+
+    assert index.search("bots lng")[0] == "longboots1"
+    assert index.search("qqqqqq") == []
+
+
+def test_empty_query_returns_catalog_order_and_limit():
+    index = SearchIndex(ACCESSORIES)
+
+    assert index.search("", limit=2) == ["longboots1", "kengou_blade_long"]
+    assert len(index.search("l", limit=1)) == 1
+
+
+def test_labels():
+    index = SearchIndex(ACCESSORIES + [("player", ("player",))])
+
+    assert index.label("k_ksset_ice") == "Ice Cross"
+    assert index.label("player") == "player"
+    assert index.label("unknown") == "unknown"
+
+
+def test_lookup_is_fast_on_large_catalog():
+    index = SearchIndex(
+        (f"acc_{i}", (f"acc_{i}", f"Accessory {i} Boots", str(2010 + i % 15)))
+        for i in range(5000)
+    )
+
+    start = time.perf_counter()
+    for _ in range(100):
+        results = index.search("accessory 12 boo", limit=20)
+    elapsed = (time.perf_counter() - start) / 100
+
+    assert results[0] == "acc_12"
+    assert elapsed < 0.01
@@ -0,0 +1,248 @@
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import pytest
+from PIL import Image
+
+from backend.server import (
+    RenderedImage,
+    RenderServer,
+    RenderService,
+    ServiceBusy,
+    SpecError,
+    etag_matches,
+    normalize_request,
+    request_key,
+)
+
+SPEC = {"players_data": "p1, acc1, acc2\np2, acc1", "teams": ["p1", "p2"]}
+
+
+@pytest.fixture
+def service(tmp_path):
+    for name, tiles in [("players", ["p1", "p2"]), ("accs", ["acc1", "acc2"])]:
+        folder = tmp_path / name
+        folder.mkdir()
+        for i, tile in enumerate(tiles):
+            Image.new("RGB", (20, 20), (i * 80, 40, 0)).save(folder / f"{tile}.png")
+
+    service = RenderService(
+        tmp_path / "players", tmp_path / "accs", tmp_path, workers=2, queue_size=1
+    )
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def base_url(service):
+    server = RenderServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url, data=None, headers=None):
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, dict(response.headers), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def post(base_url, endpoint, spec):
+    return fetch(f"{base_url}/{endpoint}", json.dumps(spec).encode())
+
+
+def test_equivalent_specs_share_a_key():
+    as_text = normalize_request("compose", {"players_data": "p1, a\np2, b"})
+    as_lists = normalize_request(
+        "compose", {"players_data": [["p1", "a"], ["p2", " b"]], "teams": ["x"]}
+    )
+
+    assert request_key(as_text) == request_key(as_lists)
+    assert request_key(as_text) != request_key(
+        normalize_request("compose", {"players_data": "p1, a", "size": 32})
+    )
+
+
+@pytest.mark.parametrize(
+    "endpoint, spec",
+    [
+        ("compose", {}),
+        ("compose", {"players_data": "p1"}),
+        ("compose", {"players_data": "p1, a", "kind": "hats"}),
+        ("compose", {"players_data": "p1, a", "size": 4096}),
+        ("compose", {"players_data": "p1, a", "format": "GIF"}),
+        ("team", {"players_data": "p1, a"}),
+        ("roulette", {"players_data": "p1, a"}),
+        ("roulette", {**SPEC, "selectable_rows": ["x"]}),
+        ("roulette", {**SPEC, "fixed_rows": [-1]}),
+        ("roulette", {**SPEC, "fixed_rows": 2}),
+        ("bracket", {"players_data": "p1, a"}),
+    ],
+)
+def test_invalid_specs(endpoint, spec):
+    with pytest.raises(SpecError):
+        normalize_request(endpoint, spec)
+
+
+def test_roulette_without_seed_gets_one():
+    request = normalize_request("roulette", SPEC)
+
+    assert isinstance(request["seed"], int)
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_identical_requests_in_flight_are_coalesced(service):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def render():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return RenderedImage(b"png", "image/png")
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.get("k", render)))
+        for _ in range(5)
+    ]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: service.stats["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 5 and len({id(result) for result in results}) == 1
+    assert service.get("k", render) is results[0]
+    assert service.health()["cache_hits"] == 1
+    assert service.health()["in_flight"] == 0
+
+
+def test_full_queue_rejects_requests(service):
+    release = threading.Event()
+
+    def render():
+        release.wait(5)
+        return RenderedImage(b"png", "image/png")
+
+    # 2 workers + 1 queued render fill the service
+    threads = [
+        threading.Thread(target=service.get, args=(f"k{i}", render)) for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: service.health()["in_flight"] == 3)
+
+    with pytest.raises(ServiceBusy):
+        service.get("k3", render)
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert service.get("k3", render).data == b"png"
+    assert service.stats["rejected"] == 1
+
+
+def test_failed_render_is_not_cached(service):
+    def render():
+        raise RuntimeError("boom")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            service.get("k", render)
+
+    assert service.stats["errors"] == 2
+    assert service.health()["cached"] == 0
+
+
+def test_compose_and_team_endpoints(base_url):
+    status, headers, body = post(base_url, "compose", SPEC)
+
+    assert status == 200
+    assert headers["Content-Type"] == "image/png"
+    assert Image.open(io.BytesIO(body)).size == (188, 282)
+
+    status, _, body = post(base_url, "team", {**SPEC, "team": "p2", "size": 32})
+    assert status == 200
+    assert Image.open(io.BytesIO(body)).size == (32, 64)
+
+
+def test_get_with_etag_returns_not_modified(base_url):
+    url = f"{base_url}/compose?spec=" + urllib.parse.quote(json.dumps(SPEC))
+    status, headers, _ = fetch(url)
+
+    assert status == 200
+    status, again, body = fetch(url, headers={"If-None-Match": headers["ETag"]})
+    assert status == 304
+    assert body == b""
+    assert again["ETag"] == headers["ETag"]
+
+
+def test_roulette_is_reproducible_from_seed(base_url):
+    spec = {**SPEC, "seed": 7, "num_accessory_rows": 1, "columns": 2}
+    status, headers, body = post(base_url, "roulette", spec)
+    _, _, again = post(base_url, "roulette", spec)
+
+    assert status == 200
+    assert headers["X-Roulette-Seed"] == "7"
+    assert body == again
+    # Two teams side by side: avatar plus one drawn row each
+    assert Image.open(io.BytesIO(body)).size == (94 * 2 + 10, 94 * 2)
+
+
+@pytest.mark.parametrize("field", ["fixed_rows", "selectable_rows"])
+def test_roulette_rows_out_of_range(service, field):
+    with pytest.raises(SpecError, match=field):
+        service.render("roulette", {**SPEC, "seed": 1, field: [20]})
+
+
+def test_unseeded_roulette_is_not_cached(service):
+    for _ in range(3):
+        service.render("roulette", SPEC)
+    assert service.health()["cached"] == 0
+
+    service.render("roulette", {**SPEC, "seed": 1})
+    service.render("roulette", {**SPEC, "seed": 1})
+    assert service.health()["cached"] == 1
+    assert service.stats["cache_hits"] == 1
+
+
+def test_errors_and_health(base_url):
+    status, _, body = post(base_url, "compose", {"players_data": "p1"})
+    assert status == 400
+    assert "error" in json.loads(body)
+
+    assert fetch(f"{base_url}/nope")[0] == 404
+    assert fetch(f"{base_url}/compose", b"[1, 2]")[0] == 400
+
+    status, _, body = fetch(f"{base_url}/health")
+    assert status == 200
+    assert json.loads(body)["requests"] == 0
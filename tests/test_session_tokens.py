@@ -0,0 +1,112 @@
+import threading
+
+from backend.utils.session_tokens import RevocationList, SessionTokenSigner
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_issue_and_verify_token():
+    signer = SessionTokenSigner(secret="secret", ttl=60)
+    token = signer.issue("alice", "admin")
+
+    claims = signer.verify(token)
+
+    assert claims["sub"] == "alice"
+    assert claims["role"] == "admin"
+    assert claims["exp"] - claims["iat"] == 60
+
+
+def test_verify_rejects_tampered_or_foreign_tokens():
+    signer = SessionTokenSigner(secret="secret")
+    token = signer.issue("alice", "guest")
+    payload, signature = token.split(".")
+
+    forged_payload = SessionTokenSigner(secret="secret").issue("alice", "admin")
+    assert signer.verify(f"{forged_payload.split('.')[0]}.{signature}") is None
+    assert SessionTokenSigner(secret="other").verify(token) is None
+    assert signer.verify("garbage") is None
+    assert signer.verify("") is None
+    assert signer.verify(None) is None
+    assert signer.verify(f"{payload}.ç") is None
+
+
+def test_verify_rejects_expired_tokens():
+    clock = FakeClock()
+    signer = SessionTokenSigner(secret="secret", ttl=10, clock=clock)
+    token = signer.issue("alice", "admin")
+
+    clock.now += 9
+    assert signer.verify(token) is not None
+
+    clock.now += 1
+    assert signer.verify(token) is None
+
+
+def test_revoke_token_is_persisted_and_reloaded():
+    store = {}
+    clock = FakeClock()
+    revocations = RevocationList(
+        load=lambda: list(store.items()),
+        persist=store.__setitem__,
+        clock=clock,
+    )
+    signer = SessionTokenSigner(secret="secret", revocations=revocations, clock=clock)
+    token = signer.issue("alice", "admin")
+
+    signer.revoke(token)
+
+    assert signer.verify(token) is None
+    assert len(store) == 1
+
+    # A fresh process loads the revocations persisted by the previous one
+    restarted = SessionTokenSigner(
+        secret="secret",
+        revocations=RevocationList(load=lambda: list(store.items()), clock=clock),
+        clock=clock,
+    )
+    assert restarted.verify(token) is None
+    assert restarted.verify(restarted.issue("bob", "guest")) is not None
+
+
+def test_revocation_list_survives_load_errors():
+    def failing_load():
+        raise RuntimeError("DB down")
+
+    revocations = RevocationList(load=failing_load, persist=None)
+    revocations.revoke("jti", expires_at=float("inf"))
+
+    assert revocations.is_revoked("jti")
+    assert not revocations.is_revoked("other")
+
+
+def test_revocation_list_loads_outside_the_lock():
+    clock = FakeClock()
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_load():
+        loading.set()
+        release.wait(5)
+        return [("late", clock.now + 60)]
+
+    revocations = RevocationList(load=slow_load, clock=clock)
+    revocations.revoke("early", expires_at=clock.now + 60)
+
+    reloader = threading.Thread(target=revocations.is_revoked, args=("x",))
+    reloader.start()
+    assert loading.wait(5)
+
+    # Checks made while the load is in flight use the current list
+    assert revocations.is_revoked("early")
+    assert not revocations.is_revoked("late")
+
+    release.set()
+    reloader.join(5)
+    assert revocations.is_revoked("early")
+    assert revocations.is_revoked("late")
@@ -0,0 +1,107 @@
+from collections import Counter
+
+import pytest
+
+from backend.utils.style_assignment import assign_styles
+
+CATEGORIES = {
+    "BASIC": ["Fighter", "Soldier", "Spy", "Armor"],
+    "FUSION": ["Monge", "Juiz", "Beast", "Borg"],
+    "RIVAL": ["Demon", "Golem", "Veteran", "Wrestler"],
+}
+POOL = sum(CATEGORIES.values(), [])
+CATEGORY_OF = {style: cat for cat, styles in CATEGORIES.items() for style in styles}
+
+
+def test_assign_styles_columns_and_pairs():
+    teams = [["alice", "bob"], ["carol"]]
+
+    assignment = assign_styles(teams, POOL, 3, seed=1)
+
+    columns = assignment.columns()
+    assert [column[0] for column in columns] == ["alice", "bob", "carol"]
+    for column in columns:
+        styles = column[1:]
+        assert len(styles) == 3
+        assert len({style[:-1] for style in styles}) == 3
+        assert all(style[:-1] in POOL and style[-1] in ("A", "B") for style in styles)
+
+    assert assignment.team_columns(1) == [columns[2]]
+    assert assignment.pairs()[:3] == [["alice", style] for style in columns[0][1:]]
+
+
+def test_assign_styles_is_reproducible():
+    teams = [["p1", "p2", "p3"], ["p4", "p5"]]
+
+    first = assign_styles(teams, POOL, 2, seed=42)
+    second = assign_styles(teams, POOL, 2, seed=42)
+
+    assert first.seed == 42
+    assert first.columns() == second.columns()
+    assert assign_styles(teams, POOL, 2).seed != assign_styles(teams, POOL, 2).seed
+
+
+def test_assign_styles_unique_within_team():
+    teams = [[f"p{i}" for i in range(4)] for _ in range(50)]
+
+    assignment = assign_styles(teams, POOL, 3, seed=3, unique_within_team=True)
+
+    for team_idx in range(len(teams)):
+        styles = [
+            style[:-1]
+            for column in assignment.team_columns(team_idx)
+            for style in column[1:]
+        ]
+        assert len(styles) == len(set(styles)) == 12
+
+
+def test_assign_styles_unique_within_team_warns_when_pool_is_small():
+    warnings = []
+
+    assignment = assign_styles(
+        [["a", "b", "c"]],
+        ["X", "Y", "Z", "W"],
+        2,
+        seed=0,
+        unique_within_team=True,
+        warn_func=warnings.append,
+    )
+
+    assert warnings
+    # Each player still gets distinct styles
+    for column in assignment.columns():
+        assert len({style[:-1] for style in column[1:]}) == 2
+
+
+def test_assign_styles_balance_categories():
+    teams = [[f"p{i}" for i in range(5)] for _ in range(20)]
+
+    assignment = assign_styles(
+        teams, POOL, 3, seed=7, categories=CATEGORIES, balance_categories=True
+    )
+
+    for column in assignment.columns():
+        assert len({CATEGORY_OF[style[:-1]] for style in column[1:]}) == 3
+
+    usage = Counter(
+        CATEGORY_OF[style[:-1]]
+        for column in assignment.columns()
+        for style in column[1:]
+    )
+    assert set(usage.values()) == {100}
+
+
+def test_assign_styles_more_styles_than_pool():
+    warnings = []
+
+    assignment = assign_styles(
+        [["a"]], ["X", "Y"], 5, seed=0, warn_func=warnings.append
+    )
+
+    assert len(warnings) == 1
+    assert sorted(style[:-1] for style in assignment.columns()[0][1:]) == ["X", "Y"]
+
+
+def test_assign_styles_empty_pool():
+    with pytest.raises(ValueError):
+        assign_styles([["a"]], [], 1)
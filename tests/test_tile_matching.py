@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from backend.composers.generic_image_composer import GenericImageComposer
+from backend.utils.tile_matching import (
+    TileIndex,
+    columns_to_text,
+    folder_fingerprint,
+    load_or_build_index,
+    recognize_sheet,
+    slice_sheet,
+)
+
+
+def make_folder(folder, names, size, seed):
+    folder.mkdir()
+    rng = np.random.default_rng(seed)
+    for name in names:
+        pixels = rng.integers(0, 256, (4, 4, 3), dtype=np.uint8)
+        Image.fromarray(pixels).resize(size, Image.Resampling.NEAREST).save(
+            folder / f"{name}.png"
+        )
+    Image.new("RGB", size, (200, 200, 200)).save(folder / "no.png")
+
+    return folder
+
+
+def test_slice_sheet_ignores_partial_tiles():
+    sheet = np.zeros((94 * 2 + 5, 94 * 3 + 7, 4), dtype=np.uint8)
+    sheet[94:188, 188:282, 0] = 7
+
+    tiles = slice_sheet(sheet)
+
+    assert tiles.shape == (2, 3, 94, 94, 3)
+    assert (tiles[1, 2, ..., 0] == 7).all()
+    assert tiles[0, 2].max() == 0
+
+
+def test_index_search_finds_exact_tiles(tmp_path):
+    folder = make_folder(tmp_path / "accs", ["a", "b", "c"], (32, 32), seed=0)
+    index = TileIndex.from_folder(folder)
+
+    idx, dist = index.search(index.features[::-1])
+
+    assert [index.names[i] for i in idx[:4]] == ["no", "c", "b", "a"]
+    assert np.allclose(dist[:4], 0, atol=1e-6)
+
+
+def test_recognize_composed_sheet(tmp_path):
+    players = make_folder(tmp_path / "players", ["p1", "p2"], (120, 120), seed=1)
+    accs = make_folder(tmp_path / "accs", ["a", "b", "c", "d"], (32, 32), seed=2)
+    data = [["p1", "a", "b", "c", "d", "a"], ["p2", "c"], ["p1", "d", "b"]]
+    sheet = GenericImageComposer(players, accs).compose(data, (94, 94))
+
+    columns = recognize_sheet(
+        np.asarray(sheet), TileIndex.from_folder(players), TileIndex.from_folder(accs)
+    )
+
+    assert columns_to_text(columns) == "p1,a,b,c,d,a\np2,c\np1,d,b"
+    assert all(column.unknown == 0 for column in columns)
+
+
+def test_recognize_counts_unknown_tiles(tmp_path):
+    players = make_folder(tmp_path / "players", ["p1"], (94, 94), seed=3)
+    accs = make_folder(tmp_path / "accs", ["a"], (32, 32), seed=4)
+    sheet = np.asarray(
+        GenericImageComposer(players, accs).compose([["p1", "a"]], (94, 94))
+    )
+    sheet = sheet.copy()
+    sheet[94:, :, :] = np.random.default_rng(5).integers(0, 256, (94, 94, 3))
+
+    (column,) = recognize_sheet(
+        sheet, TileIndex.from_folder(players), TileIndex.from_folder(accs)
+    )
+
+    assert column.player == "p1"
+    assert column.accessories == []
+    assert column.unknown == 1
+
+
+def test_load_or_build_index_reuses_cache(tmp_path):
+    folder = make_folder(tmp_path / "accs", ["a"], (32, 32), seed=6)
+    cache_path = tmp_path / "index.npz"
+
+    built = load_or_build_index(folder, cache_path)
+    cached = load_or_build_index(folder, cache_path)
+
+    assert cached.names == built.names
+    assert np.array_equal(cached.features, built.features)
+
+    Image.new("RGB", (32, 32)).save(folder / "b.png")
+    stale = os.stat(folder).st_mtime + 10
+    os.utime(folder, (stale, stale))
+
+    assert "b" in load_or_build_index(folder, cache_path).names
+
+
+def test_load_or_build_index_rebuilds_files_replaced_in_place(tmp_path):
+    folder = make_folder(tmp_path / "accs", ["a"], (32, 32), seed=7)
+    cache_path = tmp_path / "index.npz"
+    built = load_or_build_index(folder, cache_path)
+    assert built.fingerprint == folder_fingerprint(folder)
+
+    # Same file list and an unchanged folder mtime, but different pixels
+    folder_times = (os.stat(folder).st_atime, os.stat(folder).st_mtime)
+    Image.new("RGB", (64, 64), (200, 10, 10)).save(folder / "a.png")
+    os.utime(folder, folder_times)
+
+    rebuilt = load_or_build_index(folder, cache_path)
+
+    assert rebuilt.fingerprint == folder_fingerprint(folder)
+    assert not np.array_equal(rebuilt.features, built.features)
@@ -0,0 +1,77 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.utils.image_utils import remove_rows
+from backend.utils.upload_cache import DecodedSheet, UploadCache, decode_sheet
+
+
+def png_bytes(num_rows=3, row_height=10, width=8, seed=0):
+    arr = np.zeros((num_rows * row_height, width, 3), dtype=np.uint8)
+    for i in range(num_rows):
+        arr[i * row_height : (i + 1) * row_height] = (i * 40 + seed) % 256
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_decode_sheet_row_slicing():
+    sheet = decode_sheet(png_bytes(), mode="RGBA", row_height=10)
+
+    assert sheet.array.shape == (30, 8, 4)
+    assert sheet.array.flags["C_CONTIGUOUS"]
+    assert not sheet.array.flags["WRITEABLE"]
+    assert sheet.num_rows == 3
+    assert sheet.row_offsets.tolist() == [0, 10, 20]
+    assert (sheet.row(2)[..., 0] == 80).all()
+    assert sheet.rows([2, 0])[:10, 0, 0].tolist() == [80] * 10
+    assert np.asarray(sheet) is sheet.array
+
+
+def test_upload_cache_decodes_once_per_content():
+    cache = UploadCache()
+    data = png_bytes()
+
+    first = cache.get(data, row_height=10)
+    second = cache.get(bytes(data), row_height=10)
+
+    assert first is second
+    assert len(cache) == 1
+    assert cache.get(data, mode="RGB", row_height=10) is not first
+
+
+def test_upload_cache_evicts_least_recently_used():
+    sheet_bytes = decode_sheet(png_bytes(), row_height=10).nbytes
+    cache = UploadCache(max_bytes=sheet_bytes * 2)
+
+    a = cache.get(png_bytes(seed=1), row_height=10)
+    cache.get(png_bytes(seed=2), row_height=10)
+    assert cache.get(png_bytes(seed=1), row_height=10) is a
+
+    cache.get(png_bytes(seed=3), row_height=10)
+
+    assert len(cache) == 2
+    assert cache.size <= cache.max_bytes
+    # seed=2 was the least recently used entry
+    assert cache.get(png_bytes(seed=1), row_height=10) is a
+
+
+def test_upload_cache_keeps_oversized_entry():
+    cache = UploadCache(max_bytes=1)
+
+    sheet = cache.get(png_bytes(), row_height=10)
+
+    assert len(cache) == 1
+    assert cache.get(png_bytes(), row_height=10) is sheet
+
+
+def test_decoded_sheet_works_with_row_functions():
+    sheet = DecodedSheet("digest", np.zeros((30, 4, 3), dtype=np.uint8), 10)
+
+    out = remove_rows(sheet, excluded_rows=[1], row_height=10)
+
+    assert out.size == (4, 20)
+    with pytest.raises(ValueError):
+        sheet.array[0, 0, 0] = 1
@@ -1,3 +1,6 @@
+from contextlib import nullcontext
+from pathlib import Path
+
 import pytest
 
 from backend.repository import user_repository
@@ -22,7 +25,9 @@ def test_fetch_roles(monkeypatch):
         def close(self):
             pass
 
-    monkeypatch.setattr(user_repository, "get_connection", lambda: DummyConn())
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(DummyConn())
+    )
 
     roles = user_repository.fetch_roles()
     assert roles == [(1, "admin"), (2, "user")]
@@ -60,19 +65,247 @@ def test_create_user(monkeypatch):
         def close(self):
             pass
 
-    monkeypatch.setattr(user_repository, "get_connection", lambda: DummyConn())
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(DummyConn())
+    )
 
     user_repository.create_user("2024-01-01", "testuser", "testpass", 1)
 
 
 def test_create_user_raises_runtimeerror(monkeypatch):
-    def fake_hashpw(*args, **kwargs):
+    def fake_hash_password(*args, **kwargs):
         raise Exception("bcrypt error")
 
-    monkeypatch.setattr(user_repository.bcrypt, "hashpw", fake_hashpw)
+    monkeypatch.setattr(user_repository, "hash_password", fake_hash_password)
 
     with pytest.raises(RuntimeError) as excinfo:
         user_repository.create_user("2024-01-01", "login", "pass", 1)
 
     assert "Erro ao criar usuário" in str(excinfo.value)
     assert "bcrypt error" in str(excinfo.value)
+
+
+@pytest.fixture(autouse=True)
+def clear_roles_cache():
+    user_repository.invalidate_roles_cache()
+    yield
+    user_repository.invalidate_roles_cache()
+
+
+def test_fetch_roles_is_cached(monkeypatch):
+    calls = []
+
+    class DummyCursor:
+        def execute(self, q):
+            calls.append(q)
+
+        def fetchall(self):
+            return [(1, "admin")]
+
+        def close(self):
+            pass
+
+    class DummyConn:
+        def cursor(self):
+            return DummyCursor()
+
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(DummyConn())
+    )
+
+    assert user_repository.fetch_roles() == [(1, "admin")]
+    assert user_repository.fetch_roles() == [(1, "admin")]
+    assert len(calls) == 1
+
+    user_repository.invalidate_roles_cache()
+    user_repository.fetch_roles()
+    assert len(calls) == 2
+
+    monkeypatch.setattr(user_repository, "ROLES_CACHE_TTL", 0)
+    user_repository.invalidate_roles_cache()
+    user_repository.fetch_roles()
+    user_repository.fetch_roles()
+    assert len(calls) == 4
+
+
+def test_role_writes_invalidate_roles_cache(monkeypatch):
+    roles = {1: "admin"}
+
+    class DummyCursor:
+        rowcount = 0
+
+        def execute(self, q, params=None):
+            q = " ".join(q.split())
+            self.rowcount = 1
+            if q.startswith("INSERT INTO roles"):
+                roles[max(roles) + 1] = params[0]
+            elif q.startswith("UPDATE roles"):
+                self.rowcount = int(params[1] in roles)
+                roles[params[1]] = params[0]
+            elif q.startswith("DELETE FROM roles"):
+                self.rowcount = int(roles.pop(params[0], None) is not None)
+
+        def fetchall(self):
+            return sorted(roles.items(), key=lambda role: role[1])
+
+        def close(self):
+            pass
+
+    class DummyConn:
+        def cursor(self):
+            return DummyCursor()
+
+        def commit(self):
+            pass
+
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(DummyConn())
+    )
+
+    assert user_repository.fetch_roles() == [(1, "admin")]
+
+    user_repository.create_role("moderator")
+    assert user_repository.fetch_roles() == [(1, "admin"), (2, "moderator")]
+
+    assert user_repository.rename_role(2, "guest")
+    assert user_repository.fetch_roles() == [(1, "admin"), (2, "guest")]
+
+    assert user_repository.delete_role(2)
+    assert not user_repository.delete_role(2)
+    assert user_repository.fetch_roles() == [(1, "admin")]
+
+
+def test_failed_role_write_invalidates_roles_cache(monkeypatch):
+    class FailingConn:
+        def cursor(self):
+            raise Exception("DB down")
+
+    user_repository._roles_cache.update(roles=[(1, "admin")], expires_at=1e18)
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(FailingConn())
+    )
+
+    with pytest.raises(RuntimeError, match="Erro ao criar papel"):
+        user_repository.create_role("moderator")
+    assert user_repository._roles_cache["roles"] is None
+
+
+def test_create_users_single_transaction(monkeypatch):
+    inserted = {}
+
+    class DummyConn:
+        commits = 0
+
+        def cursor(self):
+            return self
+
+        def commit(self):
+            DummyConn.commits += 1
+
+        def close(self):
+            pass
+
+    def fake_execute_values(cur, query, rows):
+        inserted["query"] = query
+        inserted["rows"] = rows
+
+    monkeypatch.setattr(user_repository, "execute_values", fake_execute_values)
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(DummyConn())
+    )
+    monkeypatch.setattr(
+        user_repository,
+        "hash_passwords",
+        lambda passwords: [f"hashed-{password}" for password in passwords],
+    )
+
+    count = user_repository.create_users(
+        "2024-01-01", [("alice", "pw1", 1), ("bob", "pw2", 2)]
+    )
+
+    assert count == 2
+    assert DummyConn.commits == 1
+    assert inserted["rows"] == [
+        ("2024-01-01", "alice", "hashed-pw1", 1),
+        ("2024-01-01", "bob", "hashed-pw2", 2),
+    ]
+    assert user_repository.create_users("2024-01-01", []) == 0
+
+
+def test_create_users_foreign_key_violation_invalidates_roles(monkeypatch):
+    user_repository._roles_cache["roles"] = [(1, "admin")]
+    user_repository._roles_cache["expires_at"] = float("inf")
+
+    def fake_get_connection():
+        raise user_repository.psycopg2.errors.ForeignKeyViolation("bad role")
+
+    monkeypatch.setattr(user_repository, "get_connection", fake_get_connection)
+    monkeypatch.setattr(user_repository, "hash_passwords", lambda passwords: passwords)
+
+    with pytest.raises(RuntimeError) as excinfo:
+        user_repository.create_users("2024-01-01", [("alice", "pw", 99)])
+
+    assert "Erro ao importar usuários" in str(excinfo.value)
+    assert user_repository._roles_cache["roles"] is None
+
+
+def test_parse_users_csv():
+    roles = [(1, "admin"), (2, "guest")]
+    csv_text = "login,password,role\nalice,pw1,Admin\nbob,pw2,guest\n"
+
+    assert user_repository.parse_users_csv(csv_text, roles) == [
+        ("alice", "pw1", 1),
+        ("bob", "pw2", 2),
+    ]
+
+    with pytest.raises(ValueError, match="cabeçalho"):
+        user_repository.parse_users_csv("user,pass\nalice,pw", roles)
+
+    with pytest.raises(ValueError, match="papel desconhecido"):
+        user_repository.parse_users_csv("login,password,role\nalice,pw,root", roles)
+
+    with pytest.raises(ValueError, match="login duplicado"):
+        user_repository.parse_users_csv(
+            "login,password,role\nalice,pw,admin\nalice,pw,guest", roles
+        )
+
+
+def test_revoke_session_token_prunes_expired(monkeypatch):
+    queries = []
+    commits = []
+
+    class DummyCursor:
+        def execute(self, q, params=None):
+            queries.append((" ".join(q.split()), params))
+
+        def close(self):
+            pass
+
+    class DummyConn:
+        def cursor(self):
+            return DummyCursor()
+
+        def commit(self):
+            commits.append(True)
+
+    monkeypatch.setattr(
+        user_repository, "get_connection", lambda: nullcontext(DummyConn())
+    )
+
+    user_repository.revoke_session_token("abc", 1700000000.0)
+
+    assert queries[0][0].startswith("INSERT INTO revoked_session_tokens")
+    assert queries[0][1] == ("abc", 1700000000.0)
+    assert queries[1][0].startswith("DELETE FROM revoked_session_tokens")
+    assert commits == [True]
+
+
+def test_revoked_session_tokens_schema():
+    schema = (
+        Path(user_repository.__file__).parent
+        / "create_table_revoked_session_tokens.sql"
+    ).read_text()
+
+    assert "CREATE TABLE IF NOT EXISTS revoked_session_tokens" in schema
+    assert "jti TEXT PRIMARY KEY" in schema
+    assert "ON revoked_session_tokens (expires_at)" in schema
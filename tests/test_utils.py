@@ -1,11 +1,15 @@
-from backend.utils.utils import (
+from backend.utils.list_utils import (
     assign_unique_styles_to_players,
     build_image_columns,
-    get_players_df,
-    get_styles_df,
     pad_list,
     parse_teams_from_text,
 )
+from backend.utils.utils import (
+    get_players_df,
+    get_styles_df,
+    invalidate_players_catalog,
+    load_players_df,
+)
 
 
 def test_parse_teams_from_text():
@@ -134,6 +138,36 @@ def test_get_players_df(tmp_path, monkeypatch):
     assert set(df["Name"]) == {"foo", "bar"}
 
 
+def test_load_players_df_accepts_jpeg_and_keeps_dotted_names(tmp_path, monkeypatch):
+    players_dir = tmp_path / "players"
+    players_dir.mkdir()
+    (players_dir / "foo.jpeg").touch()
+    (players_dir / "BAR.JPG").touch()
+    (players_dir / "mr.png.fan.png").touch()
+
+    monkeypatch.setattr("backend.utils.utils.PLAYERS_FOLDER", players_dir)
+
+    assert set(load_players_df()["Name"]) == {"foo", "BAR", "mr.png.fan"}
+
+
+def test_invalidate_players_catalog(tmp_path, monkeypatch):
+    players_dir = tmp_path / "players"
+    (players_dir / "thumbs").mkdir(parents=True)
+    (players_dir / "foo.png").touch()
+    monkeypatch.setattr("backend.utils.utils.PLAYERS_FOLDER", players_dir)
+    invalidate_players_catalog()
+
+    assert set(get_players_df()["Name"]) == {"foo"}
+
+    (players_dir / "baz.png").touch()
+    (players_dir / "thumbs" / "baz.png").touch()
+    assert set(get_players_df()["Name"]) == {"foo"}
+
+    invalidate_players_catalog()
+    assert set(get_players_df()["Name"]) == {"foo", "baz"}
+    invalidate_players_catalog()
+
+
 def test_get_styles_df(tmp_path, monkeypatch):
     styles_dir = tmp_path / "styles"
     styles_dir.mkdir()